@@ -18,6 +18,12 @@ setup(
     install_requires=[
         'pyserial',
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': ['windfreak-plus=windfreak_plus.cli:main'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
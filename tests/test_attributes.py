@@ -0,0 +1,92 @@
+"""Tests for the property descriptors bound to API attributes.
+
+The devices are simulated, so these tests run without hardware.
+"""
+
+import unittest
+from windfreak_plus import SynthHD, SynthNVPro, Simulator
+from windfreak_plus.attributes import Attr, BoolAttr, EnumAttr, NumberAttr, attributes, settable
+
+
+class AttributesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._hd = SynthHD('sim', transport=Simulator('SynthHD v2'))
+        self._nv = SynthNVPro('sim', transport=Simulator('SynthNV PRO'))
+
+    def tearDown(self):
+        self._hd.close()
+        self._nv.close()
+
+    def test_enum(self):
+        trigger_mode = SynthHD.trigger_mode
+        self.assertIsInstance(trigger_mode, EnumAttr)
+        # the first of repeated values wins
+        self.assertEqual(trigger_mode.codes['reserved'], 6)
+        self.assertEqual(trigger_mode.encode(self._hd, 'fm modulation'), 9)
+        self.assertEqual(trigger_mode.decode(8), 'am modulation')
+        for value in ('no such mode', None, ['disabled']):
+            with self.assertRaises(ValueError):
+                trigger_mode.encode(self._hd, value)
+        self._hd.trigger_mode = 'single frequency step'
+        self.assertEqual(self._hd.read('trig_function'), 2)
+        self.assertEqual(self._hd.trigger_mode, 'single frequency step')
+        self.assertEqual(self._hd.trigger_modes, trigger_mode.values)
+        with self.assertRaises(AttributeError):
+            self._hd.trigger_modes = ()
+
+    def test_bool(self):
+        self.assertIsInstance(SynthHD.sweep_enable, BoolAttr)
+        for value in (1, 'true', None):
+            with self.assertRaises(ValueError):
+                self._hd.sweep_enable = value
+        self._hd.sweep_enable = True
+        self.assertTrue(self._hd.sweep_enable)
+
+    def test_number(self):
+        frequency = type(self._hd[0]).frequency
+        self.assertIsInstance(frequency, NumberAttr)
+        self.assertEqual(frequency.range(self._hd[0]), self._hd.capabilities.frequency)
+        self.assertEqual(frequency.encode(self._hd[0], 1.e9), 1000.)
+        self.assertEqual(frequency.decode(1000.), 1.e9)
+        self.assertEqual(frequency.quantize(self._hd[0], 1.00000000004e9), 1.e9)
+        with self.assertRaises(ValueError):
+            self._hd[0].frequency = 1.e12
+        with self.assertRaises(ValueError):
+            self._hd[0].frequency = '1e9'
+        with self.assertRaises(TypeError):
+            self._hd[0].power = '0'
+        with self.assertRaises(TypeError):
+            self._hd[0].vga_dac = 1.
+        # ranges follow the model
+        self._nv.power = 10.0004
+        self.assertAlmostEqual(self._nv.power, 10.)
+        self._hd[0].power = 10.004
+        self.assertAlmostEqual(self._hd[0].power, 10.)
+
+    def test_cached(self):
+        self.assertIsNone(type(self._hd[0]).frequency.cached(self._hd[0]))
+        self._hd[0].frequency = 2.e9
+        self._hd.trigger_mode = 'disabled'
+        self.assertEqual(type(self._hd[0]).frequency.cached(self._hd[0]), 2.e9)
+        self.assertEqual(SynthHD.trigger_mode.cached(self._hd), 'disabled')
+
+    def test_readonly(self):
+        self.assertIsInstance(SynthHD.temperature, Attr)
+        self.assertEqual(self._hd.temperature, 30.)
+        with self.assertRaises(AttributeError):
+            self._hd.temperature = 20.
+
+    def test_attributes(self):
+        declared = attributes(SynthHD)
+        self.assertIn('trigger_mode', declared)
+        self.assertIn('temperature', declared)
+        self.assertNotIn('trigger_modes', declared)
+        self.assertTrue(settable(SynthHD, 'trigger_mode'))
+        self.assertFalse(settable(SynthHD, 'temperature'))
+        self.assertFalse(settable(SynthHD, 'trigger_modes'))
+        self.assertFalse(settable(SynthHD, 'no_such_property'))
+
+
+if __name__ == '__main__':
+    unittest.main()
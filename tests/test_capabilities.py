@@ -0,0 +1,109 @@
+"""Tests for Range and the per-model capability registry.
+
+The devices are simulated, so these tests run without hardware.
+"""
+
+import unittest
+from windfreak_plus import CAPABILITIES, SynthHD, SynthNVPro, Simulator
+from windfreak_plus.capabilities import PHASE, Range, capabilities, range_dict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class RangeTestCase(unittest.TestCase):
+
+    def test_immutable(self):
+        r = Range(0., 10., 0.1)
+        with self.assertRaises(AttributeError):
+            r.stop = 20.
+        with self.assertRaises(AttributeError):
+            del r.start
+        with self.assertRaises(AttributeError):
+            r.other = 1
+        self.assertEqual(r, Range(0., 10., 0.1))
+        self.assertEqual(hash(r), hash(Range(0., 10., 0.1)))
+        self.assertNotEqual(r, Range(0., 10., 0.01))
+
+    def test_validate(self):
+        r = Range(-70., 20., 0.01)
+        self.assertIn(-70., r)
+        self.assertNotIn(20.01, r)
+        r.validate(20.)
+        with self.assertRaises(ValueError) as context:
+            r.validate(-70.1, 'dBm')
+        self.assertEqual(str(context.exception), 'Expected float in range [-70.0, 20.0] dBm.')
+
+    def test_quantize(self):
+        self.assertEqual(Range(10.e6, 15000.e6, 0.1).quantize(1000000000.04), 1.e9)
+        self.assertEqual(PHASE.quantize(90.0004), 90.)
+        # steps that are not decimal fractions
+        self.assertEqual(Range(0, 100, 4).quantize(9), 8)
+
+    def test_validate_array(self):
+        r = Range(0., 360., 0.001)
+        r.validate_array([])
+        r.validate_array([0., 180., 360.])
+        r.validate_array(x for x in (1., 2.))
+        with self.assertRaises(ValueError) as context:
+            r.validate_array([0., 400., -1.], 'degrees')
+        self.assertIn('400.0 at index 1', str(context.exception))
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed.')
+    def test_validate_numpy(self):
+        r = Range(0., 360., 0.001)
+        r.validate_array(numpy.linspace(0., 360., 1001))
+        r.validate_array(numpy.array([]))
+        with self.assertRaises(ValueError) as context:
+            r.validate_array(numpy.array([0., 10., 361.]))
+        self.assertIn('at index 2', str(context.exception))
+
+
+class CapabilitiesTestCase(unittest.TestCase):
+
+    def test_registry(self):
+        self.assertEqual(set(CAPABILITIES), {'SynthHD v1.4', 'SynthHD v2', 'SynthHD PRO v2',
+                                             'SynthNV PRO'})
+        with self.assertRaises(TypeError):
+            CAPABILITIES['other'] = None
+        caps = capabilities('SynthHD v1.4')
+        self.assertIs(caps, CAPABILITIES['SynthHD v1.4'])
+        self.assertIsNone(capabilities('SynthHD v9'))
+        with self.assertRaises(AttributeError):
+            caps.frequency = Range(0., 1., 1.)
+        self.assertIsNone(caps.channel_spacing)
+        self.assertIsNone(range_dict(caps, 'channel_spacing'))
+        self.assertIsNone(range_dict(None, 'frequency'))
+
+    def test_supports(self):
+        self.assertTrue(CAPABILITIES['SynthHD v2'].supports('channel_spacing'))
+        self.assertFalse(CAPABILITIES['SynthHD v1.4'].supports('channel_spacing'))
+        self.assertTrue(CAPABILITIES['SynthNV PRO'].supports('detect_power'))
+        self.assertFalse(CAPABILITIES['SynthNV PRO'].supports('dual_pulse_mod'))
+        for model, caps in CAPABILITIES.items():
+            device_class = SynthNVPro if model == 'SynthNV PRO' else SynthHD
+            self.assertLessEqual(caps.api, set(device_class.API), model)
+
+    def test_devices(self):
+        for model, device_class in (('SynthHD v1.4', SynthHD), ('SynthHD PRO v2', SynthHD),
+                                    ('SynthNV PRO', SynthNVPro)):
+            device = device_class('sim', transport=Simulator(model))
+            try:
+                caps = CAPABILITIES[model]
+                self.assertIs(device.capabilities, caps)
+                channel = device[0] if device_class is SynthHD else device
+                # range properties return copies
+                frequency_range = channel.frequency_range
+                self.assertEqual(frequency_range, caps.frequency.as_dict())
+                frequency_range['stop'] = 0.
+                self.assertEqual(channel.frequency_range, caps.frequency.as_dict())
+                with self.assertRaises(ValueError):
+                    channel.frequency = caps.frequency.stop + 1.e6
+            finally:
+                device.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
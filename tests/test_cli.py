@@ -0,0 +1,75 @@
+"""Tests for the command-line tool.
+
+Commands run on simulated devices, so these tests run without hardware.
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock
+from windfreak_plus import SynthNVPro
+from windfreak_plus.cli import main
+
+
+class CommandLineTestCase(unittest.TestCase):
+
+    def _main(self, *argv, model='SynthHD v2'):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                status = main(['--simulate', model] + list(argv))
+            except SystemExit as exc:
+                status = exc.code
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_get_set(self):
+        status, stdout, _ = self._main('set', 'frequency@1=2000', 'rf_enable@1=on')
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, '3 requests, 18 bytes\n')
+        status, stdout, _ = self._main('get', 'temperature', 'model_type')
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, 'temperature = 30.0\nmodel_type = WFT SynthHD 1234\n')
+
+    def test_set_validation(self):
+        for assignment in ('frequency@0=99999', 'frequency=1000', 'trig_function=10',
+                           'trig_function=-1', 'rf_enable@0=2', 'power@2=0',
+                           'temperature=20', 'no_such_attribute=1'):
+            status, stdout, stderr = self._main('set', assignment)
+            self.assertEqual(status, 1, assignment)
+            self.assertEqual(stdout, '')
+            self.assertIn('error', stderr)
+
+    def test_monitor_clear(self):
+        with mock.patch.object(SynthNVPro, 'dev_clear', autospec=True) as dev_clear:
+            status, stdout, _ = self._main('monitor', '--count', '2', '--interval', '0',
+                                           model='SynthNV PRO')
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout.splitlines()[0], 'time temperature pll_lock calibrated detect_power')
+        self.assertEqual(len(stdout.splitlines()), 3)
+        self.assertEqual(dev_clear.call_count, 2)
+
+    def test_run_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'commands.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('# two tones\n\nset frequency@0=1000 power@0=-10\n'
+                        'get frequency@0 power@0  # check\n'
+                        'set frequency@0=99999\n'
+                        'get temperature\n')
+            status, stdout, stderr = self._main('run', path)
+        self.assertEqual(status, 1)
+        self.assertEqual(stdout, '3 requests, 24 bytes\nfrequency@0 = 1000.0\npower@0 = -10.0\n')
+        self.assertIn('commands.txt:5: ', stderr)
+
+    def test_run_stdin(self):
+        with mock.patch('sys.stdin', io.StringIO('get temperature\nbogus\n')):
+            status, stdout, stderr = self._main('run', '-')
+        self.assertEqual(status, 1)
+        self.assertEqual(stdout, 'temperature = 30.0\n')
+        self.assertIn('<stdin>:2: ', stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Tests for probe() and discover().
+
+The devices are simulated, so these tests run without hardware. The list of
+candidate ports is patched, since the simulated ports are not enumerated.
+"""
+
+import unittest
+from unittest import mock
+from windfreak_plus import SynthHD, SynthNVPro, Simulator, discover
+from windfreak_plus.discovery import clear_cache, probe
+
+
+class ProbeTestCase(unittest.TestCase):
+
+    def test_single_open(self):
+        simulator = Simulator('SynthHD v2')
+        descriptor = probe('sim', 'USB0', transport=simulator)
+        self.assertEqual(len(simulator.ports), 1)
+        self.assertIs(descriptor.device_class, SynthHD)
+        self.assertEqual(descriptor.model, 'SynthHD v2')
+        self.assertEqual(descriptor.usb_serial, 'USB0')
+
+    def test_synth_nv_pro(self):
+        descriptor = probe('sim', transport=Simulator('SynthNV PRO'))
+        self.assertIs(descriptor.device_class, SynthNVPro)
+        self.assertEqual(descriptor.model, 'SynthNV PRO')
+
+
+class DiscoverTestCase(unittest.TestCase):
+
+    PORTS = {'/dev/ttyACM0': 'USB0', '/dev/ttyACM1': None}
+
+    def setUp(self):
+        clear_cache()
+        self.addCleanup(clear_cache)
+        patcher = mock.patch('windfreak_plus.discovery.candidate_ports',
+                             return_value=dict(self.PORTS))
+        self._ports = patcher.start()
+        self.addCleanup(patcher.stop)
+        self._simulator = Simulator('SynthHD v2')
+
+    def test_discover(self):
+        found = discover(transport=self._simulator)
+        self.assertEqual([descriptor.devpath for descriptor in found], sorted(self.PORTS))
+        self.assertEqual(len(self._simulator.ports), 2)
+
+    def test_cache(self):
+        discover(transport=self._simulator)
+        # only the port without a USB serial number is probed again
+        found = discover(transport=self._simulator)
+        self.assertEqual(len(found), 2)
+        self.assertEqual(len(self._simulator.ports), 3)
+        discover(refresh=True, transport=self._simulator)
+        self.assertEqual(len(self._simulator.ports), 5)
+        # a cached device that moved to another path is probed again
+        self._ports.return_value = {'/dev/ttyACM2': 'USB0'}
+        found = discover(transport=self._simulator)
+        self.assertEqual([descriptor.devpath for descriptor in found], ['/dev/ttyACM2'])
+        self.assertEqual(len(self._simulator.ports), 6)
+        clear_cache()
+        discover(transport=self._simulator)
+        self.assertEqual(len(self._simulator.ports), 7)
+
+    def test_probe_failure(self):
+        def fail(devpath, timeout):
+            raise OSError('No such port.')
+
+        self.assertEqual(discover(transport=fail), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for IdentityCache and identity confirmation.
+
+The devices are simulated, so these tests run without hardware. The USB
+serial number of the simulated port is patched, since it has no USB device.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from windfreak_plus import IdentityCache, SynthHD, SynthNVPro, Simulator
+
+
+class IdentityCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._cache = IdentityCache(os.path.join(self._directory.name, 'identity.json'))
+        patcher = mock.patch('windfreak_plus.identity.usb_serial_number', return_value='USB0')
+        self._usb_serial = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _open(self, model, device_class=SynthHD):
+        simulator = Simulator(model)
+        device = device_class('sim', transport=simulator, identity_cache=self._cache)
+        self.addCleanup(device.close)
+        return device, simulator.ports[0]
+
+    def test_store(self):
+        self.assertIsNone(self._cache.lookup('sim'))
+        device, _ = self._open('SynthHD v2')
+        identity = self._cache.lookup('sim')
+        self.assertEqual(identity['model'], 'SynthHD v2')
+        self.assertEqual(identity['serial_number'], device.serial_number)
+        self.assertEqual(IdentityCache(self._cache.path).lookup('sim'), identity)
+
+    def test_hit(self):
+        self._open('SynthHD v2')
+        device, port = self._open('SynthHD v2')
+        # only the serial number is queried
+        self.assertEqual(port.requests, 1)
+        self.assertEqual(device.model, 'SynthHD v2')
+        self.assertEqual(device.model_type, 'WFT SynthHD 1234')
+        self.assertEqual(port.requests, 1)
+
+    def test_mismatch(self):
+        self._open('SynthHD v2')
+        device, _ = self._open('SynthHD v1.4')
+        self.assertEqual(device.model, 'SynthHD v1.4')
+        self.assertEqual(device[0].frequency_range['stop'], 13999.999999e6)
+        with self.assertRaises(ValueError):
+            device[0].frequency = 14.5e9
+        self.assertEqual(self._cache.lookup('sim')['model'], 'SynthHD v1.4')
+
+    def test_other_usb_device(self):
+        self._open('SynthHD v2')
+        self._usb_serial.return_value = 'USB1'
+        self.assertIsNone(self._cache.lookup('sim'))
+        device, port = self._open('SynthNV PRO', SynthNVPro)
+        self.assertEqual(device.model, 'SynthNV PRO')
+        self.assertGreater(port.requests, 1)
+
+    def test_invalidate(self):
+        self._open('SynthHD v2')
+        self._cache.invalidate('sim')
+        self.assertIsNone(self._cache.lookup('sim'))
+        self.assertIsNone(IdentityCache(self._cache.path).lookup('sim'))
+        self._cache.invalidate('sim')
+        self._open('SynthHD v2')
+        self._cache.clear()
+        self.assertIsNone(self._cache.lookup('sim'))
+
+
+if __name__ == '__main__':
+    unittest.main()
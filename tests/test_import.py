@@ -0,0 +1,47 @@
+"""Tests for lazy package imports.
+
+Imports are timed in fresh interpreters, see bench.import_time().
+"""
+
+import os
+import unittest
+from unittest import mock
+from windfreak_plus.bench import import_time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LazyImportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # the fresh interpreters import this tree
+        pythonpath = os.pathsep.join(filter(None, (ROOT, os.environ.get('PYTHONPATH'))))
+        patcher = mock.patch.dict(os.environ, PYTHONPATH=pythonpath)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_package(self):
+        timing = import_time('import windfreak_plus', repeat=1)
+        self.assertIn('windfreak_plus', timing.modules)
+        for module in ('serial', 'numpy', 'windfreak_plus.synth_hd', 'windfreak_plus.server',
+                       'asyncio', 'http.server'):
+            self.assertNotIn(module, timing.modules)
+
+    def test_device_class(self):
+        timing = import_time('from windfreak_plus import SynthHD', repeat=1)
+        self.assertIn('windfreak_plus.synth_hd', timing.modules)
+        self.assertNotIn('serial', timing.modules)
+        self.assertNotIn('numpy', timing.modules)
+
+    def test_attribute_error(self):
+        import windfreak_plus
+        with self.assertRaises(AttributeError):
+            windfreak_plus.NoSuchName
+        self.assertIn('SynthHD', dir(windfreak_plus))
+        for name in windfreak_plus.__all__:
+            self.assertIsNotNone(getattr(windfreak_plus, name))
+
+
+if __name__ == '__main__':
+    unittest.main()
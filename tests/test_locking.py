@@ -0,0 +1,88 @@
+"""Tests for thread-safe device access.
+
+The device is simulated, so these tests run without hardware. The simulated
+replies are delayed, so that unlocked accesses would interleave.
+"""
+
+import unittest
+from threading import Event, Thread
+from windfreak_plus import SynthHD, Simulator
+
+
+class LockingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dut = SynthHD('sim', transport=Simulator('SynthHD v2', latency=0.0005))
+
+    def tearDown(self):
+        self._dut.close()
+
+    def _run(self, *targets):
+        errors = []
+
+        def run(target):
+            try:
+                target()
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [Thread(target=run, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10.)
+        self.assertEqual(errors, [])
+
+    def test_channel_select(self):
+        # each channel selects itself before every access, so concurrent
+        # accesses to the other channel must not change its selection
+        results = {0: [], 1: []}
+
+        def access(index, power):
+            def target():
+                channel = self._dut[index]
+                for _ in range(50):
+                    channel.write('power', power)
+                    results[index].append(channel.read('power'))
+            return target
+
+        self._run(access(0, -10.), access(1, 5.))
+        self.assertEqual(set(results[0]), {-10.})
+        self.assertEqual(set(results[1]), {5.})
+
+    def test_queries(self):
+        # replies must be read by the thread that sent the query
+        results = {'temperature': [], 'model_type': []}
+
+        def query(attribute):
+            def target():
+                for _ in range(50):
+                    results[attribute].append(self._dut.read(attribute))
+            return target
+
+        self._run(query('temperature'), query('model_type'))
+        self.assertEqual(set(results['temperature']), {30.})
+        self.assertEqual(set(results['model_type']), {'WFT SynthHD 1234'})
+
+    def test_cached_without_lock(self):
+        self._dut[0].frequency = 1.e9
+        locked, release = Event(), Event()
+
+        def hold():
+            with self._dut._lock:
+                locked.set()
+                release.wait(10.)
+
+        thread = Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(1.))
+            self.assertEqual(self._dut[0].cached('frequency'), 1000.)
+            self.assertFalse(self._dut._lock.acquire(blocking=False))
+        finally:
+            release.set()
+            thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
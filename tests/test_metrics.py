@@ -0,0 +1,76 @@
+"""Tests for MetricsRegistry.
+
+The device is simulated, so these tests run without hardware.
+"""
+
+import unittest
+from urllib.request import urlopen
+from windfreak_plus import MetricsRegistry, SynthHD, Simulator
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dut = SynthHD('sim', transport=Simulator('SynthHD v2'))
+        self._registry = MetricsRegistry()
+        self._registry.instrument(self._dut, name='synth')
+
+    def tearDown(self):
+        self._registry.stop_serving()
+        self._dut.close()
+
+    def test_snapshot(self):
+        self._dut.write('channel', 1)
+        self._dut.write('channel', 0)
+        self._dut.read('temperature')
+        snapshot = self._registry.snapshot()['synth']
+        self.assertEqual(set(snapshot), {'channel', 'temperature'})
+        channel = snapshot['channel']
+        self.assertEqual(channel['writes'], 2)
+        self.assertEqual(channel['queries'], 0)
+        self.assertEqual(channel['bytes_sent'], len(b'C1') * 2)
+        self.assertEqual(channel['write_latency']['count'], 2)
+        temperature = snapshot['temperature']
+        self.assertEqual(temperature['queries'], 1)
+        self.assertEqual(temperature['bytes_sent'], len(b'z'))
+        self.assertEqual(temperature['bytes_received'], len(b'30.0\n'))
+        self.assertEqual(temperature['query_latency']['count'], 1)
+
+    def test_raw_and_channel_select(self):
+        self._dut[1].frequency = 1.e9
+        self._dut.write_raw(b'C0')
+        snapshot = self._registry.snapshot()['synth']
+        # the implicit select of the channel is counted
+        self.assertEqual(snapshot['channel']['writes'], 1)
+        self.assertEqual(snapshot['frequency']['writes'], 1)
+        self.assertEqual(snapshot['(raw)']['writes'], 1)
+
+    def test_detach_reset(self):
+        self._dut.read('temperature')
+        self._registry.detach(self._dut)
+        self._dut.read('temperature')
+        self.assertEqual(self._registry.snapshot()['synth']['temperature']['queries'], 1)
+        self._registry.reset()
+        self.assertEqual(self._registry.snapshot()['synth'], {})
+
+    def test_prometheus(self):
+        self._dut.read('temperature')
+        text = self._registry.prometheus()
+        self.assertIn('windfreak_queries_total{device="synth",attribute="temperature"} 1\n', text)
+        self.assertIn('windfreak_query_latency_seconds_bucket'
+                      '{device="synth",attribute="temperature",le="+Inf"} 1\n', text)
+        self.assertIn('windfreak_query_latency_seconds_count'
+                      '{device="synth",attribute="temperature"} 1\n', text)
+        self.assertNotIn('windfreak_write_latency_seconds_count', text)
+
+    def test_serve(self):
+        self._dut.read('temperature')
+        host, port = self._registry.serve(port=0)
+        with self.assertRaises(RuntimeError):
+            self._registry.serve(port=0)
+        with urlopen('http://{}:{}/metrics'.format(host, port), timeout=5.) as response:
+            self.assertEqual(response.read().decode('utf-8'), self._registry.prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Tests for PulseConfig and FMConfig.
+
+The devices are simulated, so these tests run without hardware.
+"""
+
+import unittest
+from windfreak_plus import FMConfig, PulseConfig, SynthHD, SynthNVPro, Simulator
+
+
+class ModulationConfigTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._hd = SynthHD('sim', transport=Simulator('SynthHD v2'))
+        self._nv = SynthNVPro('sim', transport=Simulator('SynthNV PRO'))
+
+    def tearDown(self):
+        self._hd.close()
+        self._nv.close()
+
+    def test_fm_round_trip(self):
+        for device in (self._hd, self._nv):
+            config = FMConfig(frequency=1000, deviation=50000, samples=200, mod_type='chirp',
+                              continuous=True)
+            device.fm_config = config
+            self.assertEqual(device.fm_config, config)
+
+    def test_fm_model_ranges(self):
+        config = FMConfig(frequency=1000, deviation=500000)
+        self._hd.fm_config = config
+        self.assertEqual(self._hd.read('fm_deviation'), 500000)
+        with self.assertRaises(ValueError) as context:
+            self._nv.fm_config = config
+        self.assertIn('deviation', str(context.exception))
+        with self.assertRaises(ValueError):
+            FMConfig(frequency=1000, deviation=2000000).compile(self._hd)
+        with self.assertRaises(ValueError):
+            FMConfig(frequency=10000, deviation=1000)
+        with self.assertRaises(TypeError):
+            FMConfig(frequency=1000, deviation=1000.)
+
+    def test_pulse_dual(self):
+        config = PulseConfig(on_time=10, off_time=90, repetitions=5, dual=True)
+        self._hd.pulse_config = config
+        self.assertEqual(self._hd.pulse_config, config)
+        # SynthNV PRO has no dual pulse modulation
+        with self.assertRaises(ValueError):
+            self._nv.pulse_config = config
+        self._nv.pulse_config = config._replace(dual=False)
+        self.assertEqual(self._nv.pulse_config, config._replace(dual=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Tests for Monitor and RingBuffer.
+
+The devices are simulated, so these tests run without hardware.
+"""
+
+import asyncio
+import unittest
+from threading import Event
+from time import sleep
+from windfreak_plus import SynthHD, SynthNVPro, Simulator
+from windfreak_plus.monitor import Monitor, RingBuffer
+
+
+class RingBufferTestCase(unittest.TestCase):
+
+    def test_wrap(self):
+        buffer = RingBuffer([('time', 'f8'), ('value', 'i4')], 3)
+        self.assertEqual(buffer.capacity, 3)
+        self.assertEqual(len(buffer.array()), 0)
+        for index in range(2):
+            buffer.append((index, index * 10))
+        self.assertEqual(buffer.array()['value'].tolist(), [0, 10])
+        for index in range(2, 5):
+            buffer.append((index, index * 10))
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.array()['value'].tolist(), [20, 30, 40])
+        self.assertEqual(buffer.array()['time'].tolist(), [2., 3., 4.])
+
+
+class MonitorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._simulator = Simulator('SynthHD v2')
+        self._dut = SynthHD('sim', transport=self._simulator)
+        self._port = self._simulator.ports[0]
+
+    def tearDown(self):
+        self._dut.close()
+
+    def _wait(self, condition, timeout=5.):
+        for _ in range(int(timeout / 0.005)):
+            if condition():
+                return
+            sleep(0.005)
+        self.fail('Timed out.')
+
+    def test_sample(self):
+        monitor = Monitor(self._dut, idle_gap=0.)
+        self.assertEqual(monitor.fields, ('temperature', 'lock_status_0', 'calibrated_0',
+                                          'lock_status_1', 'calibrated_1'))
+        writes = self._port.writes
+        monitor.sample()
+        # one burst of pipelined queries
+        self.assertEqual(self._port.writes, writes + 1)
+        samples = monitor.samples()
+        self.assertEqual(len(samples), 1)
+        self.assertEqual(samples['temperature'][0], 30.)
+        self.assertTrue(samples['lock_status_1'][0])
+
+    def test_measure_power(self):
+        device = SynthNVPro('sim', transport=Simulator('SynthNV PRO'))
+        try:
+            monitor = Monitor(device, idle_gap=0.)
+            cleared = []
+            device._dev.reset_input_buffer = lambda: cleared.append(True)
+            monitor.sample()
+            self.assertEqual(monitor.samples()['detect_power'][0], -30.)
+            self.assertEqual(cleared, [True])
+        finally:
+            device.close()
+
+    def test_thresholds(self):
+        alarms = []
+        monitor = Monitor(self._dut, idle_gap=0., thresholds={'temperature': (None, 25.)},
+                          callback=lambda name, value, time: alarms.append((name, value)))
+        monitor.sample()
+        monitor.sample()
+        self.assertEqual(alarms, [('temperature', 30.)])
+        with self.assertRaises(ValueError):
+            Monitor(self._dut, thresholds={'detect_power': (None, 0.)})
+
+    def test_thread(self):
+        monitor = Monitor(self._dut, interval=0.01, capacity=5, idle_gap=0.)
+        monitor.start()
+        with self.assertRaises(RuntimeError):
+            monitor.start()
+        try:
+            self._wait(lambda: len(monitor.samples()) == 5)
+            self._dut[0].frequency = 1.e9
+        finally:
+            monitor.stop()
+        times = monitor.samples()['time']
+        self.assertEqual(times.tolist(), sorted(times))
+        self.assertEqual(self._dut[0].read('frequency'), 1000.)
+
+    def test_async(self):
+        monitor = Monitor(self._dut, interval=0.01, idle_gap=0.)
+
+        async def run():
+            task = asyncio.ensure_future(monitor.run())
+            while len(monitor.samples()) < 3:
+                await asyncio.sleep(0.005)
+            monitor.stop()
+            await asyncio.wait_for(task, 5.)
+
+        asyncio.run(run())
+        self.assertGreaterEqual(len(monitor.samples()), 3)
+
+    def test_errors(self):
+        errors = []
+        failed = Event()
+
+        def callback(name, value, time):
+            errors.append((name, value))
+            failed.set()
+
+        monitor = Monitor(self._dut, interval=0.01, idle_gap=0., callback=callback,
+                          max_backoff=0.04)
+        readline = self._port.readline
+        self._port.readline = lambda: b''
+        monitor.start()
+        try:
+            self.assertTrue(failed.wait(5.))
+            self._wait(lambda: len(monitor.errors()) >= 3)
+            self.assertEqual(len(monitor.samples()), 0)
+            self._port.readline = readline
+            self._wait(lambda: len(monitor.samples()) >= 2)
+        finally:
+            monitor.stop()
+        self.assertEqual(errors[0][0], 'error')
+        self.assertIsInstance(errors[0][1], TimeoutError)
+        recorded = monitor.errors(clear=True)
+        self.assertIsInstance(recorded[0].error, TimeoutError)
+        self.assertEqual(monitor.errors(), [])
+        # sampling backed off after repeated failures
+        self.assertGreaterEqual(recorded[2].time - recorded[1].time, 0.03)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Tests for FrequencyPlanner and plan_frequencies().
+
+The device is simulated, so these tests run without hardware.
+"""
+
+import random
+import unittest
+from unittest import mock
+from windfreak_plus import SynthHD, Simulator
+from windfreak_plus.planner import FrequencyPlanner, plan_frequencies
+from windfreak_plus.settling import LockTimeStatistics
+
+
+class FrequencyPlannerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # SynthHD v2 fundamental VCO range: 3.4 to 6.8 GHz
+        self._planner = FrequencyPlanner('SynthHD v2', default_lock_time=1.e-3,
+                                         divider_penalty=2.)
+
+    def test_divider(self):
+        self.assertEqual(self._planner.divider(5.e9), 0)
+        self.assertEqual(self._planner.divider(2.e9), 1)
+        self.assertEqual(self._planner.divider(1.e9), 2)
+        self.assertEqual(self._planner.divider(10.e9), -1)
+
+    def test_lock_time(self):
+        self.assertEqual(self._planner.lock_time(None, 5.e9), 1.e-3)
+        # short jump within a divider
+        self.assertAlmostEqual(self._planner.lock_time(5.e9, 5.e9), 0.5e-3)
+        # full-span jump within a divider
+        self.assertAlmostEqual(self._planner.lock_time(3.4e9, 6.8e9 - 1.), 1.e-3, places=9)
+        # divider change
+        self.assertEqual(self._planner.lock_time(5.e9, 2.e9), 2.e-3)
+
+    def test_order(self):
+        frequencies = [2.e9, 5.e9, 3.e9, 4.e9, 6.e9, 2.5e9]
+        plan = self._planner.plan(frequencies)
+        self.assertEqual(sorted(plan), sorted(frequencies))
+        self.assertEqual(plan.frequencies, (2.e9, 2.5e9, 3.e9, 4.e9, 5.e9, 6.e9))
+        self.assertGreater(plan.saved_time, 0.)
+        self.assertAlmostEqual(plan.estimated_time, self._planner.total_time(plan))
+        # starting at the top, the plan runs downwards
+        plan = self._planner.plan(frequencies, start=6.e9)
+        self.assertEqual(plan.frequencies[0], 6.e9)
+        self.assertEqual(plan.frequencies[-1], 2.e9)
+
+    def test_divider_penalty(self):
+        # alternating dividers are grouped, so the divider changes only once
+        frequencies = [2.e9, 5.e9, 2.1e9, 5.1e9, 2.2e9, 5.2e9]
+        plan = self._planner.plan(frequencies)
+        dividers = [self._planner.divider(frequency) for frequency in plan]
+        changes = sum(a != b for a, b in zip(dividers, dividers[1:]))
+        self.assertEqual(changes, 1)
+
+    def test_two_opt(self):
+        random.seed(0)
+        frequencies = [random.uniform(1.e9, 12.e9) for _ in range(40)]
+        plan = self._planner.plan(frequencies)
+        self.assertLessEqual(plan.estimated_time, self._planner.total_time(sorted(frequencies)))
+        self.assertLessEqual(plan.estimated_time, plan.unordered_time)
+
+    def test_statistics(self):
+        statistics = LockTimeStatistics(band_width=100.e6)
+        for lock_time in (3.e-3, 4.e-3, 5.e-3):
+            statistics.record(5.05e9, lock_time)
+        planner = FrequencyPlanner('SynthHD v2', statistics=statistics)
+        self.assertEqual(planner.lock_time(None, 5.01e9), 4.e-3)
+        self.assertEqual(planner.lock_time(None, 6.e9), 1.e-3)
+        # medians are computed once per band, not per jump
+        frequencies = [5.0e9 + index * 1.e6 for index in range(50)] + [6.e9, 6.01e9]
+        with mock.patch.object(statistics, 'quantile', wraps=statistics.quantile) as quantile:
+            plan = planner.plan(frequencies)
+        self.assertEqual(quantile.call_count, 2)
+        self.assertAlmostEqual(plan.estimated_time, planner.total_time(plan))
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            FrequencyPlanner('SynthHD v9')
+        with self.assertRaises(ValueError):
+            self._planner.plan([1.e9, 20.e9])
+
+
+class PlanFrequenciesTestCase(unittest.TestCase):
+
+    def test_channel(self):
+        device = SynthHD('sim', transport=Simulator('SynthHD v2'))
+        try:
+            device[0].frequency = 6.e9
+            plan = plan_frequencies(device[0], [4.e9, 5.e9, 6.e9])
+            self.assertEqual(plan.frequencies, (6.e9, 5.e9, 4.e9))
+        finally:
+            device.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
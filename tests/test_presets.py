@@ -0,0 +1,119 @@
+"""Tests for PresetStore and compile_preset().
+
+The device is simulated, so these tests run without hardware.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from windfreak_plus import PresetStore, SynthHD, SynthNVPro, Simulator
+from windfreak_plus.presets import compile_preset
+
+
+SETTINGS = {
+    'model': 'SynthHD v2',
+    'device': {'trigger_mode': 'disabled'},
+    'channels': [
+        {'frequency': 1.e9, 'power': -10., 'enable': True},
+        {'enable': False},
+    ],
+}
+
+
+class PresetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dut = SynthHD('sim', transport=Simulator('SynthHD v2'))
+        self._directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dut.close()
+        self._directory.cleanup()
+
+    def _write(self, filename, text):
+        with open(os.path.join(self._directory.name, filename), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_compile(self):
+        preset = compile_preset(self._dut, 'test', SETTINGS)
+        self.assertEqual(preset.name, 'test')
+        self.assertEqual(preset.model, 'SynthHD v2')
+        self.assertTrue(preset.data.startswith(b'w0C0f1000.00000000W-10.000'))
+        self.assertIn(((0, 'frequency'), 1000.), preset.updates)
+
+    def test_save_apply(self):
+        store = PresetStore(self._directory.name, self._dut)
+        store.save('test', SETTINGS)
+        self.assertIn('test', store)
+        with open(os.path.join(self._directory.name, 'test.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), SETTINGS)
+        store.apply('test')
+        self.assertEqual(self._dut[0].read('frequency'), 1000.)
+        self.assertTrue(self._dut[0].rf_enable)
+        self.assertFalse(self._dut[1].rf_enable)
+        self.assertEqual(self._dut[0].cached('power'), -10.)
+
+    def test_save_names(self):
+        store = PresetStore(self._directory.name, self._dut)
+        for name in ('', '../outside', 'sub/test', 'sub\\test', '..', 'a..b'):
+            with self.assertRaises(ValueError):
+                store.save(name, SETTINGS)
+        self.assertEqual(os.listdir(self._directory.name), [])
+        self.assertEqual(store.names, ())
+
+    def test_save_existing(self):
+        self._write('toml.toml', '[[channels]]\npower = -5.0\n')
+        store = PresetStore(self._directory.name, self._dut)
+        store.save('test', SETTINGS)
+        with self.assertRaises(ValueError):
+            store.save('test', {'channels': [{'power': 0.}]})
+        store.save('test', {'channels': [{'power': 0.}]}, overwrite=True)
+        store.apply('test')
+        self.assertEqual(self._dut[0].read('power'), 0.)
+        # a JSON preset would shadow the TOML one
+        for overwrite in (False, True):
+            with self.assertRaises(ValueError):
+                store.save('toml', SETTINGS, overwrite=overwrite)
+        store.reload()
+        self.assertEqual(sorted(store.names), ['test', 'toml'])
+
+    def test_reload(self):
+        self._write('a.json', json.dumps({'channels': [{'power': 0.}]}))
+        self._write('b.toml', '[[channels]]\npower = -5.0\n')
+        self._write('notes.txt', 'ignored')
+        store = PresetStore(self._directory.name, self._dut)
+        self.assertEqual(sorted(store.names), ['a', 'b'])
+        store.apply('b')
+        self.assertEqual(self._dut[0].read('power'), -5.)
+        self._write('b.json', '{}')
+        with self.assertRaises(ValueError):
+            store.reload()
+
+    def test_validation(self):
+        invalid = (
+            {'model': 'SynthNV PRO'},
+            {'unknown': {}},
+            {'channels': [{}, {}, {}]},
+            {'channels': [{'frequency': 1.e12}]},
+            {'channels': [{'lock_status': True}]},
+            {'device': {'no_such_property': 1}},
+            {'device': {'trigger_mode': 'no such mode'}},
+        )
+        for settings in invalid:
+            with self.assertRaises(ValueError):
+                compile_preset(self._dut, 'test', settings)
+        with self.assertRaises(TypeError):
+            compile_preset(self._dut, 'test', {'channels': [{'enable': 1}]})
+
+    def test_no_channels(self):
+        device = SynthNVPro('sim', transport=Simulator('SynthNV PRO'))
+        try:
+            with self.assertRaises(ValueError):
+                compile_preset(device, 'test', {'channels': [{'power': 0.}]})
+        finally:
+            device.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
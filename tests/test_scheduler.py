@@ -0,0 +1,122 @@
+"""Tests for CommandScheduler.
+
+The scheduled device is simulated, so these tests run without hardware.
+"""
+
+import unittest
+from threading import Event
+from time import sleep
+from windfreak_plus import CommandScheduler, SynthHD, SynthNVPro, Simulator
+from windfreak_plus.scheduler import BULK, CONTROL, NORMAL, SAFETY
+
+
+class CommandSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dut = SynthHD('sim', transport=Simulator('SynthHD v2'))
+        self._scheduler = CommandScheduler(self._dut)
+
+    def tearDown(self):
+        self._scheduler.stop(cancel=True)
+        self._dut.close()
+
+    def _block(self):
+        """Start the worker on a command that runs until the returned event is set."""
+        started, release = Event(), Event()
+        self._scheduler.submit(lambda: (started.set(), release.wait()), name='block')
+        self._scheduler.start()
+        self.assertTrue(started.wait(1.))
+        return release
+
+    def test_priority_order(self):
+        order = []
+        for priority in (BULK, NORMAL, SAFETY, CONTROL, NORMAL):
+            self._scheduler.submit(order.append, priority, priority=priority)
+        self.assertEqual(self._scheduler.pending, 5)
+        self._scheduler.start()
+        self._scheduler.stop()
+        self.assertEqual(order, [SAFETY, CONTROL, NORMAL, NORMAL, BULK])
+
+    def test_deadline_order(self):
+        order = []
+        self._scheduler.submit(order.append, 'none', priority=NORMAL)
+        self._scheduler.submit(order.append, 'late', priority=NORMAL, deadline=10.)
+        self._scheduler.submit(order.append, 'bulk', priority=BULK, deadline=0.)
+        self._scheduler.submit(order.append, 'early', priority=NORMAL, deadline=1.)
+        self._scheduler.submit(order.append, 'none 2', priority=NORMAL)
+        self._scheduler.start()
+        self._scheduler.stop()
+        self.assertEqual(order, ['early', 'late', 'none', 'none 2', 'bulk'])
+
+    def test_set(self):
+        self._scheduler.start()
+        future = self._scheduler.set(self._dut[1], 'frequency', 2.e9)
+        self.assertIsNone(future.result(1.))
+        self.assertEqual(self._dut[1].frequency, 2.e9)
+
+    def test_rf_off_preempts_bulk(self):
+        for channel in self._dut:
+            channel.enable = True
+        release = self._block()
+        order = []
+        bulk = [self._scheduler.submit(order.append, row, priority=BULK) for row in range(10)]
+        rf_off = self._scheduler.rf_off()
+        rf_off.add_done_callback(lambda future: order.append('rf_off'))
+        self._scheduler.submit(order.append, 'after', priority=NORMAL)
+        release.set()
+        self._scheduler.stop()
+        self.assertEqual(order, ['rf_off', 'after'] + list(range(10)))
+        self.assertTrue(all(future.done() for future in bulk))
+        for channel in self._dut:
+            self.assertFalse(channel.rf_enable)
+
+    def test_stop_all_cancels_pending(self):
+        self._dut.sweep_enable = True
+        self._dut.dual_pulse_mod_enable = True
+        self._dut[0].enable = True
+        release = self._block()
+        bulk = [self._scheduler.submit(sleep, 0., priority=BULK) for _ in range(10)]
+        stop_all = self._scheduler.stop_all()
+        release.set()
+        stop_all.result(1.)
+        self.assertTrue(all(future.cancelled() for future in bulk))
+        self.assertEqual(self._scheduler.pending, 0)
+        self.assertFalse(self._dut.sweep_enable)
+        self.assertFalse(self._dut.dual_pulse_mod_enable)
+        self.assertFalse(self._dut[0].enable)
+
+    def test_stop_all_unsupported(self):
+        # SynthNV PRO has no dual pulse modulation
+        device = SynthNVPro('sim', transport=Simulator('SynthNV PRO'))
+        scheduler = CommandScheduler(device)
+        try:
+            device.fm_enable = True
+            scheduler.start()
+            scheduler.stop_all().result(1.)
+            self.assertFalse(device.fm_enable)
+            self.assertFalse(device.enable)
+        finally:
+            scheduler.stop(cancel=True)
+            device.close()
+
+    def test_exception(self):
+        self._scheduler.start()
+        future = self._scheduler.set(self._dut[0], 'frequency', 1.e12)
+        with self.assertRaises(ValueError):
+            future.result(1.)
+
+    def test_deadline_miss(self):
+        misses = []
+        self._scheduler = CommandScheduler(self._dut, on_miss=misses.append)
+        self._scheduler.submit(sleep, 0.05, deadline=0.01, name='slow')
+        self._scheduler.submit(sleep, 0., deadline=10., name='fast')
+        self._scheduler.start()
+        self._scheduler.stop()
+        self.assertEqual([miss.name for miss in misses], ['slow'])
+        self.assertEqual(self._scheduler.misses(clear=True), misses)
+        self.assertGreater(misses[0].completed, misses[0].deadline)
+        self.assertEqual(self._scheduler.misses(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
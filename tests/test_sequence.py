@@ -0,0 +1,101 @@
+"""Tests for compile_sequence().
+
+The device is simulated, so these tests run without hardware.
+"""
+
+import unittest
+from windfreak_plus import SynthHD, SynthNVPro, Simulator, compile_sequence
+from windfreak_plus.sequence import Call, Set, Wait
+
+
+class CompileSequenceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dut = SynthHD('sim', transport=Simulator('SynthHD v2'))
+
+    def tearDown(self):
+        self._dut.close()
+
+    def test_redundant_writes(self):
+        sequence = compile_sequence(self._dut, [
+            Set('frequency', 1.e9, channel=0),
+            Set('frequency', 1.e9, channel=0),
+            Set('power', -10., channel=0),
+            Set('power', -10., channel=1),
+            Set('power', -10., channel=1),
+        ])
+        self.assertEqual(sequence.data, b'C0f1000.00000000W-10.000C1W-10.000')
+
+    def test_from_shadow(self):
+        self._dut[0].frequency = 1.e9
+        steps = [Set('frequency', 1.e9, channel=0), Set('power', -10., channel=0)]
+        self.assertEqual(compile_sequence(self._dut, steps).data,
+                         b'C0f1000.00000000W-10.000')
+        self.assertEqual(compile_sequence(self._dut, steps, from_shadow=True).data,
+                         b'W-10.000')
+
+    def test_autonomous_modes(self):
+        sequence = compile_sequence(self._dut, [
+            Set('frequency', 1.e9, channel=0),
+            Set('sweep_enable', False),
+            Set('frequency', 1.e9, channel=0),
+            Set('sweep_enable', False),
+            Set('frequency', 1.e9, channel=0),
+            Set('sweep_enable', True),
+            Set('frequency', 1.e9, channel=0),
+        ])
+        # a sweep may have been running until the first disable, and runs
+        # after the enable
+        self.assertEqual(sequence.data,
+                         b'C0f1000.00000000c0C0f1000.00000000c1C0f1000.00000000')
+
+    def test_waits(self):
+        sequence = compile_sequence(self._dut, [
+            Wait(0.01),
+            Set('frequency', 1.e9, channel=0),
+            Wait(0.02),
+            Wait(0.01),
+            Set('frequency', 2.e9, channel=0),
+            Wait(0.02),
+        ], byte_time=0.)
+        self.assertEqual(len(sequence), 3)
+        self.assertEqual(sequence.waits, (0.01, 0.03, 0.02))
+        self.assertEqual(sequence.segments[2], b'')
+        self.assertAlmostEqual(sequence.estimated_time, 0.06)
+        times = sequence.run()
+        for time, expected in zip(times, (0.01, 0.04, 0.06)):
+            self.assertGreaterEqual(time, expected)
+            self.assertLess(time, expected + 0.02)
+        self.assertEqual(self._dut[0].read('frequency'), 2000.)
+        self.assertEqual(self._dut[0].cached('frequency'), 2000.)
+
+    def test_dict_steps(self):
+        sequence = compile_sequence(self._dut, [
+            {'set': 'power', 'value': -5., 'channel': 1},
+            {'wait': 0.},
+            {'call': 'save'},
+        ])
+        self.assertEqual(sequence.data, b'C1W-5.000e')
+
+    def test_errors(self):
+        for steps in ([Set('frequency', 1.e12, channel=0)],
+                      [Set('frequency', 1.e9, channel=2)],
+                      [Set('lock_status', True, channel=0)],
+                      [Wait(-1.)],
+                      [{'bogus': 1}]):
+            with self.assertRaises(ValueError):
+                compile_sequence(self._dut, steps)
+        with self.assertRaises(TypeError):
+            compile_sequence(self._dut, [Set('enable', 1, channel=0)])
+
+    def test_uncompilable_call(self):
+        device = SynthNVPro('sim', transport=Simulator('SynthNV PRO'))
+        try:
+            with self.assertRaises(ValueError):
+                compile_sequence(device, [Call('init')])
+        finally:
+            device.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Tests for DeviceServer and remote devices.
+
+The served devices are simulated, so these tests run without hardware.
+"""
+
+import unittest
+from threading import Thread
+from unittest import mock
+from windfreak_plus import PulseConfig, SynthHD, Simulator, compile_sequence
+from windfreak_plus.sequence import Set, Wait
+from windfreak_plus.server import DeviceServer, RemoteSynthHD, connect
+
+
+class DeviceServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._simulator = Simulator('SynthHD v2', latency=0.02)
+        self._device = SynthHD('sim', transport=self._simulator)
+        self._server = DeviceServer({'hd': self._device})
+        self._server.start()
+        self._remote = connect(self._server.address, 'hd')
+
+    def tearDown(self):
+        self._remote.close()
+        self._server.shutdown()
+        self._device.close()
+
+    @property
+    def _port(self):
+        return self._simulator.ports[0]
+
+    def test_connect(self):
+        self.assertIsInstance(self._remote, RemoteSynthHD)
+        self.assertEqual(self._remote.model, 'SynthHD v2')
+        self.assertEqual(len(self._remote), 2)
+        with self.assertRaises(KeyError):
+            connect(self._server.address, 'nv')
+
+    def test_write_read(self):
+        self._remote[1].frequency = 2.e9
+        self._remote[1].power = -5.
+        self.assertEqual(self._device[1].read('frequency'), 2000.)
+        self.assertEqual(self._remote[1].frequency, 2.e9)
+        self.assertEqual(self._remote[1].power, -5.)
+        self.assertEqual(self._remote[0].frequency, 10.e6)
+
+    def test_shadow(self):
+        self._remote[0].frequency = 1.e9
+        requests = self._port.requests
+        for _ in range(3):
+            self.assertEqual(self._remote[0].frequency, 1.e9)
+        self.assertEqual(self._port.requests, requests)
+        self.assertEqual(self._remote.cached('channel'), 0)
+
+    def _ops(self):
+        """Record the operations the remote device sends to the server."""
+        return mock.patch.object(self._remote, '_call', wraps=self._remote._call)
+
+    def test_coalesced_reads(self):
+        # a wide window, so that reads merge however the threads are scheduled
+        server = DeviceServer({'hd': self._device}, coalesce_window=1.)
+        server.start()
+        self.addCleanup(server.shutdown)
+        clients = [connect(server.address, 'hd') for _ in range(4)]
+        requests = self._port.requests
+        values = []
+        threads = [Thread(target=lambda c=client: values.append(c.temperature))
+                   for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for client in clients:
+            client.close()
+        self.assertEqual(values, [30.] * len(clients))
+        self.assertEqual(self._port.requests, requests + 1)
+
+    def test_write_raw(self):
+        with self._remote.capture() as requests:
+            self._remote[0].frequency = 1.5e9
+            self._remote[1].power = 0.
+        self._remote.write_raw(''.join(requests), requests.updates)
+        self.assertEqual(self._device[0].read('frequency'), 1500.)
+        self.assertEqual(self._device[1].read('power'), 0.)
+        self.assertEqual(self._remote[0].cached('frequency'), 1500.)
+        self.assertEqual(self._remote.cached('channel'), 1)
+
+    def test_cached_mirror(self):
+        self._remote[1].power = -5.
+        other = connect(self._server.address, 'hd')
+        self.addCleanup(other.close)
+        other[1].power = -10.
+        with self._ops() as call:
+            self.assertEqual(self._remote[1].cached('power'), -5.)
+            self.assertEqual(self._remote.cached('channel'), 1)
+        call.assert_not_called()
+        # changes by other clients are seen once read
+        self.assertEqual(self._remote[1].power, -10.)
+        self.assertEqual(self._remote[1].cached('power'), -10.)
+        self.assertIsNone(other[1].cached('frequency'))
+
+    def test_read_config(self):
+        config = PulseConfig(on_time=10, off_time=90, repetitions=5, dual=True)
+        self._device.pulse_config = config
+        with self._ops() as call:
+            self.assertEqual(self._remote.pulse_config, config)
+        self.assertEqual([c[0][0] for c in call.call_args_list], ['read_config'])
+
+    def test_init_fast(self):
+        self._remote.init()
+        self._remote[0].frequency = 1.e9
+        self._remote.sweep_enable = True
+        with self._ops() as call:
+            self._remote.init(fast=True)
+        self.assertEqual([c[0][0] for c in call.call_args_list], ['write_targets'])
+        self.assertEqual(self._device[0].read('frequency'), 10.)
+        self.assertFalse(self._device.sweep_enable)
+        self.assertEqual(self._remote[0].cached('frequency'), 10.)
+        self.assertFalse(self._remote.cached('sweep_cont'))
+
+    def test_run_sequence(self):
+        sequence = compile_sequence(self._remote, [
+            Set('frequency', 1.e9, channel=0),
+            Wait(0.05),
+            Set('power', -5., channel=1),
+        ])
+        with self._ops() as call:
+            times = sequence.run()
+        self.assertEqual([c[0][0] for c in call.call_args_list], ['run_sequence'])
+        self.assertEqual(len(times), 2)
+        self.assertGreaterEqual(times[1], 0.05)
+        self.assertEqual(self._device[0].read('frequency'), 1000.)
+        self.assertEqual(self._device[1].read('power'), -5.)
+        self.assertEqual(self._remote[1].cached('power'), -5.)
+
+    def test_errors(self):
+        with self.assertRaises(KeyError):
+            self._remote.write('no_such_attribute', 1)
+        with self.assertRaises(ValueError):
+            self._remote._call('no_such_operation')
+        with self.assertRaises(ValueError):
+            self._remote.write('frequency', 'not a number')
+        with self.assertRaises(ValueError):
+            self._remote[0].frequency = 1.e12
+        with self.assertRaises(RuntimeError):
+            self._remote._query('f?')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Tests for LockTimeStatistics and wait_locked().
+
+Lock status is simulated, so these tests run without hardware.
+"""
+
+import unittest
+from time import perf_counter
+from windfreak_plus.settling import LockTimeStatistics, wait_locked
+
+
+class LockTimeStatisticsTestCase(unittest.TestCase):
+
+    def test_bands(self):
+        statistics = LockTimeStatistics(band_width=100.e6, max_samples=3)
+        for lock_time in (4., 1., 3., 2.):
+            statistics.record(1.05e9, lock_time)
+        statistics.record(2.e9, 10.)
+        self.assertEqual(statistics.samples(1.e9), (1., 3., 2.))
+        self.assertEqual(statistics.quantile(1.e9, 0.5), 2.)
+        self.assertEqual(statistics.quantile(1.e9, 1.), 3.)
+        self.assertIsNone(statistics.quantile(3.e9))
+        self.assertEqual(statistics.dwell_time(3.e9, default=0.5), 0.5)
+        self.assertAlmostEqual(statistics.dwell_time(2.e9, margin=1.5), 15.)
+        self.assertEqual(statistics.summary()[1.e9]['max'], 3.)
+
+
+class WaitLockedTestCase(unittest.TestCase):
+
+    def test_unlocked_polls_are_recorded(self):
+        statistics = LockTimeStatistics()
+        polls = iter((False, False, True))
+        lock_time = wait_locked(lambda: next(polls), perf_counter(), 1.e9, statistics, 1.,
+                                min_delay=1.e-4)
+        self.assertGreater(lock_time, 0.)
+        self.assertEqual(statistics.samples(1.e9), (lock_time,))
+
+    def test_locked_at_first_poll_is_not_recorded(self):
+        statistics = LockTimeStatistics()
+        statistics.record(1.e9, 0.01)
+        start = perf_counter()
+        lock_time = wait_locked(lambda: True, start, 1.e9, statistics, 1.)
+        # the first poll waits for most of the median lock time
+        self.assertGreaterEqual(lock_time, 0.008)
+        self.assertEqual(statistics.samples(1.e9), (0.01,))
+
+    def test_timeout(self):
+        statistics = LockTimeStatistics()
+        with self.assertRaises(TimeoutError):
+            wait_locked(lambda: False, perf_counter(), 1.e9, statistics, 0.01)
+        self.assertEqual(statistics.samples(1.e9), ())
+
+
+if __name__ == '__main__':
+    unittest.main()
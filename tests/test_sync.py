@@ -0,0 +1,94 @@
+"""Tests for SyncGroup.
+
+The devices are simulated, so these tests run without hardware.
+"""
+
+import unittest
+from time import perf_counter
+from unittest import mock
+from windfreak_plus import SynthHD, SynthNVPro, Simulator, SyncGroup
+
+
+class SyncGroupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._hd = SynthHD('sim', transport=Simulator('SynthHD v2'))
+        self._nv = SynthNVPro('sim', transport=Simulator('SynthNV PRO'))
+        self._group = SyncGroup()
+
+    def tearDown(self):
+        self._group.cancel()
+        self._hd.close()
+        self._nv.close()
+
+    def _stage(self):
+        with self._group.stage(self._hd):
+            self._hd[0].frequency = 1.e9
+            self._hd[1].frequency = 2.e9
+        with self._group.stage(self._nv):
+            self._nv.frequency = 3.e9
+
+    def test_release(self):
+        self._stage()
+        self.assertEqual(set(self._group.devices), {self._hd, self._nv})
+        self.assertIsNone(self._hd[0].cached('frequency'))
+        start = perf_counter()
+        report = self._group.release(timeout=1.)
+        self.assertGreaterEqual(report.release_time, start)
+        # devices with the same path are reported separately
+        self.assertEqual(set(report.completion_times), {self._hd, self._nv})
+        for time in report.completion_times.values():
+            self.assertGreaterEqual(time, 0.)
+        times = report.completion_times.values()
+        self.assertAlmostEqual(report.skew, max(times) - min(times))
+        self.assertEqual(self._hd[1].read('frequency'), 2000.)
+        self.assertEqual(self._nv.read('frequency'), 3000.)
+        self.assertEqual(self._hd[0].cached('frequency'), 1000.)
+        self.assertEqual(self._group.devices, ())
+
+    def test_stage_trigger_mode(self):
+        self._stage()
+        self._group.stage_trigger_mode('disabled')
+        self._group.release(timeout=1.)
+        self.assertEqual(self._hd.trigger_mode, 'disabled')
+        self.assertEqual(self._nv.trigger_mode, 'disabled')
+
+    def test_armed(self):
+        with self.assertRaises(RuntimeError):
+            self._group.arm()
+        self._stage()
+        self._group.arm()
+        with self.assertRaises(RuntimeError):
+            self._group.arm()
+        with self.assertRaises(RuntimeError):
+            with self._group.stage(self._hd):
+                pass
+        self._group.cancel()
+        self.assertEqual(self._group.devices, ())
+        self.assertEqual(self._hd[0].read('frequency'), 10.)
+
+    def test_arm_encodes(self):
+        self._stage()
+        self._group.arm()
+        with mock.patch.object(self._hd, 'write_raw', wraps=self._hd.write_raw) as write_raw:
+            self._group.release(timeout=1.)
+        data, updates = write_raw.call_args[0]
+        self.assertEqual(data, b'C0f1000.00000000C1f2000.00000000')
+        self.assertIsInstance(updates, tuple)
+
+    def test_write_error(self):
+        self._stage()
+
+        def fail(data):
+            raise OSError('Port disconnected.')
+
+        self._nv._dev.write = fail
+        with self.assertRaises(RuntimeError) as context:
+            self._group.release(timeout=1.)
+        self.assertIsInstance(context.exception.__cause__, OSError)
+        self.assertIn('SynthNVPro at sim', str(context.exception))
+        self.assertEqual(self._hd[0].read('frequency'), 1000.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ This module contains common unit-tests for the SynthHD object.
 """
 
 from math import floor
-from time import sleep
+from time import perf_counter, sleep
 
 
 class SynthHDBaseTestCase:
@@ -249,6 +249,117 @@ class SynthHDBaseTestCase:
             self.assertIsInstance(value, bool)
             self.assertTrue(value)
 
+    def test_wait_locked(self):
+        for channel in self._dut:
+            channel.power = self.NOMINAL_POWER
+            channel.enable = True
+            channel.frequency = self.NOMINAL_FREQUENCY
+            lock_time = channel.wait_locked(1.)
+            self.assertIsInstance(lock_time, float)
+            self.assertGreater(lock_time, 0.)
+            self.assertLess(lock_time, 1.)
+            self.assertTrue(channel.lock_status)
+            # only recorded if a poll saw the PLL unlocked
+            samples = channel.lock_time_statistics.samples(self.NOMINAL_FREQUENCY)
+            self.assertIn(samples, ((), (lock_time,)))
+
+    def test_set_channels(self):
+        frequencies = (self.NOMINAL_FREQUENCY, 2 * self.NOMINAL_FREQUENCY)
+        report = self._dut.set_channels({
+            index: {'frequency': frequency, 'power': self.NOMINAL_POWER,
+                    'phase': 0., 'enable': True}
+            for index, frequency in enumerate(frequencies)})
+        self.assertEqual(report.selects, 2)
+        self.assertEqual(report.gap_commands, 2)
+        for channel, frequency in zip(self._dut, frequencies):
+            self.assertEqual(channel.frequency, frequency)
+            self.assertEqual(channel.power, self.NOMINAL_POWER)
+            self.assertTrue(channel.enable)
+        with self.assertRaises(ValueError):
+            self._dut.set_channels({0: {'vga_dac': 0}})
+
+    def test_init_fast(self):
+        self._dut.init()
+        self._dut[0].enable = True
+        self._dut[1].power = self.NOMINAL_POWER
+        self._dut.init(fast=True)
+        self.assertFalse(self._dut[0].enable)
+        self.assertEqual(self._dut[1].power, self._dut[1].power_range['start'])
+        self._dut.init(fast=True)
+        self.assertFalse(self._dut.sweep_enable)
+
+    def test_skip_redundant(self):
+        self._dut.init()
+        channel = self._dut[0]
+        channel.frequency = self.NOMINAL_FREQUENCY + 0.04
+        self.assertEqual(channel.frequency, self.NOMINAL_FREQUENCY)
+        self._dut.skip_redundant = True
+        try:
+            before = self._dut.idle_time
+            channel.frequency = self.NOMINAL_FREQUENCY + 0.02
+            self.assertGreater(self._dut.idle_time, before)
+            self._dut.sweep_enable = True
+            self._dut.sweep_enable = False
+            self.assertIsNone(channel.cached('frequency'))
+        finally:
+            self._dut.skip_redundant = False
+
+    def test_pulse_config(self):
+        PulseConfig = type(self._dut.pulse_config)
+        config = PulseConfig(on_time=10, off_time=90, repetitions=100)
+        self.assertAlmostEqual(config.duty_cycle, 0.1)
+        self.assertAlmostEqual(config.burst_time, 0.01)
+        self._dut.pulse_config = config
+        self.assertEqual(self._dut.pulse_config, config)
+        start = perf_counter()
+        done = self._dut.pulse_single()
+        self.assertGreaterEqual(done, start + config.burst_time)
+        with self.assertRaises(ValueError):
+            PulseConfig(on_time=0, off_time=90)
+
+    def test_fm_config(self):
+        FMConfig = type(self._dut.fm_config)
+        configs = [FMConfig(frequency=1000, deviation=deviation, mod_type='sine')
+                   for deviation in (1000, 2000)]
+        for config in configs:
+            self._dut.fm_config = config
+            self.assertEqual(self._dut.fm_config, config)
+        with self.assertRaises(ValueError):
+            FMConfig(frequency=10000, deviation=1000)
+
+    def test_differential_sweep(self):
+        DifferentialSweep = type(self._dut.differential_sweep)
+        sweep = DifferentialSweep(start=self.NOMINAL_FREQUENCY, stop=2 * self.NOMINAL_FREQUENCY,
+                                  step=self.NOMINAL_FREQUENCY / 10, dwell=0.01,
+                                  offset=self.NOMINAL_FREQUENCY / 100, power=self.NOMINAL_POWER)
+        self.assertEqual(sweep.points, 11)
+        self.assertAlmostEqual(sweep.duration, 0.11)
+        self._dut.differential_sweep = sweep
+        self.assertEqual(self._dut.differential_sweep, sweep)
+        start = perf_counter()
+        done = self._dut.sweep_single()
+        self.assertGreaterEqual(done, start + sweep.duration)
+        with self.assertRaises(ValueError):
+            self._dut.differential_sweep = sweep._replace(stop=1.e12)
+
+    def test_phase_sweep(self):
+        phases = [index * 40. for index in range(9)]
+        sweep = self._dut[0].phase_sweep(phases, interval=0.01)
+        self.assertEqual(len(sweep), len(phases))
+        times = sweep.run()
+        self.assertEqual(len(times), len(phases))
+        for index, time in enumerate(times):
+            self.assertGreaterEqual(time, index * 0.01)
+        self.assertAlmostEqual(self._dut[0].phase, 320.)
+        sweep = self._dut[1].phase_sweep([10., 20.], other=[30., 40.])
+        sweep.run()
+        self.assertAlmostEqual(self._dut[0].phase, 40.)
+        self.assertAlmostEqual(self._dut[1].phase, 20.)
+        with self.assertRaises(ValueError):
+            self._dut[0].phase_sweep([0., 1.], other=[0.])
+        with self.assertRaises(ValueError):
+            self._dut[0].phase_sweep([0., 400.])
+
     def test_modulation_enables(self):
         enables = ('sweep_enable', 'am_enable', 'pulse_mod_enable',
                    'dual_pulse_mod_enable', 'fm_enable')
@@ -0,0 +1,81 @@
+"""Tests for Tracer.
+
+The devices are simulated, so these tests run without hardware.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from threading import get_ident
+from windfreak_plus import SynthHD, SynthNVPro, Simulator, Tracer
+
+
+class TracerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._hd = SynthHD('hd', transport=Simulator('SynthHD v2'))
+        self._nv = SynthNVPro('nv', transport=Simulator('SynthNV PRO'))
+        self._tracer = Tracer()
+        self._tracer.attach(self._hd)
+        self._tracer.attach(self._nv)
+
+    def tearDown(self):
+        self._hd.close()
+        self._nv.close()
+
+    def test_channel_select(self):
+        self._hd[1].frequency = 1.e9
+        self._hd[1].read('power')
+        events = self._tracer.events()
+        self.assertEqual([(e.kind, e.attribute, e.channel, e.request) for e in events], [
+            ('write', 'channel', None, 'C1'),
+            ('write', 'frequency', 1, 'f1000.00000000'),
+            ('write', 'channel', None, 'C1'),
+            ('query', 'power', 1, 'W?'),
+        ])
+        self.assertEqual(events[3].reply, '-70.000')
+        for event in events:
+            self.assertEqual(event.devpath, 'hd')
+            self.assertEqual(event.thread, get_ident())
+            self.assertLessEqual(event.start, event.end)
+
+    def test_measure_power_clear(self):
+        self._nv.measure_power()
+        kinds = [(e.kind, e.attribute) for e in self._tracer.events()]
+        self.assertEqual(kinds[-2:], [('query', 'detect_power'), ('clear', None)])
+
+    def test_ring_buffer(self):
+        tracer = Tracer(capacity=3)
+        tracer.attach(self._hd)
+        for power in range(5):
+            self._hd.write('channel', power % 2)
+        self.assertEqual(len(tracer), 3)
+        self.assertEqual([e.request for e in tracer.events()], ['C0', 'C1', 'C0'])
+        tracer.detach(self._hd)
+        self._hd.write('channel', 1)
+        self.assertEqual(len(tracer), 3)
+        tracer.clear()
+        self.assertEqual(tracer.events(), [])
+
+    def test_chrome_trace(self):
+        self._hd.read('temperature')
+        self._nv.read('temperature')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            self._tracer.dump(path)
+            with open(path, encoding='utf-8') as f:
+                trace = json.load(f)
+        events = trace['traceEvents']
+        processes = {e['args']['name']: e['pid'] for e in events if e['ph'] == 'M'}
+        self.assertEqual(set(processes), {'hd', 'nv'})
+        spans = [e for e in events if e['ph'] == 'X']
+        self.assertEqual([(e['name'], e['pid']) for e in spans],
+                         [('temperature', processes['hd']), ('temperature', processes['nv'])])
+        self.assertEqual(spans[0]['args'], {'request': 'z', 'reply': '30.0'})
+        self.assertGreaterEqual(spans[0]['ts'], 0.)
+        self.assertGreaterEqual(spans[0]['dur'], 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for the transcript Recorder and Replayer transports.
+
+Sessions are recorded from simulated devices, so these tests run without
+hardware.
+"""
+
+import os
+import tempfile
+import unittest
+from time import perf_counter
+from windfreak_plus import SynthHD, Simulator
+from windfreak_plus.transport import CLEAR, READ, WRITE, Recorder, Replayer, ReplayError, read_log
+
+
+def session(device):
+    device[1].frequency = 2.e9
+    device[0].power = -10.
+    return device[1].read('frequency'), device.read('temperature')
+
+
+class TranscriptTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, 'session.wfr')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _record(self, latency=0.):
+        device = SynthHD('sim', transport=Recorder(self._path, Simulator('SynthHD v2', latency)))
+        try:
+            return session(device)
+        finally:
+            device.close()
+
+    def test_round_trip(self):
+        recorded = self._record()
+        records = read_log(self._path)
+        self.assertEqual({kind for kind, _, _ in records} - {CLEAR}, {WRITE, READ})
+        writes = [payload for kind, _, payload in records if kind == WRITE]
+        self.assertEqual(writes[-7:], [b'C1', b'f2000.00000000', b'C0', b'W-10.000',
+                                      b'C1', b'f?', b'z'])
+        times = [time for _, time, _ in records]
+        self.assertEqual(times, sorted(times))
+        replayer = Replayer(self._path)
+        device = SynthHD('sim', transport=replayer)
+        try:
+            self.assertEqual(device.model, 'SynthHD v2')
+            self.assertEqual(session(device), recorded)
+            self.assertEqual(device._dev.remaining, 0)
+        finally:
+            device.close()
+
+    def test_mismatch(self):
+        self._record()
+        device = SynthHD('sim', transport=Replayer(self._path))
+        try:
+            with self.assertRaises(ReplayError):
+                device[1].frequency = 3.e9
+        finally:
+            device.close()
+
+    def test_realtime(self):
+        self._record(latency=0.01)
+        start = perf_counter()
+        device = SynthHD('sim', transport=Replayer(self._path, realtime=True))
+        try:
+            session(device)
+        finally:
+            device.close()
+        queries = sum(kind == READ for kind, _, _ in read_log(self._path))
+        self.assertGreaterEqual(perf_counter() - start, queries * 0.01 * 0.9)
+
+    def test_invalid_log(self):
+        with open(self._path, 'wb') as f:
+            f.write(b'not a log')
+        with self.assertRaises(ValueError):
+            Replayer(self._path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,45 @@
 # Copyright (c) 2025 Shao Qi Lim. 
 # Minor modifications to original MIT licensed code.
 
+from importlib import import_module
+
 __version__ = '0.4.0'
 
-from .synth_hd import SynthHD
-from .synth_nv_pro import SynthNVPro
\ No newline at end of file
+# Public names and the modules defining them. Modules are imported on first
+# access (PEP 562), so that importing the package does not pull in pyserial
+# or the optional subsystems.
+_LAZY = {
+    'SynthHD': 'synth_hd',
+    'SynthNVPro': 'synth_nv_pro',
+    'Preset': 'presets',
+    'PresetStore': 'presets',
+    'IdentityCache': 'identity',
+    'DeviceDescriptor': 'discovery',
+    'discover': 'discovery',
+    'MetricsRegistry': 'metrics',
+    'Tracer': 'tracing',
+    'SyncGroup': 'sync',
+    'CommandScheduler': 'scheduler',
+    'compile_sequence': 'sequence',
+    'CAPABILITIES': 'capabilities',
+    'Simulator': 'simulator',
+    'PulseConfig': 'modulation',
+    'FMConfig': 'modulation',
+    'DifferentialSweep': 'sweep',
+    'compile_phase_sweep': 'sweep',
+}
+
+__all__ = ['__version__'] + list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,262 @@
+"""Declarative properties bound to API attributes.
+
+Device and channel classes declare their properties as descriptors instead
+of hand-written getters and setters:
+
+    class SynthNVPro(SerialDevice):
+        rf_enable = BoolAttr('rf_enable', 'RF output enable.')
+        reference_mode = EnumAttr('reference_mode', ('external', 'internal 27MHz'),
+                                  'Frequency reference mode.')
+        reference_modes = Choices(reference_mode, 'Frequency reference modes.')
+
+Value to code maps are computed once when the class is created, and range
+checks and rounding to the device's resolution use the immutable ranges of
+the owner's model capabilities. The
+descriptors read and write through the owner's read() and write(), so they
+are captured, shadowed and observed like any other request, and cached()
+converts the owner's shadow state to property units.
+"""
+
+
+class Attr:
+
+    def __init__(self, attribute, doc=None, readonly=False):
+        """Property bound to an API attribute, without validation.
+
+        Args:
+            attribute (str): The name of the attribute in API dictionary.
+            doc (str): docstring
+            readonly (bool): the property cannot be set
+        """
+        self.attribute = attribute
+        self.readonly = readonly
+        self.name = attribute
+        self.__doc__ = doc
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.decode(obj.read(self.attribute))
+
+    def __set__(self, obj, value):
+        if self.readonly:
+            raise AttributeError('property \'{}\' of \'{}\' object has no setter'.format(
+                                 self.name, type(obj).__name__))
+        obj.write(self.attribute, self.encode(obj, value))
+
+    def encode(self, obj, value):
+        """Validate a value and convert it to the units of the API attribute.
+
+        Args:
+            obj: device or channel
+            value: property value
+
+        Returns:
+            value to write
+        """
+        return value
+
+    def decode(self, value):
+        """Convert a value of the API attribute to the property units.
+
+        Args:
+            value: read value
+
+        Returns:
+            property value
+        """
+        return value
+
+    def cached(self, obj):
+        """Cached property value of a device or channel, see cached().
+
+        Args:
+            obj: device or channel
+
+        Returns:
+            The cached value or None if unknown.
+        """
+        value = obj.cached(self.attribute)
+        return None if value is None else self.decode(value)
+
+
+class BoolAttr(Attr):
+
+    def __init__(self, attribute, doc=None, error=ValueError):
+        """Bool property.
+
+        Args:
+            attribute (str): The name of the attribute in API dictionary.
+            doc (str): docstring
+            error (type): exception raised for non-bool values
+        """
+        super().__init__(attribute, doc)
+        self.error = error
+
+    def encode(self, obj, value):
+        if not isinstance(value, bool):
+            raise self.error('Expected bool.')
+        return value
+
+
+class EnumAttr(Attr):
+
+    def __init__(self, attribute, values, doc=None):
+        """Property with a set of str values, sent as their index.
+
+        Args:
+            attribute (str): The name of the attribute in API dictionary.
+            values (tuple): tuple of str of values, in code order
+            doc (str): docstring
+        """
+        super().__init__(attribute, doc)
+        self.values = tuple(values)
+        self.codes = {}
+        for code, value in enumerate(self.values):
+            # the first of repeated values, e.g. 'reserved', wins
+            self.codes.setdefault(value, code)
+
+    def encode(self, obj, value):
+        try:
+            return self.codes[value]
+        except (KeyError, TypeError):
+            raise ValueError('Expected str in set {}.'.format(self.values)) from None
+
+    def decode(self, value):
+        return self.values[value]
+
+
+class NumberAttr(Attr):
+
+    def __init__(self, attribute, doc=None, types=(float, int), error=TypeError,
+                 bounds=None, scale=1., unit='', grid=None):
+        """Numeric property, optionally range checked, quantized and scaled.
+
+        Args:
+            attribute (str): The name of the attribute in API dictionary.
+            doc (str): docstring
+            types (tuple): accepted types
+            error (type): exception raised for values of other types
+            bounds (Range / str): range, the name of a range of the owner's
+                model capabilities (unchecked if the model is unknown or
+                does not have the range), or None
+            scale (float): property units per API attribute unit, e.g. 1e6
+                for a frequency in Hz sent in MHz
+            unit (str): unit in range error messages
+            grid (Range / str): range whose step values are rounded to, the
+                name of a range of the owner's model capabilities, or None
+                to use bounds
+        """
+        super().__init__(attribute, doc)
+        self.types = types
+        self.error = error
+        self.type_message = 'Expected {}.'.format(' or '.join(t.__name__ for t in types))
+        self.bounds = bounds
+        self.scale = scale
+        self.unit = unit
+        self.grid = bounds if grid is None else grid
+
+    def range(self, obj):
+        """Range of a device or channel.
+
+        Args:
+            obj: device or channel
+
+        Returns:
+            Range: range or None if unchecked
+        """
+        return _resolve(obj, self.bounds)
+
+    def quantize(self, obj, value):
+        """Round a value to the resolution of a device or channel.
+
+        Args:
+            obj: device or channel
+            value (float / int): property value
+
+        Returns:
+            float / int: value on the grid, or value if the grid is unknown
+        """
+        grid = _resolve(obj, self.grid)
+        return value if grid is None else grid.quantize(value)
+
+    def encode(self, obj, value):
+        if not isinstance(value, self.types):
+            raise self.error(self.type_message)
+        bounds = self.range(obj)
+        if bounds is not None and value not in bounds:
+            bounds.validate(value, self.unit)
+        value = self.quantize(obj, value)
+        return value / self.scale if self.scale != 1. else value
+
+    def decode(self, value):
+        return value * self.scale if self.scale != 1. else value
+
+
+class Choices:
+
+    def __init__(self, enum, doc=None):
+        """Read-only property with the values of an EnumAttr.
+
+        Args:
+            enum (EnumAttr): enum property
+            doc (str): docstring
+        """
+        self.values = enum.values
+        self.name = None
+        self.__doc__ = doc
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        return self.values
+
+    def __set__(self, obj, value):
+        raise AttributeError('property \'{}\' of \'{}\' object has no setter'.format(
+                             self.name, type(obj).__name__))
+
+
+def _resolve(obj, spec):
+    if isinstance(spec, str):
+        capabilities = obj._capabilities
+        return None if capabilities is None else getattr(capabilities, spec)
+    return spec
+
+
+def attributes(cls):
+    """Declared properties of a device or channel class.
+
+    Args:
+        cls (type): class
+
+    Returns:
+        dict: map of property name to Attr, in declaration order
+    """
+    found = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if isinstance(value, Attr):
+                found[name] = value
+            else:
+                found.pop(name, None)
+    return found
+
+
+def settable(cls, name):
+    """Whether a property of a device or channel class can be set.
+
+    Args:
+        cls (type): class
+        name (str): property name
+
+    Returns:
+        bool: settable
+    """
+    prop = getattr(cls, name, None)
+    if isinstance(prop, Attr):
+        return not prop.readonly
+    return isinstance(prop, property) and prop.fset is not None
@@ -0,0 +1,131 @@
+"""Benchmarks.
+
+import_time() measures the wall time of import statements in fresh
+interpreters, and which modules they load. Run as a script to compare the
+package import with the imports of a device class and of pyserial:
+
+    python -m windfreak_plus.bench
+
+device_benchmarks() measures query latency and the throughput of single,
+pipelined and batched requests on an open device or a simulated one, see
+'windfreak-plus bench'. Writes re-write the current frequency, so the device
+state is not changed.
+"""
+
+import subprocess
+import sys
+from collections import namedtuple
+from collections.abc import Sequence
+from statistics import median
+from time import perf_counter
+
+
+ImportTiming = namedtuple('ImportTiming', ('statement', 'times', 'modules'))
+ImportTiming.__doc__ = """Timing of an import statement.
+
+times are the wall times in seconds of the repetitions and modules is the
+set of modules the statement loaded.
+"""
+
+IMPORT_STATEMENTS = (
+    'import windfreak_plus',
+    'from windfreak_plus import SynthHD',
+    'import serial',
+)
+
+_IMPORT_SCRIPT = '''
+import sys
+from time import perf_counter
+before = set(sys.modules)
+start = perf_counter()
+{}
+end = perf_counter()
+print(end - start)
+print(' '.join(sorted(set(sys.modules) - before)))
+'''
+
+
+def import_time(statement='import windfreak_plus', repeat=5, executable=None):
+    """Measure an import statement in fresh interpreters.
+
+    Args:
+        statement (str): statement to time
+        repeat (int): number of interpreters to run
+        executable (str): Python interpreter, defaults to the current one
+
+    Returns:
+        ImportTiming: timing
+    """
+    times = []
+    modules = set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [executable or sys.executable, '-c', _IMPORT_SCRIPT.format(statement)],
+            check=True, capture_output=True, text=True).stdout.splitlines()
+        times.append(float(output[0]))
+        modules = set(output[1].split()) if len(output) > 1 else set()
+    return ImportTiming(statement, times, modules)
+
+
+DeviceTiming = namedtuple('DeviceTiming', ('name', 'operations', 'time'))
+DeviceTiming.__doc__ = """Timing of a device benchmark.
+
+time is the wall time in seconds of all operations.
+"""
+
+
+def device_benchmarks(device, count=100):
+    """Measure request latency and throughput of a device.
+
+    Benchmarks are 'query latency' (one query at a time), 'pipelined reads'
+    (all queries in one write, see read_many()), 'single writes' (one write
+    per request) and 'batched writes' (all requests in one write). Write
+    benchmarks end with a query, so that they include the time the device
+    takes to process the requests.
+
+    Args:
+        device (SynthHD / SynthNVPro): device
+        count (int): number of operations per benchmark
+
+    Returns:
+        list: list of DeviceTiming
+    """
+    target = device[0] if isinstance(device, Sequence) else device
+    frequency = target.read('frequency')
+    timings = []
+
+    start = perf_counter()
+    for _ in range(count):
+        target.read('frequency')
+    timings.append(DeviceTiming('query latency', count, perf_counter() - start))
+
+    start = perf_counter()
+    target.read_many(['frequency'] * count)
+    timings.append(DeviceTiming('pipelined reads', count, perf_counter() - start))
+
+    start = perf_counter()
+    for _ in range(count):
+        target.write('frequency', frequency)
+    target.read('frequency')
+    timings.append(DeviceTiming('single writes', count, perf_counter() - start))
+
+    start = perf_counter()
+    with device.capture() as requests:
+        for _ in range(count):
+            target.write('frequency', frequency)
+    device.write_raw(''.join(requests), requests.updates)
+    target.read('frequency')
+    timings.append(DeviceTiming('batched writes', count, perf_counter() - start))
+    return timings
+
+
+def main():
+    for statement in IMPORT_STATEMENTS:
+        timing = import_time(statement)
+        serial = 'yes' if 'serial' in timing.modules else 'no'
+        print('{:8.2f} ms  {:4d} modules  pyserial: {:3}  {}'.format(
+              median(timing.times) * 1e3, len(timing.modules), serial, statement))
+
+
+if __name__ == '__main__':
+    main()
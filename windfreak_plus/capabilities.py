@@ -0,0 +1,270 @@
+"""Per-model capabilities.
+
+CAPABILITIES maps each supported model to an immutable Capabilities record
+holding its value ranges and the subset of its device class API it
+supports. Ranges are frozen Range objects that validate values, or whole
+arrays of values, without allocating; the *_range properties of the device
+classes return dict copies of them.
+"""
+
+from math import log10
+from types import MappingProxyType
+
+
+class Range:
+
+    __slots__ = ('start', 'stop', 'step', '_digits')
+
+    def __init__(self, start, stop, step):
+        """Immutable closed value range with a resolution.
+
+        Args:
+            start: lower bound
+            stop: upper bound
+            step: resolution
+        """
+        object.__setattr__(self, 'start', start)
+        object.__setattr__(self, 'stop', stop)
+        object.__setattr__(self, 'step', step)
+        # decimal steps round to digits, which avoids binary noise like
+        # 1000000000.0000001
+        digits = -log10(step) if step > 0 else None
+        if digits is not None and digits != round(digits):
+            digits = None
+        object.__setattr__(self, '_digits', None if digits is None else int(round(digits)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Range is immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('Range is immutable.')
+
+    def __contains__(self, value):
+        return self.start <= value <= self.stop
+
+    def __eq__(self, other):
+        if not isinstance(other, Range):
+            return NotImplemented
+        return (self.start, self.stop, self.step) == (other.start, other.stop, other.step)
+
+    def __hash__(self):
+        return hash((self.start, self.stop, self.step))
+
+    def __repr__(self):
+        return 'Range({!r}, {!r}, {!r})'.format(self.start, self.stop, self.step)
+
+    def as_dict(self):
+        """Range as a new dict.
+
+        Returns:
+            dict: dict with keys 'start', 'stop' and 'step'
+        """
+        return {'start': self.start, 'stop': self.stop, 'step': self.step}
+
+    def quantize(self, value):
+        """Round a value to the nearest multiple of the step.
+
+        Args:
+            value (float / int): value
+
+        Returns:
+            float / int: value on the grid
+        """
+        if self._digits is not None:
+            return round(value, self._digits)
+        return round(value / self.step) * self.step
+
+    def validate(self, value, unit=''):
+        """Check that a value is in the range.
+
+        Args:
+            value (float / int): value
+            unit (str): unit in the error message
+
+        Raises:
+            ValueError: if the value is out of range
+        """
+        if not self.start <= value <= self.stop:
+            raise ValueError('Expected {} in range [{}, {}]{}.'.format(
+                             type(self.start).__name__, self.start, self.stop,
+                             ' ' + unit if unit else ''))
+
+    def validate_array(self, values, unit=''):
+        """Check that all values of a sequence or NumPy array are in the range.
+
+        Args:
+            values (iterable / numpy.ndarray): values
+            unit (str): unit in the error message
+
+        Raises:
+            ValueError: if a value is out of range, naming the first one
+        """
+        if hasattr(values, 'min') and hasattr(values, 'max'):
+            if len(values) == 0 or (self.start <= values.min() and values.max() <= self.stop):
+                return
+            values = values.tolist()
+        for index, value in enumerate(values):
+            if not self.start <= value <= self.stop:
+                raise ValueError('Value {} at index {}: expected {} in range [{}, {}]{}.'.format(
+                                 value, index, type(self.start).__name__, self.start,
+                                 self.stop, ' ' + unit if unit else ''))
+
+
+class Capabilities:
+
+    __slots__ = ('model', 'frequency', 'power', 'vga_dac', 'channel_spacing', 'vco', 'api',
+                 'fm_frequency', 'fm_deviation')
+
+    def __init__(self, model, frequency, power, vga_dac, channel_spacing, vco, api,
+                 fm_frequency=None, fm_deviation=None):
+        """Immutable capabilities of a model.
+
+        Args:
+            model (str): model
+            frequency (Range): output frequency range in Hz
+            power (Range): output power range in dBm
+            vga_dac (Range): VGA DAC value range
+            channel_spacing (Range): channel spacing range in Hz or None if
+                not supported
+            vco (Range): fundamental VCO range in Hz
+            api (frozenset): supported API attributes
+            fm_frequency (Range): FM modulation frequency range in Hz or None
+                if unknown
+            fm_deviation (Range): FM deviation range in Hz or None if
+                unknown
+        """
+        for name, value in zip(self.__slots__, (model, frequency, power, vga_dac,
+                                                channel_spacing, vco, frozenset(api),
+                                                fm_frequency, fm_deviation)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Capabilities are immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('Capabilities are immutable.')
+
+    def __repr__(self):
+        return 'Capabilities({!r})'.format(self.model)
+
+    def supports(self, attribute):
+        """Whether the model supports an API attribute.
+
+        Args:
+            attribute (str): The name of the attribute in API dictionary.
+
+        Returns:
+            bool: supported
+        """
+        return attribute in self.api
+
+
+REFERENCE_FREQUENCY = Range(10.e6, 100.e6, 1.e3)
+PHASE = Range(0., 360., .001)
+PULSE_ON_TIME = Range(1, 10000000, 1)       # us
+PULSE_OFF_TIME = Range(2, 10000000, 1)      # us
+PULSE_REPETITIONS = Range(1, 65500, 1)
+FM_FREQUENCY = Range(1, 5000, 1)            # Hz
+SWEEP_TIME_STEP = Range(4.e-3, 10., 1.e-6)  # s, SynthHD
+SWEEP_POWER = Range(-60., 20., .001)        # dBm
+# Approximate maximum FM deviation; the usable deviation also shrinks with
+# the output divider at low output frequencies
+SYNTHHD_FM_DEVIATION = Range(1, 1000000, 1)     # Hz
+SYNTHNV_PRO_FM_DEVIATION = Range(1, 100000, 1)  # Hz
+
+_SYNTHHD_API = frozenset((
+    'channel', 'frequency', 'power', 'calibrated', 'temp_comp_mode', 'vga_dac',
+    'phase_step', 'rf_enable', 'pa_power_on', 'pll_power_on', 'model_type',
+    'serial_number', 'fw_version', 'hw_version', 'save', 'reference_mode',
+    'trig_function', 'pll_lock', 'temperature', 'ref_frequency',
+    'sweep_freq_low', 'sweep_freq_high', 'sweep_freq_step', 'sweep_time_step',
+    'sweep_power_low', 'sweep_power_high', 'sweep_direction', 'sweep_diff_freq',
+    'sweep_diff_meth', 'sweep_type', 'sweep_single', 'sweep_cont',
+    'am_time_step', 'am_num_samples', 'am_cont', 'am_lookup_table',
+    'pulse_on_time', 'pulse_off_time', 'pulse_num_rep', 'pulse_invert',
+    'pulse_single', 'pulse_cont', 'dual_pulse_mod',
+    'fm_frequency', 'fm_deviation', 'fm_num_samples', 'fm_mod_type', 'fm_cont',
+))
+_SYNTHHD_V2_API = _SYNTHHD_API | {'sub_version', 'channel_spacing'}
+
+_SYNTHNV_PRO_API = frozenset((
+    'frequency', 'power', 'rf_enable', 'calibrated', 'phase_step', 'trig_function',
+    'reference_mode', 'ref_frequency', 'ref_freq_doubler', 'pll_power_on',
+    'pll_cp_current', 'pll_lock', 'temperature', 'temp_comp_mode', 'vga_dac',
+    'channel_spacing', 'save',
+    'sweep_freq_low', 'sweep_freq_high', 'sweep_freq_step', 'sweep_time_step',
+    'sweep_power_low', 'sweep_power_high', 'sweep_direction', 'sweep_type',
+    'sweep_single', 'sweep_cont',
+    'detect_power', 'detector_mode', 'detect_powers', 'detect_powers_styl',
+    'am_time_step', 'am_num_samples', 'am_cont', 'am_lookup_table',
+    'pulse_on_time', 'pulse_off_time', 'pulse_num_rep', 'pulse_invert',
+    'pulse_single', 'pulse_cont',
+    'fm_frequency', 'fm_deviation', 'fm_num_samples', 'fm_mod_type', 'fm_cont',
+    'model_type', 'serial_number', 'fw_version', 'hw_version',
+))
+
+CAPABILITIES = MappingProxyType({caps.model: caps for caps in (
+    Capabilities('SynthHD v1.4',
+                 frequency=Range(53.e6, 13999.999999e6, 0.1),
+                 power=Range(-80., 20., 0.01),
+                 vga_dac=Range(0, 45000, 1),
+                 channel_spacing=None,
+                 vco=Range(3400.e6, 6800.e6, 0.1),
+                 api=_SYNTHHD_API,
+                 fm_frequency=FM_FREQUENCY,
+                 fm_deviation=SYNTHHD_FM_DEVIATION),
+    Capabilities('SynthHD v2',
+                 frequency=Range(10.e6, 15000.e6, 0.1),
+                 power=Range(-70., 20., 0.01),
+                 vga_dac=Range(0, 4000, 1),
+                 channel_spacing=Range(0.1, 1000., 0.1),
+                 vco=Range(3400.e6, 6800.e6, 0.1),
+                 api=_SYNTHHD_V2_API,
+                 fm_frequency=FM_FREQUENCY,
+                 fm_deviation=SYNTHHD_FM_DEVIATION),
+    Capabilities('SynthHD PRO v2',
+                 frequency=Range(10.e6, 24000.e6, 0.1),
+                 power=Range(-70., 20., 0.01),
+                 vga_dac=Range(0, 4000, 1),
+                 channel_spacing=Range(0.1, 1000., 0.1),
+                 vco=Range(3400.e6, 6800.e6, 0.1),
+                 api=_SYNTHHD_V2_API,
+                 fm_frequency=FM_FREQUENCY,
+                 fm_deviation=SYNTHHD_FM_DEVIATION),
+    Capabilities('SynthNV PRO',
+                 frequency=Range(12.5e6, 6400.e6, 0.1),
+                 power=Range(-60., 20., 0.001),
+                 vga_dac=Range(0, 4000, 1),
+                 channel_spacing=Range(0.1, 1000., 0.1),
+                 vco=Range(2200.e6, 4400.e6, 0.1),
+                 api=_SYNTHNV_PRO_API,
+                 fm_frequency=FM_FREQUENCY,
+                 fm_deviation=SYNTHNV_PRO_FM_DEVIATION),
+)})
+
+
+def capabilities(model):
+    """Capabilities of a model.
+
+    Args:
+        model (str): model, e.g. the model property of a device
+
+    Returns:
+        Capabilities: capabilities or None if the model is unsupported
+    """
+    return CAPABILITIES.get(model)
+
+
+def range_dict(capabilities, name):
+    """Range of model capabilities as a new dict.
+
+    Args:
+        capabilities (Capabilities): capabilities or None
+        name (str): range name, e.g. 'frequency'
+
+    Returns:
+        dict: range or None if unknown
+    """
+    if capabilities is None or getattr(capabilities, name) is None:
+        return None
+    return getattr(capabilities, name).as_dict()
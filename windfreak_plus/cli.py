@@ -0,0 +1,331 @@
+"""Command-line tool.
+
+    windfreak-plus --port /dev/ttyACM0 get frequency@0 power@0 temperature
+    windfreak-plus --port /dev/ttyACM0 set frequency@0=1000 rf_enable@0=on
+    windfreak-plus --port /dev/ttyACM0 apply preset.json
+    windfreak-plus --port /dev/ttyACM0 monitor --interval 1 --count 10
+    windfreak-plus --port /dev/ttyACM0 run commands.txt
+    windfreak-plus discover
+    windfreak-plus --simulate 'SynthHD v2' --latency 0.001 bench --count 100
+
+get and set take API attributes in API units (e.g. frequency in MHz), as
+name[,arg...][@channel] and name[,arg...][@channel]=value. set validates
+values of attributes that are declared as properties like the properties
+do, e.g. against the frequency range of the model. Each command uses a
+single connection: all queries of get and of each monitor sample are sent in
+one pipelined write, and all requests of set and apply in one write.
+
+run reads get, set, apply, monitor and bench commands, one per line, from a
+file or from standard input ('-') and runs them on one connection. Empty
+lines and '#' comments are skipped, and the first failing line stops the
+run.
+"""
+
+import argparse
+import shlex
+import sys
+from collections.abc import Sequence
+from time import monotonic, sleep
+
+
+_BOOLEANS = {'true': '1', 'on': '1', 'false': '0', 'off': '0'}
+
+
+def _open(args):
+    """Open the device given by the command-line options.
+
+    With --type auto, the model type is queried on the connection that is
+    then handed to the device class.
+    """
+    from .synth_hd import SynthHD
+    from .synth_nv_pro import SynthNVPro
+    if args.simulate is not None:
+        from .simulator import Simulator
+        devpath, transport = 'simulator', Simulator(args.simulate, latency=args.latency)
+    elif args.port is not None:
+        from .transport import serial_transport
+        devpath, transport = args.port, serial_transport
+    else:
+        raise ValueError('Expected --port or --simulate.')
+    if args.type == 'synthhd':
+        return SynthHD(devpath, timeout=args.timeout, transport=transport)
+    if args.type == 'synthnvpro':
+        return SynthNVPro(devpath, timeout=args.timeout, transport=transport)
+    port = transport(devpath, args.timeout)
+    try:
+        port.write(b'+')
+        model_type = port.readline().decode('utf-8').strip()
+    except Exception:
+        port.close()
+        raise
+    if 'SynthNVP' in model_type:
+        device_class = SynthNVPro
+    elif 'SynthHD' in model_type:
+        device_class = SynthHD
+    else:
+        port.close()
+        raise ValueError('Unsupported model type \'{}\'.'.format(model_type))
+    return device_class(devpath, timeout=args.timeout, transport=lambda devpath, timeout: port)
+
+
+def _parse_name(device, text, write):
+    """Parse name[,arg...][@channel] into (scope, attribute, args)."""
+    name, _, channel = text.partition('@')
+    attribute, *args = name.split(',')
+    if attribute not in device.API:
+        raise ValueError('Unknown attribute \'{}\'.'.format(attribute))
+    capabilities = device.capabilities
+    if capabilities is not None and not capabilities.supports(attribute):
+        raise ValueError('Attribute \'{}\' is not supported by {}.'.format(
+                         attribute, capabilities.model))
+    if device.API[attribute][2 if not write else 1] is None:
+        raise ValueError('Attribute \'{}\' cannot be {}.'.format(
+                         attribute, 'written' if write else 'read'))
+    scope = None
+    if channel:
+        if not isinstance(device, Sequence) or not channel.isdigit() \
+                or int(channel) not in range(len(device)):
+            raise ValueError('No channel {}.'.format(channel))
+        scope = int(channel)
+    return scope, attribute, tuple(args)
+
+
+def _descriptor(target, attribute):
+    """Settable property of a device or channel bound to an API attribute, or None."""
+    from .attributes import attributes
+    for prop in attributes(type(target)).values():
+        if prop.attribute == attribute and not prop.readonly:
+            return prop
+    return None
+
+
+def _validate(device, target, attribute, args):
+    """Validate write arguments like the property bound to the attribute.
+
+    Returns:
+        tuple: arguments, with the value quantized like the property does
+    """
+    from .attributes import BoolAttr, EnumAttr
+    prop = _descriptor(target, attribute)
+    if prop is None or len(args) != 1:
+        return args
+    if isinstance(prop, BoolAttr) and args[0] not in ('0', '1'):
+        raise ValueError('Expected bool value of \'{}\': 0, 1, on, off, true or false.'.format(
+                         attribute))
+    value, = device._convert(attribute, args)
+    if isinstance(prop, EnumAttr):
+        if value not in range(len(prop.values)):
+            raise ValueError('Expected code of \'{}\' in range [0, {}].'.format(
+                             attribute, len(prop.values) - 1))
+        return (value,)
+    return (prop.encode(target, prop.decode(value)),)
+
+
+def _get(device, args):
+    queries = [_parse_name(device, text, False) for text in args.names]
+    values = device.read_many((attribute,) + query_args if scope is None
+                              else (scope, attribute) + query_args
+                              for scope, attribute, query_args in queries)
+    for text, value in zip(args.names, values):
+        print('{} = {}'.format(text, value))
+
+
+def _set(device, args):
+    writes = []
+    for text in args.assignments:
+        name, equals, value = text.partition('=')
+        scope, attribute, write_args = _parse_name(device, name, True)
+        if equals:
+            write_args += (_BOOLEANS.get(value.lower(), value),)
+        if scope is None and isinstance(device, Sequence) \
+                and _descriptor(device[0], attribute) is not None:
+            raise ValueError('\'{}\' is a channel attribute, expected {}@<channel>.'.format(
+                             attribute, name))
+        target = device if scope is None else device[scope]
+        writes.append((target, attribute, _validate(device, target, attribute, write_args)))
+    with device.capture() as requests:
+        for target, attribute, write_args in writes:
+            target.write(attribute, *write_args)
+    device.write_raw(''.join(requests), requests.updates)
+    print('{} requests, {} bytes'.format(len(requests), len(''.join(requests))))
+
+
+def _apply(device, args):
+    from .presets import _load_file, compile_preset
+    from .sequence import compile_sequence
+    settings = _load_file(args.file)
+    if isinstance(settings, dict) and 'sequence' in settings:
+        settings = settings['sequence']
+    if isinstance(settings, dict):
+        preset = compile_preset(device, args.file, settings)
+        device.write_raw(preset.data, preset.updates)
+        print('preset: {} bytes'.format(len(preset.data)))
+    else:
+        sequence = compile_sequence(device, settings)
+        sequence.run()
+        print('sequence: {} segments, {} bytes, estimated time {:.6f} s'.format(
+              len(sequence), sequence.size, sequence.estimated_time))
+
+
+def _monitor(device, args):
+    names = ['temperature']
+    queries = [('temperature',)]
+    if isinstance(device, Sequence):
+        for index in range(len(device)):
+            for attribute in ('pll_lock', 'calibrated'):
+                names.append('{}@{}'.format(attribute, index))
+                queries.append((index, attribute))
+    else:
+        for attribute in ('pll_lock', 'calibrated', 'detect_power'):
+            names.append(attribute)
+            queries.append((attribute,))
+    print('time ' + ' '.join(names))
+    start = due = monotonic()
+    sample = 0
+    while args.count is None or sample < args.count:
+        values = device.read_many(queries)
+        if not isinstance(device, Sequence):
+            # see SynthNVPro.measure_power()
+            device.dev_clear()
+        print('{:.3f} '.format(monotonic() - start) + ' '.join(str(value) for value in values))
+        sys.stdout.flush()
+        sample += 1
+        due += args.interval
+        if args.count is None or sample < args.count:
+            sleep(max(0., due - monotonic()))
+
+
+def _run(device, args):
+    parser = _batch_parser()
+    source = sys.stdin if args.file == '-' else open(args.file, encoding='utf-8')
+    label = '<stdin>' if args.file == '-' else args.file
+    try:
+        for number, line in enumerate(source, 1):
+            try:
+                words = shlex.split(line, comments=True)
+                if not words:
+                    continue
+                command = parser.parse_args(words)
+                command.run(device, command)
+            except (ValueError, TypeError, KeyError, RuntimeError, OSError) as exc:
+                raise ValueError('{}:{}: {}'.format(label, number, exc)) from exc
+            sys.stdout.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def _discover(args):
+    from .discovery import discover
+    for descriptor in discover(timeout=args.timeout, refresh=args.refresh):
+        print('{} {} {} {} {}'.format(descriptor.devpath, descriptor.model,
+                                      descriptor.serial_number,
+                                      descriptor.firmware_version,
+                                      descriptor.hardware_version))
+
+
+def _bench(device, args):
+    from .bench import device_benchmarks
+    for timing in device_benchmarks(device, args.count):
+        print('{:16} {:10.1f} us/op {:10.0f} op/s'.format(
+              timing.name, timing.time / timing.operations * 1.e6,
+              timing.operations / timing.time))
+
+
+class _BatchParser(argparse.ArgumentParser):
+    """Parser of run commands, raising ValueError instead of exiting."""
+
+    def error(self, message):
+        raise ValueError(message)
+
+
+def _add_device_commands(commands):
+    """Add the commands that run on an open device."""
+    command = commands.add_parser('get', help='read attributes')
+    command.add_argument('names', nargs='+', metavar='NAME',
+                         help='attribute as name[,arg...][@channel]')
+    command.set_defaults(run=_get)
+
+    command = commands.add_parser('set', help='write attributes in a single write')
+    command.add_argument('assignments', nargs='+', metavar='NAME=VALUE',
+                         help='attribute as name[,arg...][@channel]=value')
+    command.set_defaults(run=_set)
+
+    command = commands.add_parser('apply', help='apply a preset or sequence file')
+    command.add_argument('file', help='JSON or TOML preset, or sequence steps as a JSON list '
+                              'or in a \'sequence\' array')
+    command.set_defaults(run=_apply)
+
+    command = commands.add_parser('monitor', help='print status periodically')
+    command.add_argument('--interval', type=float, default=1.,
+                         help='sampling interval in seconds (default: 1)')
+    command.add_argument('--count', type=int, help='number of samples (default: unlimited)')
+    command.set_defaults(run=_monitor)
+
+    command = commands.add_parser('bench', help='measure latency and throughput')
+    command.add_argument('--count', type=int, default=100,
+                         help='operations per benchmark (default: 100)')
+    command.set_defaults(run=_bench)
+
+
+def _batch_parser():
+    parser = _BatchParser(prog='windfreak-plus run', add_help=False)
+    _add_device_commands(parser.add_subparsers(dest='command', required=True))
+    return parser
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='windfreak-plus',
+                                     description='Control Windfreak devices.')
+    connection = parser.add_mutually_exclusive_group()
+    connection.add_argument('--port', help='serial port, e.g. /dev/ttyACM0 or COM4')
+    connection.add_argument('--simulate', metavar='MODEL',
+                            help='use a simulated device of a model, e.g. \'SynthHD v2\'')
+    parser.add_argument('--type', choices=('auto', 'synthhd', 'synthnvpro'), default='auto',
+                        help='device class (default: from the model type)')
+    parser.add_argument('--timeout', type=float, default=1.,
+                        help='read timeout in seconds (default: 1)')
+    parser.add_argument('--latency', type=float, default=0.,
+                        help='reply latency of the simulated device in seconds')
+    commands = parser.add_subparsers(dest='command', required=True)
+    _add_device_commands(commands)
+
+    command = commands.add_parser('run', help='run commands from a file, one per line')
+    command.add_argument('file', help='command file, or \'-\' for standard input')
+    command.set_defaults(run=_run)
+
+    command = commands.add_parser('discover', help='list devices on serial ports')
+    command.add_argument('--refresh', action='store_true', help='ignore cached results')
+    command.set_defaults(run=None)
+    return parser
+
+
+def main(argv=None):
+    """Run the command-line tool.
+
+    Args:
+        argv (list): arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: exit status
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.run is None:
+            _discover(args)
+            return 0
+        device = _open(args)
+        try:
+            args.run(device, args)
+        finally:
+            device.close()
+    except KeyboardInterrupt:
+        return 130
+    except (ValueError, TypeError, KeyError, RuntimeError, OSError) as exc:
+        parser.exit(1, '{}: error: {}\n'.format(parser.prog, exc))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,15 +3,56 @@
 # New method in SerialDevice class: dev_clear()
 # Added comments for readability 
 
-from serial import Serial
+from contextlib import contextmanager
+from threading import RLock
+from time import perf_counter, sleep
+from .transport import serial_transport
+
+
+# Writes that let the device change its own state, e.g. the frequency while
+# sweeping. Shadowed values of other attributes cannot be trusted while any
+# of them may be enabled.
+AUTONOMOUS = frozenset(('sweep_cont', 'sweep_single', 'am_cont', 'pulse_cont',
+                        'fm_cont', 'dual_pulse_mod'))
+_AUTONOMOUS_TARGETS = frozenset(('frequency', 'power'))
+
+class CapturedWrites(list):
+    """List of captured encoded requests.
+
+    Also holds the shadow state updates the requests will cause once sent,
+    and the channel selected by the captured requests (None if unknown).
+    effects holds, per request, its shadow state update (key, value), ()
+    if it has none, or None if unknown (raw requests).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.updates = []
+        self.effects = []
+        self.selected = None
 
 
 class SerialDevice:
 
-    def __init__(self, devpath):
+    def __init__(self, devpath, timeout=10, identity_cache=None, transport=None,
+                 skip_redundant=False):
         self._devpath = devpath
+        self._timeout = timeout
+        self._transport = serial_transport if transport is None else transport
         self._dev = None 
+        self._lock = RLock()
+        self._shadow = {}
+        self._capture = None
+        self._observers = ()
+        self._rx_bytes = 0
+        self._last_io = 0.
+        self._identity_cache = identity_cache
+        self._identity = None
+        self._skip_redundant = skip_redundant
+        self._frequency_times = {}
         self.open()
+        if identity_cache is not None:
+            self._identity = identity_cache.lookup(devpath)
 
     def __del__(self):
         self.close()
@@ -19,15 +60,128 @@ class SerialDevice:
     def open(self):
         if self._dev is not None:
             raise RuntimeError('Device has already been opened.')
-        self._dev = Serial(port=self._devpath, timeout=10)
+        self._shadow.clear()
+        self._dev = self._transport(self._devpath, self._timeout)
 
     def close(self):
         if self._dev is not None:
-            self._dev.close()
-            self._dev = None
+            with self._lock:
+                self._dev.close()
+                self._dev = None
+                self._shadow.clear()
 
     def write(self, attribute, *args):
-        dtype, request, _ = self.API[attribute] # unpacks tuple of three, _ is ignored
+        self._write_attribute(None, attribute, args)
+
+    def _write_attribute(self, scope, attribute, args):
+        """Write an attribute and record the written value in the shadow state.
+
+        Args:
+            scope (int): channel index or None for device attributes
+            attribute (str): The name of the attribute in self.API dictionary.
+            args (tuple): Arguments to be formatted into the request string.
+        """
+        data = self.encode(attribute, *args)
+        _, _, query = self.API[attribute]
+        with self._lock:
+            if self._redundant(scope, attribute, args):
+                return
+            if self._observers and self._capture is None:
+                start = perf_counter()
+                self._write(data)
+                end = perf_counter()
+                for observer in self._observers:
+                    observer.on_write(self, scope, attribute, data, start, end)
+            else:
+                self._write(data)
+            if self._capture is None and attribute == 'frequency':
+                self._frequency_times[scope] = self._last_io
+            # only attributes that can be read back are shadowed
+            effect = ()
+            if query is not None and args:
+                effect = ((scope, attribute) + args[:-1], self._convert(attribute, args)[-1])
+                self._record(*effect)
+            if self._capture is not None:
+                self._capture.effects.append(effect)
+
+    @property
+    def skip_redundant(self):
+        """Skip writes that would not change the device state.
+
+        When enabled, a write is not sent if the shadow state shows that the
+        device already has the value, as encoded for the device, e.g. a
+        frequency correction below the frequency resolution. Writes are
+        never skipped while capturing or while a sweep or modulation may be
+        running (see AUTONOMOUS), which includes the time before those were
+        written or read as disabled, e.g. by init(). Only enable this if
+        nothing else changes the device state, and pass the updates of raw
+        writes to write_raw().
+
+        Returns:
+            bool: enabled
+        """
+        return self._skip_redundant
+
+    @skip_redundant.setter
+    def skip_redundant(self, value):
+        if not isinstance(value, bool):
+            raise ValueError('Expected bool.')
+        self._skip_redundant = value
+
+    def _redundant(self, scope, attribute, args):
+        """Whether a write can be skipped, see skip_redundant.
+
+        Args:
+            scope (int): channel index or None for device attributes
+            attribute (str): The name of the attribute in self.API dictionary.
+            args (tuple): Arguments to be formatted into the request string.
+
+        Returns:
+            bool: the write can be skipped
+        """
+        if not self._skip_redundant or self._capture is not None or not args:
+            return False
+        if self.API[attribute][2] is None:
+            return False
+        value = self._shadow.get((scope, attribute) + tuple(args[:-1]))
+        if value is None:
+            return False
+        for name in AUTONOMOUS:
+            # a single sweep is not running at power-up and ends by itself,
+            # continuous modes must be known to be disabled
+            if name in self.API and self._shadow.get((None, name), name != 'sweep_single'):
+                return False
+        return self.encode(attribute, *args[:-1], value) == self.encode(attribute, *args)
+
+    def encode(self, attribute, *args):
+        """Encode a write request for a given attribute without sending it.
+
+        Args:
+            attribute (str): The name of the attribute in self.API dictionary.
+            *args: Arguments to be formatted into the request string.
+
+        Returns:
+            str: encoded request
+        """
+        _, request, _ = self.API[attribute] # unpacks tuple of three, _ is ignored
+        args = self._convert(attribute, args)
+        # bool is sent as int
+        args = (int(ar) if isinstance(ar, bool) else ar for ar in args)
+
+        # formats request string with args, if any
+        return request.format(*args)
+
+    def _convert(self, attribute, args):
+        """Convert write arguments to the data types of an attribute.
+
+        Args:
+            attribute (str): The name of the attribute in self.API dictionary.
+            args (tuple): Arguments to be converted.
+
+        Returns:
+            tuple: converted arguments
+        """
+        dtype, _, _ = self.API[attribute]
 
         # make sure dtype is a tuple, even if it was initially single 
         # (dtype in self.API['am_lookup_table'] is a tuple)
@@ -40,11 +194,8 @@ class SerialDevice:
         
         # dt: datatype
         # ar: argument
-        # If dt is not bool, convert ar to the specified data type dt (e.g., int(ar), float(ar), str(ar))
-        args = ((int(ar) if dt is bool else dt(ar)) for dt, ar in zip(dtype, args))
-        
-        # formats request string with args, if any, and passes it to the write method
-        self._write(request.format(*args))
+        # If dt is bool, convert ar to bool, otherwise to the specified data type dt (e.g., int(ar), float(ar), str(ar))
+        return tuple((bool(int(ar)) if dt is bool else dt(ar)) for dt, ar in zip(dtype, args))
 
     def read(self, attribute, *args):
         """Reads a value for a given attribute from the SerialDevice.
@@ -61,7 +212,52 @@ class SerialDevice:
                 expected number based on the attribute's data types, or if
                 an invalid return value is received for a boolean type.
         """
-        dtype, _, request = self.API[attribute] 
+        return self._read_attribute(None, attribute, args)
+
+    def _read_attribute(self, scope, attribute, args):
+        """Read an attribute and record the read value in the shadow state.
+
+        Args:
+            scope (int): channel index or None for device attributes
+            attribute (str): The name of the attribute to read from self.API dictionary. 
+            args (tuple): Arguments to be formatted into the request string.
+
+        Returns:
+            The read value, converted to the appropriate data type.
+        """
+        request, dtype, args, shadowed = self._prepare_query(attribute, args)
+        
+        with self._lock:
+            # query 
+            if self._observers:
+                start = perf_counter()
+                ret = self._query(request)
+                end = perf_counter()
+                for observer in self._observers:
+                    observer.on_query(self, scope, attribute, request, ret,
+                                      self._rx_bytes, start, end)
+            else:
+                ret = self._query(request)
+
+            ret = self._decode(dtype, ret)
+
+            # read-only attributes are status values and are not shadowed
+            if shadowed:
+                self._record((scope, attribute) + args, ret)
+        return ret
+
+    def _prepare_query(self, attribute, args):
+        """Encode a query request for a given attribute.
+
+        Args:
+            attribute (str): The name of the attribute to read from self.API dictionary. 
+            args (tuple): Arguments to be formatted into the request string.
+
+        Returns:
+            tuple: (request, reply data type, converted args, whether the
+                attribute is shadowed)
+        """
+        dtype, write_request, request = self.API[attribute] 
         dtype = dtype if isinstance(dtype, tuple) else (dtype,)
 
         # len(args) = 0, len(args)+1 = len(dtype) = 1
@@ -69,25 +265,409 @@ class SerialDevice:
         if len(args) + 1 != len(dtype):
             raise ValueError('Must have +1 more data-type than argument.')
 
-        args = ((int(ar) if dt is bool else dt(ar)) for dt, ar in zip(dtype, args))
-        
-        # query 
-        ret = self._query(request.format(*args))
+        args = tuple((int(ar) if dt is bool else dt(ar)) for dt, ar in zip(dtype, args))
+        return request.format(*args), dtype[-1], args, write_request is not None
+
+    def _decode(self, dtype, ret):
+        """Convert a reply to the data type of an attribute.
 
-        # format query to the correct dtype
-        dtype = dtype[-1] 
+        Args:
+            dtype (type): data type
+            ret (str): reply
+
+        Returns:
+            The converted value.
+        """
         if dtype is bool:
             ret = int(ret) 
             if ret not in (0, 1):
                 raise ValueError('Invalid return value \'{}\' for type bool.'.format(ret))
-        
         return dtype(ret)
 
+    def read_many(self, queries):
+        """Read several attributes with pipelined queries.
+
+        All queries are sent with a single write and the replies are read
+        back in order, which saves a round trip per query.
+
+        Args:
+            queries (iterable): attribute names, or tuples of an attribute
+                name and its arguments, e.g. ('am_lookup_table', 3)
+
+        Returns:
+            list: read values, converted to the appropriate data types
+        """
+        items = []
+        for query in queries:
+            if isinstance(query, str):
+                query = (query,)
+            items.append((None, query[0], tuple(query[1:])))
+        return self._read_many(items)
+
+    def _read_many(self, items):
+        """Read attributes with pipelined queries.
+
+        Args:
+            items (list): list of (scope, attribute, args)
+
+        Returns:
+            list: read values in the order of items
+        """
+        requests = []
+        queries = []
+        for scope, attribute, args in items:
+            request, dtype, args, shadowed = self._prepare_query(attribute, args)
+            requests.append(request)
+            queries.append((scope, attribute, args, request, dtype, shadowed))
+        return self._pipeline(requests, queries)
+
+    def _pipeline(self, requests, queries, updates=(), writes=()):
+        """Send requests with a single write and read the replies to the queries.
+
+        Args:
+            requests (list): list of str of encoded requests, including the
+                queries
+            queries (list): list of (scope, attribute, args, request, dtype,
+                shadowed) of the queries among the requests, in order
+            updates (iterable): shadow state updates caused by the other
+                requests
+            writes (iterable): (scope, attribute, request) of the other
+                requests, reported to observers
+
+        Returns:
+            list: read values in the order of queries
+        """
+        values = []
+        with self._lock:
+            if self._capture is not None:
+                raise RuntimeError('Cannot read from device while capturing writes.')
+            start = perf_counter()
+            self._write(''.join(requests))
+            for scope, attribute, request in writes:
+                for observer in self._observers:
+                    observer.on_write(self, scope, attribute, request, start, self._last_io)
+            try:
+                for scope, attribute, args, request, dtype, shadowed in queries:
+                    ret = self._read()
+                    for observer in self._observers:
+                        observer.on_query(self, scope, attribute, request, ret,
+                                          self._rx_bytes, start, self._last_io)
+                    ret = self._decode(dtype, ret)
+                    if shadowed:
+                        self._record((scope, attribute) + args, ret)
+                    values.append(ret)
+            except Exception:
+                # drop pending replies so that later queries stay in sync
+                self._dev.reset_input_buffer()
+                raise
+            for key, value in updates:
+                self._record(key, value)
+        return values
+
+    def cached(self, attribute, *args):
+        """Last value written to or read from the device for an attribute.
+
+        This does not access the device and does not take the device lock,
+        so it is safe to call from any thread at any time. The value may be
+        stale if the device changes it by itself, e.g. while sweeping.
+        Frequencies and powers are forgotten when a sweep or modulation is
+        enabled or disabled.
+
+        Args:
+            attribute (str): The name of the attribute in self.API dictionary.
+            *args: Arguments of the attribute, e.g. a lookup table row.
+
+        Returns:
+            The cached value or None if unknown.
+        """
+        return self._cached(None, attribute, args)
+
+    def _cached(self, scope, attribute, args):
+        """Look up the shadow state.
+
+        Args:
+            scope (int): channel index or None for device attributes
+            attribute (str): The name of the attribute in self.API dictionary.
+            args (tuple): Arguments of the attribute.
+
+        Returns:
+            The cached value or None if unknown.
+        """
+        return self._shadow.get((scope, attribute) + args)
+
+    def _write_differences(self, configure):
+        """Bring the device to the state set by a method, with few requests.
+
+        The writes of configure() are captured, the attributes they set are
+        read back in one pipelined burst, and only the writes that change
+        the device state are sent, in their original order and in a single
+        write. If a sweep or modulation reads back as enabled, frequencies and
+        powers read while it ran are not trusted: their writes are always
+        sent, after the writes that disable it.
+
+        Args:
+            configure (callable): method writing the target state
+        """
+        with self.capture() as requests:
+            configure()
+        targets = {}
+        for effect in requests.effects:
+            if effect is None or effect == ():
+                raise RuntimeError('Cannot compare writes without shadowed values.')
+            key, value = effect
+            if key[1] != 'channel':
+                targets[key] = value
+        self._write_targets(targets)
+
+    def _write_targets(self, targets):
+        """Read the target attributes and write the ones that differ, atomically.
+
+        See _write_differences().
+
+        Args:
+            targets (dict): map of (scope, attribute, *args) to target value,
+                in the order of the writes
+        """
+        with self._lock:
+            # read the autonomous modes first, recording them as disabled
+            # would forget the frequencies and powers read before them
+            keys = sorted(targets, key=lambda key: key[1] not in AUTONOMOUS)
+            values = self._read_many([(key[0], key[1], key[2:]) for key in keys])
+            current = dict(zip(keys, values))
+            running = any(current[key] for key in keys if key[1] in AUTONOMOUS)
+            items = list(targets.items())
+            if running:
+                items.sort(key=lambda item: item[0][1] in _AUTONOMOUS_TARGETS)
+            with self.capture() as requests:
+                for key, value in items:
+                    scope, attribute, args = key[0], key[1], key[2:]
+                    forced = running and attribute in _AUTONOMOUS_TARGETS
+                    if not forced and self.encode(attribute, *args, current[key]) \
+                            == self.encode(attribute, *args, value):
+                        continue
+                    target = self if scope is None else self[scope]
+                    target.write(attribute, *args, value)
+            if requests:
+                self.write_raw(''.join(requests), requests.updates)
+
+    def _read_config(self, config):
+        """Read the values of a configuration in API units, atomically.
+
+        Args:
+            config (type): configuration class, e.g. PulseConfig
+
+        Returns:
+            list: values in the order of the configuration fields
+        """
+        return config._read_api(self)
+
+    def _run_segments(self, segments, waits, updates):
+        """Send the segments of a compiled sequence, see CompiledSequence.run().
+
+        Args:
+            segments (tuple): bytes of encoded requests per segment
+            waits (tuple): float of wait before each segment in seconds
+            updates (tuple): shadow state updates per segment
+
+        Returns:
+            list: list of float of send times of the segments in seconds
+                after the start
+        """
+        times = []
+        with self._lock:
+            start = due = perf_counter()
+            for segment, wait, segment_updates in zip(segments, waits, updates):
+                due += wait
+                delay = due - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+                times.append(perf_counter() - start)
+                self.write_raw(segment, segment_updates)
+        return times
+
+    def invalidate(self):
+        """Forget all cached values."""
+        self._shadow.clear()
+
+    def _record(self, key, value):
+        """Record a value in the shadow state, or in the capture if capturing.
+
+        Args:
+            key (tuple): (scope, attribute, *args)
+            value: value
+        """
+        if self._capture is not None:
+            self._capture.updates.append((key, value))
+        else:
+            if key[1] in AUTONOMOUS and (value or self._shadow.get(key, True)):
+                # sweeps and modulation change these by themselves until
+                # they are disabled
+                self._forget_targets()
+            self._shadow[key] = value
+
+    def _forget_targets(self):
+        """Forget the cached values that sweeps and modulation change."""
+        for stale in [k for k in self._shadow if k[1] in _AUTONOMOUS_TARGETS]:
+            del self._shadow[stale]
+
+    def write_raw(self, data, updates=()):
+        """Write pre-encoded requests to the device in a single write.
+
+        Args:
+            data (str / bytes): encoded requests, e.g. from capture()
+            updates (iterable): shadow state updates caused by the requests,
+                e.g. CapturedWrites.updates
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self._lock:
+            if self._capture is not None:
+                self._capture.append(data.decode('utf-8'))
+                # raw requests may select any channel
+                self._capture.selected = None
+                self._capture.effects.append(None)
+            else:
+                start = perf_counter()
+                self._dev.write(data)
+                end = self._last_io = perf_counter()
+                for observer in self._observers:
+                    observer.on_write(self, None, None, data.decode('utf-8'), start, end)
+            for key, value in updates:
+                if self._capture is None and key[1] == 'frequency':
+                    self._frequency_times[key[0]] = end
+                self._record(key, value)
+
+    def _take_frequency_time(self, scope):
+        """Time the last frequency write was sent, and forget it.
+
+        Only writes that went out on the wire count, directly or as part of a
+        raw write with its updates, not captured or skipped ones.
+
+        Args:
+            scope (int): channel index or None for device attributes
+
+        Returns:
+            float: time.perf_counter() at the end of the write, or None if
+                there was no frequency write since the last call
+        """
+        return self._frequency_times.pop(scope, None)
+
+    @contextmanager
+    def capture(self):
+        """Capture writes instead of sending them to the device.
+
+        Within the context, property setters validate and encode their
+        requests as usual, but the encoded requests are appended to the
+        yielded list. Reading is not allowed while capturing. The device
+        lock is held for the duration of the context.
+
+        Yields:
+            CapturedWrites: list of str of encoded requests
+        """
+        with self._lock:
+            if self._capture is not None:
+                raise RuntimeError('Already capturing writes.')
+            self._capture = CapturedWrites()
+            try:
+                yield self._capture
+            finally:
+                self._capture = None
+
+    def _read_identity(self, attribute):
+        """Read an identity attribute, from the identity cache if possible.
+
+        Args:
+            attribute (str): one of identity.IDENTITY_ATTRIBUTES
+
+        Returns:
+            The read value.
+        """
+        if self._identity is not None:
+            return self._identity[attribute]
+        return self.read(attribute)
+
+    def _cache_identity(self):
+        """Query identity attributes and store them in the identity cache."""
+        if self._identity_cache is None:
+            return
+        from .identity import IDENTITY_ATTRIBUTES
+        identity = {attribute: self.read(attribute) for attribute in IDENTITY_ATTRIBUTES}
+        identity['model'] = self._model
+        self._identity_cache.store(self._devpath, identity)
+        self._identity = identity
+
+    def _confirm_identity(self):
+        """Confirm a cached identity with a single serial number query.
+
+        Called by _identify() before the model is used. On mismatch, the
+        cache entry is invalidated and dropped, so that the device is
+        identified from scratch.
+        """
+        request = self.API['serial_number'][2]
+        start = perf_counter()
+        self._dev.write(request.encode('utf-8'))
+        reply = self._read()
+        for observer in self._observers:
+            observer.on_query(self, None, 'serial_number', request, reply, self._rx_bytes,
+                              start, self._last_io)
+        if int(reply) != self._identity['serial_number']:
+            self._identity_cache.invalidate(self._devpath)
+            self._identity = None
+
+    def _identify(self):
+        """Identify the device model. Implemented by device classes."""
+        raise NotImplementedError
+
     def dev_clear(self):
         """ reset input and output buffer """
-        self._dev.flush() # flush alone doesn't work
-        self._dev.reset_input_buffer()
-        self._dev.reset_output_buffer()
+        with self._lock:
+            if self._capture is not None:
+                raise RuntimeError('Cannot clear device while capturing writes.')
+            start = perf_counter()
+            self._dev.flush() # flush alone doesn't work
+            self._dev.reset_input_buffer()
+            self._dev.reset_output_buffer()
+            end = perf_counter()
+            for observer in self._observers:
+                observer.on_clear(self, start, end)
+
+    @property
+    def idle_time(self):
+        """Time since the last request or reply on the wire.
+
+        Returns:
+            float: idle time in seconds
+        """
+        return perf_counter() - self._last_io
+
+    def add_observer(self, observer):
+        """Add an observer of device traffic.
+
+        Observers are called with the device lock held, after each request
+        went out on the wire, and must implement:
+
+            on_write(device, scope, attribute, data, start, end)
+            on_query(device, scope, attribute, request, reply, received, start, end)
+            on_clear(device, start, end)
+
+        where scope is the channel index or None, attribute is None for raw
+        writes, received is the number of bytes read and start / end are
+        time.perf_counter() timestamps.
+
+        Args:
+            observer: observer
+        """
+        with self._lock:
+            self._observers = self._observers + (observer,)
+
+    def remove_observer(self, observer):
+        """Remove an observer of device traffic.
+
+        Args:
+            observer: observer
+        """
+        with self._lock:
+            self._observers = tuple(obs for obs in self._observers if obs is not observer)
 
     def _write(self, data):
         """Write to device.
@@ -95,7 +675,11 @@ class SerialDevice:
         Args:
             data (str): write data
         """
+        if self._capture is not None:
+            self._capture.append(data)
+            return
         self._dev.write(data.encode('utf-8'))
+        self._last_io = perf_counter()
 
     def _read(self):
         """Read from device.
@@ -104,6 +688,8 @@ class SerialDevice:
             str: data
         """
         rdata = self._dev.readline()
+        self._last_io = perf_counter()
+        self._rx_bytes = len(rdata)
         if not rdata.endswith(b'\n'):
             raise TimeoutError('Expected newline terminator.')
         return rdata.decode('utf-8').strip()
@@ -117,5 +703,8 @@ class SerialDevice:
         Returns:
             str: data
         """
-        self._write(data)
-        return self._read()
+        if self._capture is not None:
+            raise RuntimeError('Cannot read from device while capturing writes.')
+        with self._lock:
+            self._write(data)
+            return self._read()
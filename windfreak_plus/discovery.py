@@ -0,0 +1,165 @@
+"""Discovery of Windfreak devices on serial ports.
+
+Candidate ports are probed in parallel with short timeouts. Each port is
+opened once: it is first asked for its model type ('+') to pick the device
+class, which then takes over the open port and identifies the model with its
+usual queries. Results are cached by USB serial
+number, so ports that were identified before are not probed again.
+"""
+
+import glob
+import os
+from fnmatch import fnmatch
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from .synth_hd import SynthHD
+from .synth_nv_pro import SynthNVPro
+
+
+CANDIDATE_PATTERNS = ('/dev/ttyACM*', '/dev/ttyUSB*')
+
+_cache = {}
+_cache_lock = Lock()
+
+
+class DeviceDescriptor(namedtuple('DeviceDescriptor', (
+        'devpath', 'usb_serial', 'device_class', 'model', 'serial_number',
+        'firmware_version', 'hardware_version'))):
+
+    def open(self, **kwargs):
+        """Open the described device.
+
+        Args:
+            **kwargs: keyword arguments passed to the device class
+
+        Returns:
+            SynthHD / SynthNVPro: device
+        """
+        return self.device_class(self.devpath, **kwargs)
+
+
+def candidate_ports():
+    """Serial ports that may have a Windfreak device attached.
+
+    Returns:
+        dict: map of device path to USB serial number (or None if unknown)
+    """
+    from serial.tools import list_ports
+    ports = {}
+    for port in list_ports.comports():
+        if os.name != 'posix' or any(fnmatch(port.device, pattern)
+                                     for pattern in CANDIDATE_PATTERNS):
+            ports[port.device] = port.serial_number
+    if os.name == 'posix':
+        for pattern in CANDIDATE_PATTERNS:
+            for devpath in glob.glob(pattern):
+                ports.setdefault(devpath, None)
+    return ports
+
+
+def probe(devpath, usb_serial=None, timeout=0.5, **kwargs):
+    """Identify the device on a serial port.
+
+    Args:
+        devpath (str): device path
+        usb_serial (str): USB serial number of the port, if known
+        timeout (float): read timeout in seconds
+        **kwargs: keyword arguments passed to the device class, e.g.
+            transport
+
+    Returns:
+        DeviceDescriptor: descriptor or None if no supported device was found
+    """
+    transport = kwargs.pop('transport', None)
+    if transport is None:
+        from .transport import serial_transport as transport
+    port = transport(devpath, timeout)
+    try:
+        port.write(SynthHD.API['model_type'][2].encode('utf-8'))
+        reply = port.readline()
+        if not reply.endswith(b'\n'):
+            raise TimeoutError('Expected newline terminator.')
+        model_type = reply.decode('utf-8').strip()
+        if 'SynthNVP' in model_type:
+            device_class = SynthNVPro
+        elif 'SynthHD' in model_type:
+            device_class = SynthHD
+        else:
+            port.close()
+            return None
+        # the device takes over the open port
+        device = device_class(devpath, timeout=timeout,
+                              transport=lambda devpath, timeout: port, **kwargs)
+    except BaseException:
+        port.close()
+        raise
+    try:
+        if device.model is None:
+            return None
+        return DeviceDescriptor(
+            devpath=devpath,
+            usb_serial=usb_serial,
+            device_class=device_class,
+            model=device.model,
+            serial_number=device.serial_number,
+            firmware_version=device.firmware_version,
+            hardware_version=device.hardware_version,
+        )
+    finally:
+        device.close()
+
+
+def discover(timeout=0.5, refresh=False, max_workers=None, **kwargs):
+    """Discover Windfreak devices on all candidate serial ports.
+
+    Ports are probed in parallel. Ports whose USB serial number was already
+    identified at the same device path are answered from the cache, unless
+    refresh is True.
+
+    Args:
+        timeout (float): read timeout per query in seconds
+        refresh (bool): probe all ports, ignoring cached results
+        max_workers (int): maximum number of probing threads
+        **kwargs: keyword arguments passed to the device classes
+
+    Returns:
+        list: list of DeviceDescriptor sorted by device path
+    """
+    ports = candidate_ports()
+    found = []
+    to_probe = []
+    with _cache_lock:
+        for devpath, usb_serial in ports.items():
+            cached = _cache.get(usb_serial) if usb_serial is not None else None
+            if not refresh and cached is not None and cached.devpath == devpath:
+                found.append(cached)
+            else:
+                to_probe.append((devpath, usb_serial))
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=max_workers or len(to_probe)) as executor:
+            futures = [executor.submit(_try_probe, devpath, usb_serial, timeout, kwargs)
+                       for devpath, usb_serial in to_probe]
+            probed = [future.result() for future in futures]
+        with _cache_lock:
+            for descriptor in probed:
+                if descriptor is None:
+                    continue
+                found.append(descriptor)
+                if descriptor.usb_serial is not None:
+                    _cache[descriptor.usb_serial] = descriptor
+    return sorted(found, key=lambda descriptor: descriptor.devpath)
+
+
+def clear_cache():
+    """Forget all previously discovered devices."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _try_probe(devpath, usb_serial, timeout, kwargs):
+    from serial import SerialException
+    try:
+        return probe(devpath, usb_serial, timeout, **kwargs)
+    except (SerialException, OSError, TimeoutError, ValueError, UnicodeDecodeError):
+        return None
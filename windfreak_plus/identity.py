@@ -0,0 +1,126 @@
+"""Persistent on-disk cache of device identities.
+
+Constructing a device queries its identity (model, versions, serial number)
+before the object is usable. The identity cache stores these per device path
+together with the USB serial number of the port, so that the queries can be
+skipped when the same device is opened again. A cached identity is only used
+if the USB serial number of the port still matches, and is confirmed by the
+device with a single serial number query when it is constructed, before the
+cached model is used to validate anything.
+"""
+
+import json
+import os
+
+
+IDENTITY_ATTRIBUTES = ('model_type', 'serial_number', 'fw_version', 'hw_version')
+
+
+def default_cache_path():
+    """Default location of the identity cache file.
+
+    Returns:
+        str: path
+    """
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'windfreak_plus', 'identity.json')
+
+
+def usb_serial_number(devpath):
+    """USB serial number of a serial port.
+
+    Args:
+        devpath (str): device path
+
+    Returns:
+        str: USB serial number or None if unknown
+    """
+    from serial.tools import list_ports
+    realpath = os.path.realpath(devpath)
+    for port in list_ports.comports():
+        if port.device in (devpath, realpath):
+            return port.serial_number
+    return None
+
+
+class IdentityCache:
+
+    def __init__(self, path=None):
+        self._path = default_cache_path() if path is None else path
+        self._entries = None
+
+    @property
+    def path(self):
+        """Path of the cache file.
+
+        Returns:
+            str: path
+        """
+        return self._path
+
+    def lookup(self, devpath):
+        """Look up the cached identity of the device at a path.
+
+        Args:
+            devpath (str): device path
+
+        Returns:
+            dict: identity or None if not cached or no longer valid
+        """
+        entry = self._load().get(devpath)
+        if entry is None:
+            return None
+        usb_serial = usb_serial_number(devpath)
+        if usb_serial is None or usb_serial != entry['usb_serial']:
+            return None
+        return dict(entry['identity'])
+
+    def store(self, devpath, identity):
+        """Store the identity of the device at a path.
+
+        The identity is only stored if the USB serial number of the port is
+        known, since otherwise it cannot be validated later.
+
+        Args:
+            devpath (str): device path
+            identity (dict): identity
+        """
+        usb_serial = usb_serial_number(devpath)
+        if usb_serial is None:
+            return
+        entries = self._load()
+        entries[devpath] = {'usb_serial': usb_serial, 'identity': dict(identity)}
+        self._save()
+
+    def invalidate(self, devpath):
+        """Remove the cached identity of the device at a path.
+
+        Args:
+            devpath (str): device path
+        """
+        entries = self._load()
+        if entries.pop(devpath, None) is not None:
+            self._save()
+
+    def clear(self):
+        """Remove all cached identities."""
+        self._entries = {}
+        self._save()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self._path, encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmppath = '{}.{}.tmp'.format(self._path, os.getpid())
+        with open(tmppath, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=4)
+        os.replace(tmppath, self._path)
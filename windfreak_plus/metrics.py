@@ -0,0 +1,238 @@
+"""Opt-in per-command metrics.
+
+MetricsRegistry observes devices and records, per device and API attribute,
+request counts, bytes sent and received, and wire latency histograms of
+writes and queries. All counters of a device are created when the device is
+instrumented, so recording only does a dictionary lookup, a bisection and
+in-place increments.
+
+Example:
+
+    registry = MetricsRegistry()
+    registry.instrument(synth)
+    registry.serve(port=9464)  # Prometheus text format on /metrics
+    ...
+    registry.snapshot()
+"""
+
+from bisect import bisect_left
+from threading import Lock, Thread
+
+
+# Upper bounds of latency histogram buckets in seconds
+LATENCY_BUCKETS = (50.e-6, 100.e-6, 250.e-6, 500.e-6, 1.e-3, 2.5e-3, 5.e-3,
+                   10.e-3, 25.e-3, 50.e-3, 100.e-3, 250.e-3, 500.e-3, 1., 2.5, 10.)
+
+# Attribute name used for raw writes
+RAW = '(raw)'
+
+
+class Histogram:
+
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # last count is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+
+    def record(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def snapshot(self):
+        return {
+            'buckets': self.buckets,
+            'counts': list(self.counts),
+            'sum': self.sum,
+            'count': sum(self.counts),
+        }
+
+
+class AttributeMetrics:
+
+    __slots__ = ('writes', 'queries', 'bytes_sent', 'bytes_received',
+                 'write_latency', 'query_latency')
+
+    def __init__(self, buckets):
+        self.writes = 0
+        self.queries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.write_latency = Histogram(buckets)
+        self.query_latency = Histogram(buckets)
+
+    def snapshot(self):
+        return {
+            'writes': self.writes,
+            'queries': self.queries,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'write_latency': self.write_latency.snapshot(),
+            'query_latency': self.query_latency.snapshot(),
+        }
+
+
+class MetricsRegistry:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._lock = Lock()
+        self._devices = {}
+        self._names = {}
+        self._http = None
+
+    def instrument(self, device, name=None):
+        """Start recording metrics of a device.
+
+        Args:
+            device (SerialDevice): device
+            name (str): device name used in snapshots, default: device path
+        """
+        name = str(device._devpath) if name is None else name
+        metrics = {attribute: AttributeMetrics(self._buckets)
+                   for attribute in tuple(device.API) + (RAW,)}
+        with self._lock:
+            self._devices[device] = metrics
+            self._names[device] = name
+        device.add_observer(self)
+
+    def detach(self, device):
+        """Stop recording metrics of a device. Recorded metrics are kept.
+
+        Args:
+            device (SerialDevice): device
+        """
+        device.remove_observer(self)
+
+    def reset(self):
+        """Reset all recorded metrics."""
+        with self._lock:
+            for device, metrics in self._devices.items():
+                self._devices[device] = {attribute: AttributeMetrics(self._buckets)
+                                         for attribute in metrics}
+
+    def on_write(self, device, scope, attribute, data, start, end):
+        metrics = self._devices[device][RAW if attribute is None else attribute]
+        metrics.writes += 1
+        metrics.bytes_sent += len(data)
+        metrics.write_latency.record(end - start)
+
+    def on_query(self, device, scope, attribute, request, reply, received, start, end):
+        metrics = self._devices[device][attribute]
+        metrics.queries += 1
+        metrics.bytes_sent += len(request)
+        metrics.bytes_received += received
+        metrics.query_latency.record(end - start)
+
+    def on_clear(self, device, start, end):
+        pass
+
+    def snapshot(self):
+        """Snapshot of recorded metrics of attributes that were accessed.
+
+        Returns:
+            dict: map of device name to map of attribute to metrics
+        """
+        with self._lock:
+            devices = list(self._devices.items())
+            names = dict(self._names)
+        return {
+            names[device]: {
+                attribute: m.snapshot()
+                for attribute, m in metrics.items() if m.writes or m.queries
+            }
+            for device, metrics in devices
+        }
+
+    def prometheus(self):
+        """Recorded metrics in Prometheus text exposition format.
+
+        Returns:
+            str: metrics
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def counter(metric, key, help):
+            lines.append('# HELP {} {}'.format(metric, help))
+            lines.append('# TYPE {} counter'.format(metric))
+            for device, attributes in snapshot.items():
+                for attribute, m in attributes.items():
+                    lines.append('{}{{device="{}",attribute="{}"}} {}'.format(
+                                 metric, _escape(device), _escape(attribute), m[key]))
+
+        def histogram(metric, key, help):
+            lines.append('# HELP {} {}'.format(metric, help))
+            lines.append('# TYPE {} histogram'.format(metric))
+            for device, attributes in snapshot.items():
+                for attribute, m in attributes.items():
+                    h = m[key]
+                    if not h['count']:
+                        continue
+                    labels = 'device="{}",attribute="{}"'.format(_escape(device), _escape(attribute))
+                    cumulative = 0
+                    for bound, count in zip(h['buckets'] + ('+Inf',), h['counts']):
+                        cumulative += count
+                        lines.append('{}_bucket{{{},le="{}"}} {}'.format(
+                                     metric, labels, bound, cumulative))
+                    lines.append('{}_sum{{{}}} {!r}'.format(metric, labels, h['sum']))
+                    lines.append('{}_count{{{}}} {}'.format(metric, labels, h['count']))
+
+        counter('windfreak_writes_total', 'writes', 'Number of write requests.')
+        counter('windfreak_queries_total', 'queries', 'Number of query requests.')
+        counter('windfreak_sent_bytes_total', 'bytes_sent', 'Number of bytes sent.')
+        counter('windfreak_received_bytes_total', 'bytes_received', 'Number of bytes received.')
+        histogram('windfreak_write_latency_seconds', 'write_latency', 'Write latency in seconds.')
+        histogram('windfreak_query_latency_seconds', 'query_latency',
+                  'Query round-trip latency in seconds.')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9464, host='127.0.0.1'):
+        """Serve metrics in Prometheus text format on http://host:port/metrics.
+
+        The server runs in a background thread.
+
+        Args:
+            port (int): TCP port, 0 for any free port
+            host (str): host address
+
+        Returns:
+            tuple: (host, port) the server is listening on
+        """
+        if self._http is not None:
+            raise RuntimeError('Metrics are already being served.')
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=self._http.serve_forever, daemon=True).start()
+        return self._http.server_address
+
+    def stop_serving(self):
+        """Stop serving metrics."""
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
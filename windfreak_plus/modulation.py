@@ -0,0 +1,293 @@
+"""Modulation configurations.
+
+A configuration is an immutable, hashable value object holding all
+parameters of a modulation. It is validated when it is created, and against
+a model's capabilities when it is compiled for a device. Compiled requests
+are cached per model, so switching between configurations is a single
+pre-encoded write, and the current configuration is read back with one
+pipelined read:
+
+    burst = PulseConfig(on_time=10, off_time=90, repetitions=100)
+    print(burst.duty_cycle, burst.burst_time)
+    synth.pulse_config = burst
+    done = synth.pulse_single()  # time.perf_counter() at the end of the burst
+
+    settings = [FMConfig(frequency=1000, deviation=d, continuous=True)
+                for d in (1000, 2000, 5000)]
+    for config in settings:
+        config.compile(synth)  # validate and encode ahead of time
+    synth.fm_config = settings[1]
+
+Enables are written after the parameters when switching a modulation on,
+and before them when switching it off.
+"""
+
+from collections import namedtuple
+from time import perf_counter
+from .capabilities import FM_FREQUENCY, PULSE_OFF_TIME, PULSE_ON_TIME, PULSE_REPETITIONS
+
+
+FM_TYPES = ('sine', 'chirp')
+
+# compiled configurations by (config, device class, model)
+_compiled = {}
+_MAX_COMPILED = 1024
+
+
+def _check_int(name, value, bounds=None, unit=''):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError('{}: expected int.'.format(name))
+    if bounds is None:
+        if value < 1:
+            raise ValueError('{}: expected int >= 1.'.format(name))
+        return
+    try:
+        bounds.validate(value, unit)
+    except ValueError as exc:
+        raise ValueError('{}: {}'.format(name, exc)) from None
+
+
+def _check_bool(name, value):
+    if not isinstance(value, bool):
+        raise TypeError('{}: expected bool.'.format(name))
+
+
+class _Config:
+    """Compiling, applying and reading of a configuration.
+
+    Subclasses are namedtuples and define ATTRIBUTES, the API attribute of
+    each field, ENABLES, the fields that start the modulation, FIXED,
+    (attribute, value) pairs written before the fields, and CHANNEL, the
+    channel selected before writing or reading, or None.
+    """
+
+    __slots__ = ()
+
+    ATTRIBUTES = ()
+    ENABLES = ()
+    FIXED = ()
+    CHANNEL = None
+
+    def validate(self, capabilities):
+        """Check that a model supports the configuration.
+
+        Args:
+            capabilities (Capabilities): capabilities or None if unknown
+
+        Raises:
+            ValueError: if a field is set that the model does not support
+        """
+        if capabilities is None:
+            return
+        for field, attribute, value in zip(self._fields, self.ATTRIBUTES, self):
+            if value and not capabilities.supports(attribute):
+                raise ValueError('{}: not supported by {}.'.format(field, capabilities.model))
+
+    def compile(self, device):
+        """Validate the configuration for a device and encode its requests.
+
+        Results are cached per device class and model.
+
+        Args:
+            device (SynthHD / SynthNVPro): device
+
+        Returns:
+            tuple: (bytes of encoded requests, tuple of shadow state updates)
+        """
+        key = (self, type(device), device.model)
+        compiled = _compiled.get(key)
+        if compiled is None:
+            capabilities = device.capabilities
+            self.validate(capabilities)
+            fields = [(field, attribute, value) for field, attribute, value
+                      in zip(self._fields, self.ATTRIBUTES, self._to_api())
+                      if capabilities is None or capabilities.supports(attribute)]
+            first = [item for item in fields if item[0] in self.ENABLES and not item[2]]
+            last = [item for item in fields if item[0] in self.ENABLES and item[2]]
+            params = [item for item in fields if item[0] not in self.ENABLES]
+            fixed = [(None, attribute, value) for attribute, value in self.FIXED
+                     if capabilities is None or capabilities.supports(attribute)]
+            with device.capture() as requests:
+                if self.CHANNEL is not None:
+                    device.write('channel', self.CHANNEL)
+                for _, attribute, value in first + fixed + params + last:
+                    device.write(attribute, value)
+            compiled = (''.join(requests).encode('utf-8'), tuple(requests.updates))
+            if len(_compiled) >= _MAX_COMPILED:
+                _compiled.clear()
+            _compiled[key] = compiled
+        return compiled
+
+    def apply(self, device):
+        """Apply the configuration to a device in a single write.
+
+        Args:
+            device (SynthHD / SynthNVPro): device
+        """
+        data, updates = self.compile(device)
+        device.write_raw(data, updates)
+
+    @classmethod
+    def read(cls, device):
+        """Read the configuration of a device with one pipelined read.
+
+        Fields the model does not support read as False. Values are taken
+        as read, without validation.
+
+        Args:
+            device (SynthHD / SynthNVPro): device
+
+        Returns:
+            configuration
+        """
+        return cls._from_api(device._read_config(cls))
+
+    @classmethod
+    def _read_api(cls, device):
+        """Read the field values in API units under the device lock, see read()."""
+        capabilities = device.capabilities
+        supported = [capabilities is None or capabilities.supports(attribute)
+                     for attribute in cls.ATTRIBUTES]
+        with device._lock:
+            if cls.CHANNEL is not None:
+                device.write('channel', cls.CHANNEL)
+            values = iter(device.read_many([attribute for attribute, ok
+                                            in zip(cls.ATTRIBUTES, supported) if ok]))
+        return [next(values) if ok else False for ok in supported]
+
+    def _to_api(self):
+        """Field values in API units."""
+        return tuple(self)
+
+    @classmethod
+    def _from_api(cls, values):
+        """Configuration from values in API units, without validation."""
+        return cls._make(values)
+
+
+class PulseConfig(_Config, namedtuple('PulseConfig', (
+        'on_time', 'off_time', 'repetitions', 'invert', 'continuous', 'dual'))):
+    """Pulse modulation configuration.
+
+    on_time and off_time are in microseconds, repetitions is the number of
+    pulses of a single burst, invert inverts the pulse polarity, continuous
+    enables continuous pulse modulation and dual enables dual pulse
+    modulation (SynthHD only).
+    """
+
+    __slots__ = ()
+
+    ATTRIBUTES = ('pulse_on_time', 'pulse_off_time', 'pulse_num_rep', 'pulse_invert',
+                  'pulse_cont', 'dual_pulse_mod')
+    ENABLES = ('continuous', 'dual')
+
+    def __new__(cls, on_time, off_time, repetitions=1, invert=False, continuous=False,
+                dual=False):
+        _check_int('on_time', on_time, PULSE_ON_TIME, 'us')
+        _check_int('off_time', off_time, PULSE_OFF_TIME, 'us')
+        _check_int('repetitions', repetitions, PULSE_REPETITIONS)
+        for name, value in (('invert', invert), ('continuous', continuous), ('dual', dual)):
+            _check_bool(name, value)
+        return super().__new__(cls, on_time, off_time, repetitions, invert, continuous, dual)
+
+    @property
+    def period(self):
+        """Pulse period.
+
+        Returns:
+            float: period in seconds
+        """
+        return (self.on_time + self.off_time) * 1.e-6
+
+    @property
+    def duty_cycle(self):
+        """Fraction of the period the output is on.
+
+        Returns:
+            float: duty cycle
+        """
+        return self.on_time / (self.on_time + self.off_time)
+
+    @property
+    def burst_time(self):
+        """Duration of a single burst of repetitions pulses.
+
+        Returns:
+            float: time in seconds
+        """
+        return self.repetitions * self.period
+
+
+class FMConfig(_Config, namedtuple('FMConfig', (
+        'frequency', 'deviation', 'samples', 'mod_type', 'continuous'))):
+    """Frequency modulation configuration.
+
+    frequency is the modulation frequency and deviation the frequency
+    deviation, both in Hz, samples is the number of samples per cycle,
+    mod_type is one of FM_TYPES and continuous enables continuous FM. Both
+    frequencies are checked against the FM ranges of the model when the
+    configuration is compiled for a device.
+    """
+
+    __slots__ = ()
+
+    ATTRIBUTES = ('fm_frequency', 'fm_deviation', 'fm_num_samples', 'fm_mod_type', 'fm_cont')
+    ENABLES = ('continuous',)
+
+    def __new__(cls, frequency, deviation, samples=100, mod_type='sine', continuous=False):
+        _check_int('frequency', frequency, FM_FREQUENCY, 'Hz')
+        _check_int('deviation', deviation)
+        _check_int('samples', samples)
+        if mod_type not in FM_TYPES:
+            raise ValueError('mod_type: expected str in set {}.'.format(FM_TYPES))
+        _check_bool('continuous', continuous)
+        return super().__new__(cls, frequency, deviation, samples, mod_type, continuous)
+
+    def validate(self, capabilities):
+        """Check that a model supports the configuration.
+
+        Args:
+            capabilities (Capabilities): capabilities or None if unknown
+
+        Raises:
+            ValueError: if a field is out of the model's FM ranges
+        """
+        super().validate(capabilities)
+        if capabilities is None:
+            return
+        for field, bounds in (('frequency', capabilities.fm_frequency),
+                              ('deviation', capabilities.fm_deviation)):
+            if bounds is not None:
+                _check_int(field, getattr(self, field), bounds, 'Hz')
+
+    def _to_api(self):
+        return self._replace(mod_type=FM_TYPES.index(self.mod_type))
+
+    @classmethod
+    def _from_api(cls, values):
+        config = cls._make(values)
+        if config.mod_type in range(len(FM_TYPES)):
+            config = config._replace(mod_type=FM_TYPES[config.mod_type])
+        return config
+
+
+def trigger_pulse(device):
+    """Trigger a single pulse burst.
+
+    The burst duration is computed from the cached pulse parameters, which
+    are read in one pipelined read if unknown.
+
+    Args:
+        device (SynthHD / SynthNVPro): device
+
+    Returns:
+        float: expected time.perf_counter() at the end of the burst
+    """
+    attributes = PulseConfig.ATTRIBUTES[:3]
+    with device._lock:
+        timing = [device.cached(attribute) for attribute in attributes]
+        if None in timing:
+            timing = device.read_many(attributes)
+        on_time, off_time, repetitions = timing
+        device.write('pulse_single')
+        return perf_counter() + repetitions * (on_time + off_time) * 1.e-6
@@ -0,0 +1,276 @@
+"""Background monitoring of device status.
+
+Monitor polls temperature and per-channel PLL lock and calibration status
+(and the RFin detector power of SynthNVPro) at a configurable interval. Each
+sample is read with one pipelined burst of queries, which waits for an idle
+gap on the bus, so that monitoring does not delay control traffic. Samples
+are stored in a fixed-size NumPy ring buffer, and a callback is called when a
+value leaves its allowed range or a status bit drops.
+
+Failed samples, e.g. on a read timeout or a disconnected port, do not stop
+monitoring. They are reported by errors() and to the callback as 'error',
+and sampling backs off exponentially until a sample succeeds again.
+
+Example:
+
+    monitor = Monitor(synth, interval=1., thresholds={'temperature': (None, 45.)},
+                      callback=lambda name, value, time: print(name, value))
+    monitor.start()
+    ...
+    monitor.stop()
+    monitor.samples()['temperature']
+
+Requires NumPy.
+"""
+
+from collections import deque, namedtuple
+from collections.abc import Sequence
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
+
+
+SampleError = namedtuple('SampleError', ('time', 'error'))
+SampleError.__doc__ = """Failed sample.
+
+time is the time.monotonic() time of the failure and error the exception.
+"""
+
+
+class RingBuffer:
+
+    def __init__(self, dtype, capacity):
+        """Fixed-size ring buffer of records.
+
+        Args:
+            dtype (numpy.dtype): record data type
+            capacity (int): number of records
+        """
+        import numpy as np
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._index = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def capacity(self):
+        """Number of records the buffer holds.
+
+        Returns:
+            int: capacity
+        """
+        return len(self._data)
+
+    def append(self, record):
+        """Append a record, overwriting the oldest one if the buffer is full.
+
+        Args:
+            record (tuple): record
+        """
+        self._data[self._index] = record
+        self._index = (self._index + 1) % len(self._data)
+        self._count = min(self._count + 1, len(self._data))
+
+    def array(self):
+        """Copy of the records, oldest first.
+
+        Returns:
+            numpy.ndarray: records
+        """
+        import numpy as np
+        if self._count < len(self._data):
+            return self._data[:self._count].copy()
+        return np.concatenate((self._data[self._index:], self._data[:self._index]))
+
+
+class Monitor:
+
+    def __init__(self, device, interval=1., capacity=3600, idle_gap=0.005,
+                 thresholds=None, callback=None, max_backoff=60.):
+        """Monitor device status in the background.
+
+        Args:
+            device (SynthHD / SynthNVPro): device
+            interval (float): sampling interval in seconds
+            capacity (int): number of samples kept
+            idle_gap (float): minimum idle time on the bus in seconds
+                before a query is sent
+            thresholds (dict): map of field name to (low, high) allowed
+                range, either bound may be None
+            callback (callable): called as callback(name, value, time)
+                when a value leaves its allowed range or a status bit
+                becomes False, and as callback('error', exception, time)
+                when a sample fails
+            max_backoff (float): maximum sampling interval in seconds
+                after repeated failures
+        """
+        self._device = device
+        self._interval = interval
+        self._idle_gap = idle_gap
+        self._thresholds = dict(thresholds or {})
+        self._callback = callback
+        self._max_backoff = max_backoff
+        # (field name, read_many() query)
+        self._queries = [('temperature', 'temperature')]
+        if isinstance(device, Sequence):
+            for index in range(len(device)):
+                self._queries.append(('lock_status_{}'.format(index), (index, 'pll_lock')))
+                self._queries.append(('calibrated_{}'.format(index), (index, 'calibrated')))
+            self._clear = False
+        else:
+            self._queries.append(('lock_status', 'pll_lock'))
+            self._queries.append(('calibrated', 'calibrated'))
+            self._queries.append(('detect_power', 'detect_power'))
+            # see SynthNVPro.measure_power()
+            self._clear = True
+        unknown = set(self._thresholds) - set(self.fields)
+        if unknown:
+            raise ValueError('Unknown fields {}.'.format(sorted(unknown)))
+        dtype = [('time', 'f8')] + [
+            (name, '?' if name.startswith(('lock_status', 'calibrated')) else 'f8')
+            for name, _ in self._queries]
+        self._buffer = RingBuffer(dtype, capacity)
+        self._alarms = set()
+        self._errors = deque(maxlen=100)
+        self._errors_lock = Lock()
+        self._failures = 0
+        self._stop = Event()
+        self._thread = None
+
+    @property
+    def fields(self):
+        """Names of the monitored fields.
+
+        Returns:
+            tuple: tuple of str of names
+        """
+        return tuple(name for name, _ in self._queries)
+
+    def errors(self, clear=False):
+        """Recent failed samples, at most the last 100.
+
+        Args:
+            clear (bool): forget the reported errors
+
+        Returns:
+            list: list of SampleError
+        """
+        with self._errors_lock:
+            errors = list(self._errors)
+            if clear:
+                self._errors.clear()
+        return errors
+
+    def samples(self):
+        """Recorded samples, oldest first.
+
+        Returns:
+            numpy.ndarray: structured array with a 'time' field
+                (time.monotonic()) and one field per monitored value
+        """
+        return self._buffer.array()
+
+    def start(self):
+        """Start monitoring in a background thread."""
+        if self._thread is not None:
+            raise RuntimeError('Monitor has already been started.')
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop monitoring."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def run(self):
+        """Monitor in an asyncio task until stop() is called or cancelled.
+
+        Queries run in the default executor.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        self._stop.clear()
+        while not self._stop.is_set():
+            start = monotonic()
+            await loop.run_in_executor(None, self._try_sample)
+            await asyncio.sleep(max(0., start + self._next_interval() - monotonic()))
+
+    def sample(self):
+        """Take one sample of all monitored fields."""
+        time = monotonic()
+        values = self._idle_query()
+        for (name, _), value in zip(self._queries, values):
+            self._check(name, value, time)
+        self._buffer.append((time,) + tuple(values))
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = monotonic()
+            self._try_sample()
+            self._stop.wait(max(0., start + self._next_interval() - monotonic()))
+
+    def _try_sample(self):
+        """Take one sample, recording and reporting a failure."""
+        try:
+            self.sample()
+        except (OSError, TimeoutError, ValueError, RuntimeError) as exc:
+            # OSError includes serial.SerialException
+            time = monotonic()
+            self._failures += 1
+            with self._errors_lock:
+                self._errors.append(SampleError(time, exc))
+            if self._callback is not None:
+                self._callback('error', exc, time)
+        else:
+            self._failures = 0
+
+    def _next_interval(self):
+        """Sampling interval, doubled for each consecutive failure."""
+        if not self._failures:
+            return self._interval
+        return min(self._interval * 2 ** min(self._failures, 30), self._max_backoff)
+
+    def _idle_query(self):
+        """Read all monitored fields in an idle gap on the bus.
+
+        Waits for the bus to be idle for idle_gap, but at most one sampling
+        interval, after which the queries are sent regardless.
+
+        Returns:
+            list: values in the order of the fields
+        """
+        device = self._device
+        deadline = monotonic() + self._interval
+        while monotonic() < deadline:
+            idle = device.idle_time
+            if idle >= self._idle_gap and device._lock.acquire(blocking=False):
+                try:
+                    return self._read()
+                finally:
+                    device._lock.release()
+            sleep(max(self._idle_gap - idle, self._idle_gap / 4))
+        with device._lock:
+            return self._read()
+
+    def _read(self):
+        values = self._device.read_many(query for _, query in self._queries)
+        if self._clear:
+            self._device.dev_clear()
+        return values
+
+    def _check(self, name, value, time):
+        if isinstance(value, bool):
+            alarm = not value
+        else:
+            low, high = self._thresholds.get(name, (None, None))
+            alarm = (low is not None and value < low) or (high is not None and value > high)
+        if not alarm:
+            self._alarms.discard(name)
+        elif name not in self._alarms:
+            self._alarms.add(name)
+            if self._callback is not None:
+                self._callback(name, value, time)
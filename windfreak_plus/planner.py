@@ -0,0 +1,271 @@
+"""PLL-settling-aware ordering of frequency plans.
+
+When the order in which frequencies are visited does not matter, visiting
+them in an order with short jumps and few output divider changes reduces the
+total PLL settling time. FrequencyPlanner models the settling time of a jump
+from the VCO band / output divider of both frequencies and, where available,
+from lock times measured with wait_locked() (see settling.LockTimeStatistics).
+
+Example:
+
+    plan = plan_frequencies(synth[0], frequencies)
+    for frequency in plan:
+        synth[0].frequency = frequency
+        synth[0].wait_locked()
+        ...
+    print('saved', plan.saved_time, 's')
+"""
+
+from math import ceil, log2
+from .capabilities import CAPABILITIES
+
+
+# Approximate fundamental VCO range in Hz per model. Lower frequencies are
+# generated by a power-of-two output divider, higher ones by a multiplier.
+VCO_RANGES = {model: (caps.vco.start, caps.vco.stop) for model, caps in CAPABILITIES.items()}
+
+# Upper bound on the number of frequencies for the 2-opt improvement pass
+MAX_2OPT = 300
+
+
+class FrequencyPlan:
+
+    def __init__(self, frequencies, estimated_time, unordered_time):
+        self._frequencies = tuple(frequencies)
+        self._estimated_time = estimated_time
+        self._unordered_time = unordered_time
+
+    def __iter__(self):
+        return iter(self._frequencies)
+
+    def __len__(self):
+        return len(self._frequencies)
+
+    def __repr__(self):
+        return 'FrequencyPlan({} frequencies, estimated_time={:.6f}, saved_time={:.6f})'.format(
+               len(self), self._estimated_time, self.saved_time)
+
+    @property
+    def frequencies(self):
+        """Frequencies in visiting order.
+
+        Returns:
+            tuple: tuple of float of frequencies in Hz
+        """
+        return self._frequencies
+
+    @property
+    def estimated_time(self):
+        """Estimated total settling time of the plan.
+
+        Returns:
+            float: time in seconds
+        """
+        return self._estimated_time
+
+    @property
+    def unordered_time(self):
+        """Estimated total settling time in the original order.
+
+        Returns:
+            float: time in seconds
+        """
+        return self._unordered_time
+
+    @property
+    def saved_time(self):
+        """Estimated settling time saved by the plan.
+
+        Returns:
+            float: time in seconds
+        """
+        return self._unordered_time - self._estimated_time
+
+
+class FrequencyPlanner:
+
+    def __init__(self, model, statistics=None, default_lock_time=1.e-3,
+                 divider_penalty=2.):
+        """Plan frequency visiting orders for a model.
+
+        Args:
+            model (str): device model, a key of VCO_RANGES
+            statistics (LockTimeStatistics): measured lock times or None
+            default_lock_time (float): lock time in seconds of a full-span
+                VCO jump in bands without measurements
+            divider_penalty (float): factor applied to the lock time of
+                jumps that change the output divider / multiplier
+        """
+        if model not in VCO_RANGES:
+            raise ValueError('Expected model in set {}.'.format(tuple(VCO_RANGES)))
+        self._vco_min, self._vco_max = VCO_RANGES[model]
+        self._frequency_range = CAPABILITIES[model].frequency
+        self._statistics = statistics
+        self._default_lock_time = default_lock_time
+        self._divider_penalty = divider_penalty
+
+    def divider(self, frequency):
+        """Output divider exponent of a frequency.
+
+        Args:
+            frequency (float): frequency in Hz
+
+        Returns:
+            int: k such that frequency * 2**k is in the VCO range; negative
+                for multiplied frequencies
+        """
+        if frequency >= self._vco_max:
+            return -ceil(log2(frequency / self._vco_max))
+        if frequency >= self._vco_min:
+            return 0
+        return ceil(log2(self._vco_min / frequency))
+
+    def lock_time(self, start, stop):
+        """Estimated settling time of a jump.
+
+        Args:
+            start (float): frequency in Hz before the jump or None if unknown
+            stop (float): frequency in Hz after the jump
+
+        Returns:
+            float: time in seconds
+        """
+        return self._jump_time(start, stop, self._base_time(stop))
+
+    def _base_time(self, frequency):
+        """Median measured lock time in the band of a frequency, or the default."""
+        base = None
+        if self._statistics is not None:
+            base = self._statistics.quantile(frequency, 0.5)
+        return self._default_lock_time if base is None else base
+
+    def _base_times(self, frequencies):
+        """Base lock times of frequencies, computing one median per band.
+
+        Returns:
+            dict: map of frequency to base lock time in seconds
+        """
+        bases = {}
+        medians = {}
+        for frequency in frequencies:
+            if frequency in bases:
+                continue
+            band = None if self._statistics is None else self._statistics.band(frequency)
+            if band not in medians:
+                medians[band] = self._base_time(frequency)
+            bases[frequency] = medians[band]
+        return bases
+
+    def _jump_time(self, start, stop, base):
+        if start is None:
+            return base
+        divider = self.divider(stop)
+        if self.divider(start) != divider:
+            return base * self._divider_penalty
+        span = self._vco_max - self._vco_min
+        jump = abs(start - stop) * 2. ** divider
+        return base * (0.5 + 0.5 * min(1., jump / span))
+
+    def total_time(self, frequencies, start=None):
+        """Estimated total settling time of visiting frequencies in order.
+
+        Args:
+            frequencies (iterable): frequencies in Hz
+            start (float): current frequency in Hz or None if unknown
+
+        Returns:
+            float: time in seconds
+        """
+        return self._total_time(frequencies, start, self.lock_time)
+
+    def _total_time(self, frequencies, start, lock_time):
+        total = 0.
+        previous = start
+        for frequency in frequencies:
+            total += lock_time(previous, frequency)
+            previous = frequency
+        return total
+
+    def plan(self, frequencies, start=None):
+        """Find a visiting order that minimizes the total settling time.
+
+        Frequencies are sorted, which groups them by output divider and
+        keeps jumps short, in the direction that starts closest to the
+        current frequency. Then the order is refined by 2-opt moves under the
+        settling time model. Measured lock times are looked up once per band
+        at the start.
+
+        Args:
+            frequencies (iterable / numpy.ndarray): frequencies in Hz
+            start (float): current frequency in Hz or None if unknown
+
+        Returns:
+            FrequencyPlan: plan
+
+        Raises:
+            ValueError: if a frequency is out of the model's range
+        """
+        if not hasattr(frequencies, 'tolist'):
+            frequencies = list(frequencies)
+        self._frequency_range.validate_array(frequencies, 'Hz')
+        if hasattr(frequencies, 'tolist'):
+            frequencies = frequencies.tolist()
+        bases = self._base_times(frequencies)
+
+        def lock_time(start, stop):
+            return self._jump_time(start, stop, bases[stop])
+
+        unordered_time = self._total_time(frequencies, start, lock_time)
+        candidates = (sorted(frequencies), sorted(frequencies, reverse=True))
+        order = min(candidates, key=lambda c: self._total_time(c, start, lock_time))
+        if len(order) <= MAX_2OPT:
+            order = self._two_opt(order, start, lock_time)
+        return FrequencyPlan(order, self._total_time(order, start, lock_time), unordered_time)
+
+    def _two_opt(self, order, start, lock_time):
+        for _ in range(len(order)):
+            # prefix sums of jump times in forward and reversed direction
+            forward = [0.]
+            backward = [0.]
+            for k in range(1, len(order)):
+                forward.append(forward[-1] + lock_time(order[k - 1], order[k]))
+                backward.append(backward[-1] + lock_time(order[k], order[k - 1]))
+            if not self._improve(order, start, forward, backward, lock_time):
+                break
+        return order
+
+    def _improve(self, order, start, forward, backward, lock_time):
+        """Apply the first improving 2-opt move (segment reversal)."""
+        for i in range(len(order) - 1):
+            before = order[i - 1] if i > 0 else start
+            for j in range(i + 1, len(order)):
+                current = lock_time(before, order[i]) + forward[j] - forward[i]
+                reversed_ = lock_time(before, order[j]) + backward[j] - backward[i]
+                if j + 1 < len(order):
+                    current += lock_time(order[j], order[j + 1])
+                    reversed_ += lock_time(order[i], order[j + 1])
+                if reversed_ < current - 1.e-12:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    return True
+        return False
+
+
+def plan_frequencies(target, frequencies, **kwargs):
+    """Plan a frequency visiting order for a SynthHD channel or SynthNVPro.
+
+    Uses the model and the measured lock time statistics of the target, and
+    its cached current frequency as starting point.
+
+    Args:
+        target (SynthHDChannel / SynthNVPro): channel or device
+        frequencies (iterable): frequencies in Hz
+        **kwargs: keyword arguments passed to FrequencyPlanner
+
+    Returns:
+        FrequencyPlan: plan
+    """
+    device = getattr(target, '_parent', target)
+    kwargs.setdefault('statistics', target.lock_time_statistics)
+    planner = FrequencyPlanner(device.model, **kwargs)
+    start = target.cached('frequency')
+    return planner.plan(frequencies, None if start is None else start * 1e6)
@@ -0,0 +1,226 @@
+"""Named configuration presets stored on disk.
+
+A preset is a JSON (.json) or TOML (.toml) file holding a complete device
+configuration, e.g.:
+
+    {
+        "model": "SynthHD v2",
+        "device": {"reference_mode": "internal 27mhz", "trigger_mode": "disabled"},
+        "channels": [
+            {"frequency": 1.0e9, "power": -10.0, "enable": true},
+            {"enable": false}
+        ]
+    }
+
+Settings are names of settable properties of the device (and, for SynthHD,
+of its channels) and are applied in file order. Presets are validated by the
+property setters and compiled into a single encoded request string when they
+are loaded, so applying a preset is a single write.
+"""
+
+import json
+import os
+from collections.abc import Sequence
+from .attributes import settable
+
+
+class Preset:
+
+    def __init__(self, name, model, settings, data, updates=()):
+        self._name = name
+        self._model = model
+        self._settings = settings
+        self._data = data.encode('utf-8')
+        self._updates = tuple(updates)
+
+    def __repr__(self):
+        return 'Preset({!r}, model={!r})'.format(self._name, self._model)
+
+    @property
+    def name(self):
+        """Preset name.
+
+        Returns:
+            str: name
+        """
+        return self._name
+
+    @property
+    def model(self):
+        """Model the preset was compiled for.
+
+        Returns:
+            str: model
+        """
+        return self._model
+
+    @property
+    def settings(self):
+        """Settings as loaded from disk.
+
+        Returns:
+            dict: settings
+        """
+        return self._settings
+
+    @property
+    def data(self):
+        """Pre-encoded requests.
+
+        Returns:
+            bytes: encoded requests
+        """
+        return self._data
+
+    @property
+    def updates(self):
+        """Shadow state updates caused by applying the preset.
+
+        Returns:
+            tuple: tuple of (key, value)
+        """
+        return self._updates
+
+
+class PresetStore:
+
+    EXTENSIONS = ('.json', '.toml')
+
+    def __init__(self, directory, device):
+        self._directory = directory
+        self._device = device
+        self._presets = {}
+        self.reload()
+
+    def __contains__(self, name):
+        return name in self._presets
+
+    def __getitem__(self, name):
+        return self._presets[name]
+
+    def __iter__(self):
+        return iter(self._presets)
+
+    def __len__(self):
+        return len(self._presets)
+
+    @property
+    def names(self):
+        """Names of loaded presets.
+
+        Returns:
+            tuple: tuple of str of names
+        """
+        return tuple(sorted(self._presets))
+
+    def reload(self):
+        """(Re)load, validate and compile all presets in the directory."""
+        presets = {}
+        for filename in sorted(os.listdir(self._directory)):
+            name, ext = os.path.splitext(filename)
+            if ext not in self.EXTENSIONS:
+                continue
+            if name in presets:
+                raise ValueError('Duplicate preset \'{}\'.'.format(name))
+            settings = _load_file(os.path.join(self._directory, filename))
+            presets[name] = self.compile(name, settings)
+        self._presets = presets
+
+    def compile(self, name, settings):
+        """Validate settings and compile them into a preset.
+
+        Args:
+            name (str): preset name
+            settings (dict): preset settings
+
+        Returns:
+            Preset: compiled preset
+        """
+        return compile_preset(self._device, name, settings)
+
+    def save(self, name, settings, overwrite=False):
+        """Validate settings and store them as a JSON preset.
+
+        Args:
+            name (str): preset name, a file name without path separators
+                or '..'
+            settings (dict): preset settings
+            overwrite (bool): replace an existing JSON preset of the name
+
+        Raises:
+            ValueError: if the name is invalid or already used, by a preset
+                in either format unless overwrite is True, and by a TOML
+                preset in any case
+        """
+        if not name or '..' in name or any(sep in name for sep in ('/', '\\', os.sep)):
+            raise ValueError('Invalid preset name \'{}\'.'.format(name))
+        for ext in self.EXTENSIONS:
+            if os.path.exists(os.path.join(self._directory, name + ext)) \
+                    and not (overwrite and ext == '.json'):
+                raise ValueError('Preset \'{}\' already exists as {}.'.format(name, name + ext))
+        preset = self.compile(name, settings)
+        path = os.path.join(self._directory, name + '.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(settings, f, indent=4)
+        self._presets[name] = preset
+
+    def apply(self, name):
+        """Apply a preset to the device in a single write.
+
+        Args:
+            name (str): preset name
+        """
+        preset = self._presets[name]
+        self._device.write_raw(preset.data, preset.updates)
+
+
+def compile_preset(device, name, settings):
+    """Validate settings and compile them into a preset for a device.
+
+    Args:
+        device (SynthHD / SynthNVPro): device
+        name (str): preset name
+        settings (dict): preset settings
+
+    Returns:
+        Preset: compiled preset
+    """
+    model = settings.get('model')
+    if model is not None and model != device.model:
+        raise ValueError('Preset \'{}\' is for model \'{}\', not \'{}\'.'.format(
+                         name, model, device.model))
+    unknown = set(settings) - {'model', 'device', 'channels'}
+    if unknown:
+        raise ValueError('Unknown keys {} in preset \'{}\'.'.format(
+                         sorted(unknown), name))
+    channels = settings.get('channels', [])
+    if channels:
+        if not isinstance(device, Sequence):
+            raise ValueError('Model \'{}\' has no channels.'.format(device.model))
+        if len(channels) > len(device):
+            raise ValueError('Expected at most {} channels.'.format(len(device)))
+    with device.capture() as requests:
+        _apply(device, settings.get('device', {}))
+        for index, channel_settings in enumerate(channels):
+            _apply(device[index], channel_settings)
+    return Preset(name, device.model, settings, ''.join(requests), requests.updates)
+
+
+def _load_file(path):
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _apply(target, settings):
+    for key, value in settings.items():
+        if not settable(type(target), key):
+            raise ValueError('\'{}\' is not a settable property of {}.'.format(
+                             key, type(target).__name__))
+        setattr(target, key, value)
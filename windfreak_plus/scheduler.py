@@ -0,0 +1,260 @@
+"""Priority scheduling of device commands.
+
+CommandScheduler puts a priority queue in front of a device. A worker thread
+runs the queued commands one at a time, highest priority first, so that
+safety commands (RF off, stop all) jump ahead of queued bulk traffic such as
+lookup table uploads. Bulk transfers should be submitted as one command per
+row: a command that is already on the wire cannot be interrupted, so the
+granularity of the commands bounds the latency of a safety command.
+
+Commands may carry a deadline. Within a priority level, commands with
+earlier deadlines run first, and commands without a deadline run last in
+submission order. Commands that complete after their deadline are reported
+by misses() and, if given, to the on_miss callback.
+
+Example:
+
+    scheduler = CommandScheduler(synth)
+    scheduler.start()
+    for row, power in enumerate(table):
+        scheduler.submit(synth.write, 'am_lookup_table', row, power,
+                         priority=BULK)
+    ...
+    scheduler.rf_off()  # runs after the row being written
+    scheduler.stop()
+"""
+
+import heapq
+from collections import namedtuple
+from collections.abc import Sequence
+from concurrent.futures import Future
+from itertools import count
+from threading import Condition, Thread
+from math import inf
+from time import monotonic
+
+
+SAFETY = 0
+CONTROL = 1
+NORMAL = 2
+BULK = 3
+
+# Properties disabled by stop_all(), if the model supports them
+STOP_ENABLES = ('sweep_enable', 'am_enable', 'pulse_mod_enable',
+                      'dual_pulse_mod_enable', 'fm_enable')
+
+DeadlineMiss = namedtuple('DeadlineMiss', ('name', 'priority', 'deadline', 'completed'))
+DeadlineMiss.__doc__ = """Command that completed after its deadline.
+
+deadline and completed are time.monotonic() timestamps.
+"""
+
+
+class CommandScheduler:
+
+    def __init__(self, device, on_miss=None):
+        """Priority queue of commands for a device.
+
+        Args:
+            device (SynthHD / SynthNVPro): device
+            on_miss (callable): called as on_miss(miss) with a DeadlineMiss
+                from the worker thread
+        """
+        self._device = device
+        self._on_miss = on_miss
+        self._queue = []
+        self._sequence = count()
+        self._condition = Condition()
+        self._misses = []
+        self._running = False
+        self._thread = None
+
+    @property
+    def device(self):
+        """Scheduled device.
+
+        Returns:
+            SynthHD / SynthNVPro: device
+        """
+        return self._device
+
+    @property
+    def pending(self):
+        """Number of queued commands.
+
+        Returns:
+            int: number of commands
+        """
+        with self._condition:
+            return len(self._queue)
+
+    def misses(self, clear=False):
+        """Commands that missed their deadline.
+
+        Args:
+            clear (bool): forget the reported misses
+
+        Returns:
+            list: list of DeadlineMiss
+        """
+        with self._condition:
+            misses = list(self._misses)
+            if clear:
+                self._misses.clear()
+        return misses
+
+    def start(self):
+        """Start the worker thread."""
+        if self._thread is not None:
+            raise RuntimeError('Scheduler has already been started.')
+        self._running = True
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, cancel=False):
+        """Stop the worker thread after the queued commands ran.
+
+        Args:
+            cancel (bool): cancel queued commands instead of running them
+        """
+        with self._condition:
+            if cancel:
+                self._cancel(lambda priority: True)
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, function, *args, priority=NORMAL, deadline=None, name=None, **kwargs):
+        """Queue a command.
+
+        Args:
+            function (callable): called as function(*args, **kwargs) by the
+                worker thread
+            *args: positional arguments
+            priority (int): SAFETY, CONTROL, NORMAL or BULK; lower values run
+                first, equal priorities by deadline, then in submission order
+            deadline (float): time in seconds from now by which the command
+                should have completed, or None
+            name (str): name of the command in deadline miss reports,
+                defaults to the function name
+            **kwargs: keyword arguments
+
+        Returns:
+            concurrent.futures.Future: result of the command
+        """
+        future = Future()
+        if name is None:
+            name = getattr(function, '__name__', repr(function))
+        if deadline is not None:
+            deadline = monotonic() + deadline
+        with self._condition:
+            heapq.heappush(self._queue, (priority, inf if deadline is None else deadline,
+                                         next(self._sequence), name, deadline,
+                                         function, args, kwargs, future))
+            self._condition.notify()
+        return future
+
+    def set(self, target, attribute, value, **kwargs):
+        """Queue setting a property, e.g. set(synth[0], 'frequency', 1.e9).
+
+        Args:
+            target: device or channel
+            attribute (str): property name
+            value: value
+            **kwargs: keyword arguments of submit()
+
+        Returns:
+            concurrent.futures.Future: completion of the command
+        """
+        kwargs.setdefault('name', attribute)
+        return self.submit(setattr, target, attribute, value, **kwargs)
+
+    def rf_off(self, cancel_pending=False):
+        """Disable RF output, PLL and PA of all channels in one write, ahead
+        of all other queued commands.
+
+        Args:
+            cancel_pending (bool): cancel all queued commands except safety
+                commands
+
+        Returns:
+            concurrent.futures.Future: completion of the command
+        """
+        if cancel_pending:
+            with self._condition:
+                self._cancel(lambda priority: priority > SAFETY)
+        return self.submit(self._rf_off, priority=SAFETY, name='rf_off')
+
+    def stop_all(self):
+        """Stop sweeps and modulations, then disable RF output, ahead of all
+        other queued commands. Queued commands are cancelled.
+
+        Returns:
+            concurrent.futures.Future: completion of the command
+        """
+        with self._condition:
+            self._cancel(lambda priority: priority > SAFETY)
+        return self.submit(self._stop_all, priority=SAFETY, name='stop_all')
+
+    def _targets(self):
+        device = self._device
+        return list(device) if isinstance(device, Sequence) else [device]
+
+    def _rf_off(self):
+        with self._device.capture() as requests:
+            for target in self._targets():
+                target.enable = False
+        self._device.write_raw(''.join(requests), requests.updates)
+
+    def _stop_all(self):
+        device = self._device
+        capabilities = device.capabilities
+        with device.capture() as requests:
+            for enable in STOP_ENABLES:
+                prop = getattr(type(device), enable, None)
+                if prop is None or (capabilities is not None and
+                                    not capabilities.supports(prop.attribute)):
+                    continue
+                setattr(device, enable, False)
+            for target in self._targets():
+                target.enable = False
+        device.write_raw(''.join(requests), requests.updates)
+
+    def _cancel(self, predicate):
+        """Cancel queued commands. Requires the condition lock."""
+        kept = []
+        for entry in self._queue:
+            if predicate(entry[0]):
+                entry[-1].cancel()
+            else:
+                kept.append(entry)
+        heapq.heapify(kept)
+        self._queue = kept
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                priority, _, _, name, deadline, function, args, kwargs, future = \
+                    heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(*args, **kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+            if deadline is not None:
+                completed = monotonic()
+                if completed > deadline:
+                    miss = DeadlineMiss(name, priority, deadline, completed)
+                    with self._condition:
+                        self._misses.append(miss)
+                    if self._on_miss is not None:
+                        self._on_miss(miss)
@@ -0,0 +1,214 @@
+"""Compilation of experiment sequences.
+
+A sequence is a list of steps: Set a property of the device or of a channel,
+Call a method without arguments, or Wait. compile_sequence() runs the
+property setters and methods once at compile time with writes captured, so
+that values are validated against the model's ranges and modes and encoded.
+Methods that read from or clear the device cannot be compiled. Writes that
+would not change the state (including channel selects) are removed. The
+result is a list of pre-encoded segments separated by waits, which run()
+sends with one write per segment.
+
+Example:
+
+    sequence = compile_sequence(synth, [
+        Set('frequency', 1.e9, channel=0),
+        Set('enable', True, channel=0),
+        Wait(0.01),
+        Set('frequency', 1.1e9, channel=0),
+    ])
+    print(sequence.estimated_time)
+    sequence.run()
+
+Steps can also be given as dicts, e.g. loaded from a JSON file:
+{'set': 'frequency', 'value': 1.e9, 'channel': 0}, {'call': 'save'} and
+{'wait': 0.01}.
+"""
+
+from collections import namedtuple
+from collections.abc import Sequence
+from .attributes import settable
+from .device import AUTONOMOUS
+
+
+Set = namedtuple('Set', ('attribute', 'value', 'channel'), defaults=(None,))
+Set.__doc__ = """Set a property of the device, or of a channel if channel is given."""
+
+Call = namedtuple('Call', ('method', 'channel'), defaults=(None,))
+Call.__doc__ = """Call a method without arguments, e.g. 'save'."""
+
+Wait = namedtuple('Wait', ('duration',))
+Wait.__doc__ = """Wait for duration seconds after the preceding writes were sent."""
+
+# Time to transmit one byte at 115200 baud 8N1. USB CDC devices are usually
+# faster, so time estimates are conservative.
+BYTE_TIME = 10. / 115200
+
+
+def parse_step(step):
+    """Convert a step dict to a step.
+
+    Args:
+        step (dict / Set / Call / Wait): step
+
+    Returns:
+        Set / Call / Wait: step
+    """
+    if isinstance(step, (Set, Call, Wait)):
+        return step
+    step = dict(step)
+    if 'wait' in step:
+        return Wait(float(step.pop('wait')))
+    if 'set' in step:
+        return Set(step.pop('set'), step.pop('value'), step.pop('channel', None))
+    if 'call' in step:
+        return Call(step.pop('call'), step.pop('channel', None))
+    raise ValueError('Expected step with key \'set\', \'call\' or \'wait\', got {}.'.format(step))
+
+
+class CompiledSequence:
+
+    def __init__(self, device, segments, waits, updates, byte_time):
+        self._device = device
+        self._segments = tuple(segments)
+        self._waits = tuple(waits)
+        self._updates = tuple(tuple(u) for u in updates)
+        self._byte_time = byte_time
+
+    def __len__(self):
+        return len(self._segments)
+
+    def __repr__(self):
+        return 'CompiledSequence({} segments, {} bytes, estimated_time={:.6f})'.format(
+               len(self), self.size, self.estimated_time)
+
+    @property
+    def segments(self):
+        """Encoded segments, each sent with one write.
+
+        Returns:
+            tuple: tuple of bytes
+        """
+        return self._segments
+
+    @property
+    def waits(self):
+        """Wait before each segment, after the preceding one was sent.
+
+        Returns:
+            tuple: tuple of float of durations in seconds
+        """
+        return self._waits
+
+    @property
+    def data(self):
+        """Complete byte stream, without waits.
+
+        Returns:
+            bytes: data
+        """
+        return b''.join(self._segments)
+
+    @property
+    def size(self):
+        """Number of bytes sent.
+
+        Returns:
+            int: size
+        """
+        return sum(len(segment) for segment in self._segments)
+
+    @property
+    def estimated_time(self):
+        """Estimated execution time: waits plus transmission time.
+
+        Returns:
+            float: time in seconds
+        """
+        return sum(self._waits) + self.size * self._byte_time
+
+    def run(self):
+        """Send the sequence.
+
+        The device lock is held for the whole run, since segments rely on the
+        channel selected by the preceding ones. Waits are kept relative to a
+        schedule from the start, so delays do not accumulate.
+
+        Returns:
+            list: list of float of send times of the segments in seconds
+                after the start
+        """
+        return self._device._run_segments(self._segments, self._waits, self._updates)
+
+
+def compile_sequence(device, steps, from_shadow=False, byte_time=BYTE_TIME):
+    """Compile a sequence of steps for a device.
+
+    Args:
+        device (SynthHD / SynthNVPro): device
+        steps (iterable): steps, see parse_step()
+        from_shadow (bool): assume the state in the device's shadow state at
+            compile time, so that writes of values that are already set are
+            removed too; only valid if nothing else writes to the device
+            before the sequence runs
+        byte_time (float): transmission time per byte in seconds
+
+    Returns:
+        CompiledSequence: compiled sequence
+    """
+    state = dict(device._shadow) if from_shadow else {}
+    segments, waits, updates = [], [], []
+    current, current_updates, wait = [], [], 0.
+    for number, step in enumerate(steps):
+        step = parse_step(step)
+        if isinstance(step, Wait):
+            if step.duration < 0:
+                raise ValueError('Step {}: expected wait duration >= 0.'.format(number))
+            if current:
+                segments.append(''.join(current).encode('utf-8'))
+                waits.append(wait)
+                updates.append(current_updates)
+                current, current_updates, wait = [], [], 0.
+            wait += step.duration
+            continue
+        target = device
+        if step.channel is not None:
+            if not isinstance(device, Sequence) or step.channel not in range(len(device)):
+                raise ValueError('Step {}: no channel {}.'.format(number, step.channel))
+            target = device[step.channel]
+        if isinstance(step, Set) and not settable(type(target), step.attribute):
+            raise ValueError('Step {}: no settable property \'{}\'.'.format(number, step.attribute))
+        try:
+            with device.capture() as requests:
+                if isinstance(step, Set):
+                    setattr(target, step.attribute, step.value)
+                else:
+                    getattr(target, step.method)()
+        except (TypeError, ValueError, AttributeError) as exc:
+            raise type(exc)('Step {}: {}'.format(number, exc)) from exc
+        except RuntimeError as exc:
+            # e.g. init() of SynthNVPro clears the device, which would happen
+            # now instead of when the sequence runs
+            name = step.attribute if isinstance(step, Set) else step.method
+            raise ValueError('Step {}: \'{}\' cannot be compiled: {}'.format(
+                             number, name, exc)) from exc
+        for request, effect in zip(requests, requests.effects):
+            if effect is None:
+                state.clear()
+            elif effect:
+                key, value = effect
+                if key in state and state[key] == value:
+                    continue
+                # the device may change its own state after these, and may
+                # have done so before they are known to be disabled
+                if key[1] in AUTONOMOUS and (value or state.get(key, True)):
+                    state.clear()
+                if not (key[1] in AUTONOMOUS and value):
+                    state[key] = value
+                current_updates.append(effect)
+            current.append(request)
+    if current or wait:
+        segments.append(''.join(current).encode('utf-8'))
+        waits.append(wait)
+        updates.append(current_updates)
+    return CompiledSequence(device, segments, waits, updates, byte_time)
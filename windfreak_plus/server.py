@@ -0,0 +1,475 @@
+"""Local multi-client device server.
+
+A serial port can only be opened by one process. DeviceServer owns one or more
+devices and exposes their API attributes to many local clients over a Unix
+socket or a localhost TCP socket. Requests of all clients are multiplexed onto
+each device under the device lock. Operations of several requests, like
+reading a configuration, init(fast=True) and running a compiled sequence, are
+sent as one request and run on the server under the device lock, so that
+requests of other clients cannot interleave with them. Reads of the same
+attribute that arrive close together are merged into one device query, and
+reads of values in the shadow state are answered without device access.
+
+RemoteSynthHD and RemoteSynthNVPro are clients that behave like SynthHD and
+SynthNVPro. The protocol is newline delimited JSON, one request and one reply
+per line:
+
+    {"device": "hd", "op": "write", "channel": 0, "attribute": "frequency", "args": [1000.0]}
+    {"value": null}
+
+Run a server with e.g.:
+
+    python -m windfreak_plus.server --unix /tmp/windfreak.sock hd=/dev/ttyACM0 nv=/dev/ttyACM1
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+from threading import Event, Lock, Thread
+from time import monotonic
+from .device import SerialDevice
+from .identity import IDENTITY_ATTRIBUTES
+from .modulation import FMConfig, PulseConfig
+from .sweep import DifferentialSweep
+from .synth_hd import SynthHD
+from .synth_nv_pro import SynthNVPro
+
+
+_ERRORS = {error.__name__: error for error in (
+    ValueError, TypeError, KeyError, RuntimeError, TimeoutError, NotImplementedError)}
+
+_CONFIGS = {config.__name__: config for config in (PulseConfig, FMConfig, DifferentialSweep)}
+
+
+class _PendingRead:
+
+    def __init__(self):
+        self.done = Event()
+        self.time = None
+        self.value = None
+        self.error = None
+
+
+class _ReadCoalescer:
+    """Merges concurrent and closely spaced reads of the same key."""
+
+    def __init__(self, window):
+        self._window = window
+        self._lock = Lock()
+        self._reads = {}
+
+    def read(self, key, function):
+        with self._lock:
+            pending = self._reads.get(key)
+            if pending is not None and (not pending.done.is_set()
+                                        or monotonic() - pending.time <= self._window):
+                leader = False
+            else:
+                pending = self._reads[key] = _PendingRead()
+                leader = True
+        if leader:
+            try:
+                pending.value = function()
+            except Exception as error:
+                pending.error = error
+            pending.time = monotonic()
+            pending.done.set()
+        else:
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.value
+
+    def forget(self, name):
+        """Forget merged reads of a device, e.g. after it was written to."""
+        with self._lock:
+            for key in [key for key in self._reads if key[0] == name]:
+                del self._reads[key]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            reply = self.server.device_server.reply(line)
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+class DeviceServer:
+
+    def __init__(self, devices, address=('127.0.0.1', 0), coalesce_window=0.01,
+                 use_shadow=True):
+        """Serve devices to local clients.
+
+        Args:
+            devices (dict): map of name to SynthHD / SynthNVPro device
+            address (str / tuple): Unix socket path or (host, port) for TCP
+            coalesce_window (float): reads of the same attribute completing
+                within this time in seconds are answered by one query
+            use_shadow (bool): answer reads from the shadow state if possible
+        """
+        self._devices = dict(devices)
+        self._coalescer = _ReadCoalescer(coalesce_window)
+        self._use_shadow = use_shadow
+        self._identities = {}
+        self._identity_lock = Lock()
+        self._thread = None
+        if isinstance(address, str):
+            if _UnixServer is None:
+                raise RuntimeError('Unix sockets are not supported on this platform.')
+            self._server = _UnixServer(address, _RequestHandler)
+        else:
+            self._server = _TCPServer(address, _RequestHandler)
+        self._server.device_server = self
+
+    @property
+    def address(self):
+        """Address the server is listening on.
+
+        Returns:
+            str / tuple: Unix socket path or (host, port)
+        """
+        return self._server.server_address
+
+    @property
+    def devices(self):
+        """Served devices.
+
+        Returns:
+            dict: map of name to device
+        """
+        return dict(self._devices)
+
+    def serve_forever(self):
+        """Serve clients until shutdown() is called."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve clients in a background thread."""
+        if self._thread is not None:
+            raise RuntimeError('Server has already been started.')
+        self._thread = Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """Stop serving and close the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def reply(self, line):
+        """Handle one encoded request.
+
+        Args:
+            line (bytes): JSON encoded request
+
+        Returns:
+            dict: reply
+        """
+        try:
+            return {'value': self._handle(json.loads(line.decode('utf-8')))}
+        except Exception as error:
+            return {'error': type(error).__name__, 'message': str(error)}
+
+    def _handle(self, request):
+        op = request['op']
+        if op == 'devices':
+            return {name: type(device).__name__ for name, device in self._devices.items()}
+        name = request['device']
+        device = self._devices[name]
+        scope = request.get('channel')
+        attribute = request.get('attribute')
+        args = tuple(request.get('args', ()))
+        if op == 'read':
+            if scope is None and attribute in IDENTITY_ATTRIBUTES:
+                # identity does not change while the port is open
+                key = (name, attribute)
+                with self._identity_lock:
+                    if key not in self._identities:
+                        self._identities[key] = device._read_identity(attribute)
+                    return self._identities[key]
+            if self._use_shadow:
+                value = device._cached(scope, attribute, args)
+                if value is not None:
+                    return value
+            return self._coalescer.read((name, scope, attribute) + args,
+                                        lambda: _read(device, scope, attribute, args))
+        elif op == 'write':
+            self._coalescer.forget(name)
+            if scope is None:
+                device.write(attribute, *args)
+            else:
+                device._channel_write(scope, attribute, *args)
+        elif op == 'write_raw':
+            self._coalescer.forget(name)
+            device.write_raw(request['data'],
+                             [(tuple(key), value) for key, value in request.get('updates', ())])
+        elif op == 'read_config':
+            return device._read_config(_CONFIGS[request['config']])
+        elif op == 'write_targets':
+            self._coalescer.forget(name)
+            device._write_targets({tuple(key): value for key, value in request['targets']})
+        elif op == 'run_sequence':
+            self._coalescer.forget(name)
+            return device._run_segments(
+                [segment.encode('utf-8') for segment in request['segments']],
+                request['waits'],
+                [[(tuple(key), value) for key, value in updates]
+                 for updates in request['updates']])
+        elif op == 'cached':
+            return device._cached(scope, attribute, args)
+        elif op == 'dev_clear':
+            device.dev_clear()
+        else:
+            raise ValueError('Unknown operation \'{}\'.'.format(op))
+        return None
+
+
+def _read(device, scope, attribute, args):
+    if scope is None:
+        return device.read(attribute, *args)
+    return device._channel_read(scope, attribute, *args)
+
+
+class RemoteDevice(SerialDevice):
+    """Client side of DeviceServer. Combine with a device class.
+
+    The shadow state of a remote device mirrors the values this client wrote
+    and read, so cached() does not access the server. Changes made by other
+    clients are seen only once this client reads the values.
+    """
+
+    def __init__(self, address, name, **kwargs):
+        """Connect to a device served by a DeviceServer.
+
+        Args:
+            address (str / tuple): Unix socket path or (host, port) for TCP
+            name (str): name of the device on the server
+            **kwargs: keyword arguments passed to the device class
+        """
+        self._name = name
+        self._sock = None
+        super().__init__(address, **kwargs)
+
+    def open(self):
+        if self._dev is not None:
+            raise RuntimeError('Device has already been opened.')
+        self._shadow.clear()
+        if isinstance(self._devpath, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self._timeout)
+            self._sock.connect(self._devpath)
+        else:
+            self._sock = socket.create_connection(self._devpath, timeout=self._timeout)
+        self._dev = self._sock.makefile('rwb')
+
+    def close(self):
+        if self._dev is not None:
+            with self._lock:
+                self._dev.close()
+                self._sock.close()
+                self._dev = None
+                self._sock = None
+
+    def _call(self, op, scope=None, attribute=None, args=(), **kwargs):
+        """Send a request to the server and wait for the reply.
+
+        Returns:
+            The reply value.
+        """
+        request = dict(kwargs, device=self._name, op=op, channel=scope,
+                       attribute=attribute, args=list(args))
+        with self._lock:
+            self._dev.write(json.dumps(request).encode('utf-8') + b'\n')
+            self._dev.flush()
+            line = self._dev.readline()
+        if not line.endswith(b'\n'):
+            raise TimeoutError('Expected newline terminator.')
+        reply = json.loads(line.decode('utf-8'))
+        if 'error' in reply:
+            raise _ERRORS.get(reply['error'], RuntimeError)(reply['message'])
+        return reply['value']
+
+    def _mirror(self, scope, attribute, args):
+        """Record a written value in the mirrored shadow state."""
+        if self.API[attribute][2] is not None and args:
+            with self._lock:
+                self._record((scope, attribute) + tuple(args[:-1]),
+                             self._convert(attribute, args)[-1])
+
+    def _mirror_updates(self, updates):
+        """Record shadow state updates in the mirrored shadow state."""
+        with self._lock:
+            for key, value in updates:
+                self._record(tuple(key), value)
+
+    def _remote_read(self, scope, attribute, args):
+        _, _, args, shadowed = self._prepare_query(attribute, args)
+        value = self._call('read', scope, attribute, args)
+        if shadowed:
+            self._mirror_updates([((scope, attribute) + args, value)])
+        return value
+
+    def _write_attribute(self, scope, attribute, args):
+        if self._capture is not None:
+            return super()._write_attribute(scope, attribute, args)
+        self._call('write', scope, attribute, args)
+        self._mirror(scope, attribute, args)
+
+    def _read_attribute(self, scope, attribute, args):
+        return self._remote_read(scope, attribute, args)
+
+    def _read_many(self, items):
+        return [self._read_attribute(scope, attribute, args) for scope, attribute, args in items]
+
+    def _channel_write(self, index, attribute, *args):
+        if self._capture is not None:
+            return super()._channel_write(index, attribute, *args)
+        self._call('write', index, attribute, args)
+        self._mirror(None, 'channel', (index,))
+        self._mirror(index, attribute, args)
+
+    def _channel_read(self, index, attribute, *args):
+        return self._remote_read(index, attribute, args)
+
+    def write_raw(self, data, updates=()):
+        if self._capture is not None:
+            return super().write_raw(data, updates)
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        updates = list(updates)
+        self._call('write_raw', data=data,
+                   updates=[[list(key), value] for key, value in updates])
+        self._mirror_updates(updates)
+
+    def _write_targets(self, targets):
+        self._call('write_targets', targets=[[list(key), value] for key, value in targets.items()])
+        self._mirror_updates(targets.items())
+
+    def _read_config(self, config):
+        return self._call('read_config', config=config.__name__)
+
+    def _run_segments(self, segments, waits, updates):
+        request = dict(segments=[segment.decode('utf-8') for segment in segments],
+                       waits=list(waits),
+                       updates=[[[list(key), value] for key, value in segment_updates]
+                                for segment_updates in updates])
+        with self._lock:
+            # the server replies once the whole sequence has been sent
+            if self._timeout is not None:
+                self._sock.settimeout(self._timeout + sum(waits))
+            try:
+                times = self._call('run_sequence', **request)
+            finally:
+                if self._timeout is not None:
+                    self._sock.settimeout(self._timeout)
+        for segment_updates in updates:
+            self._mirror_updates(segment_updates)
+        return times
+
+    def dev_clear(self):
+        self._call('dev_clear')
+
+    def _write(self, data):
+        if self._capture is None:
+            raise RuntimeError('Raw writes are not supported by remote devices.')
+        super()._write(data)
+
+    def _query(self, data):
+        raise RuntimeError('Raw queries are not supported by remote devices.')
+
+
+class RemoteSynthHD(RemoteDevice, SynthHD):
+    pass
+
+
+class RemoteSynthNVPro(RemoteDevice, SynthNVPro):
+    pass
+
+
+REMOTE_CLASSES = {
+    'SynthHD': RemoteSynthHD,
+    'SynthNVPro': RemoteSynthNVPro,
+}
+
+
+def connect(address, name, **kwargs):
+    """Connect to a device served by a DeviceServer.
+
+    Args:
+        address (str / tuple): Unix socket path or (host, port) for TCP
+        name (str): name of the device on the server
+        **kwargs: keyword arguments passed to the device class
+
+    Returns:
+        RemoteSynthHD / RemoteSynthNVPro: device
+    """
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+    else:
+        sock = socket.create_connection(address)
+    with sock, sock.makefile('rwb') as f:
+        f.write(json.dumps({'op': 'devices'}).encode('utf-8') + b'\n')
+        f.flush()
+        reply = json.loads(f.readline().decode('utf-8'))
+    devices = reply['value']
+    if name not in devices:
+        raise KeyError('No device \'{}\' on server.'.format(name))
+    return REMOTE_CLASSES[devices[name]](address, name, **kwargs)
+
+
+def main(argv=None):
+    from .discovery import probe
+
+    parser = argparse.ArgumentParser(description='Serve Windfreak devices to local clients.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--unix', help='Unix socket path')
+    group.add_argument('--tcp', default='127.0.0.1:5025', help='localhost TCP address HOST:PORT')
+    parser.add_argument('--coalesce-window', type=float, default=0.01,
+                        help='merge reads completing within this time in seconds')
+    parser.add_argument('devices', nargs='+', metavar='NAME=DEVPATH')
+    args = parser.parse_args(argv)
+
+    devices = {}
+    for spec in args.devices:
+        name, _, devpath = spec.partition('=')
+        descriptor = probe(devpath)
+        if descriptor is None:
+            parser.error('No supported device at \'{}\'.'.format(devpath))
+        devices[name] = descriptor.open()
+    if args.unix is not None:
+        address = args.unix
+    else:
+        host, _, port = args.tcp.rpartition(':')
+        address = (host, int(port))
+    server = DeviceServer(devices, address, coalesce_window=args.coalesce_window)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
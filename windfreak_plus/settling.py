@@ -0,0 +1,164 @@
+"""PLL lock time statistics.
+
+LockTimeStatistics collects measured times from a frequency change to PLL
+lock, per frequency band, and estimates dwell times from them, so that
+schedulers can wait for lock only as long as the hardware actually needs
+instead of a fixed worst case.
+"""
+
+from collections import deque
+from time import perf_counter, sleep
+
+
+class LockTimeStatistics:
+
+    def __init__(self, band_width=100.e6, max_samples=256):
+        """Lock time statistics per frequency band.
+
+        Args:
+            band_width (float): width of the frequency bands in Hz
+            max_samples (int): number of most recent samples kept per band
+        """
+        self._band_width = band_width
+        self._max_samples = max_samples
+        self._samples = {}
+
+    @property
+    def band_width(self):
+        """Width of the frequency bands in Hz.
+
+        Returns:
+            float: band width
+        """
+        return self._band_width
+
+    def band(self, frequency):
+        """Band index of a frequency.
+
+        Args:
+            frequency (float): frequency in Hz
+
+        Returns:
+            int: band index
+        """
+        return int(frequency // self._band_width)
+
+    def record(self, frequency, lock_time):
+        """Record a measured lock time.
+
+        Args:
+            frequency (float): frequency in Hz
+            lock_time (float): time to lock in seconds
+        """
+        band = self.band(frequency)
+        samples = self._samples.get(band)
+        if samples is None:
+            samples = self._samples[band] = deque(maxlen=self._max_samples)
+        samples.append(lock_time)
+
+    def samples(self, frequency):
+        """Recorded lock times in the band of a frequency.
+
+        Args:
+            frequency (float): frequency in Hz
+
+        Returns:
+            tuple: tuple of float of lock times in seconds
+        """
+        return tuple(self._samples.get(self.band(frequency), ()))
+
+    def quantile(self, frequency, q=0.5):
+        """Quantile of the lock times in the band of a frequency.
+
+        Args:
+            frequency (float): frequency in Hz
+            q (float): quantile in [0, 1]
+
+        Returns:
+            float: lock time in seconds or None if no samples
+        """
+        samples = sorted(self._samples.get(self.band(frequency), ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def dwell_time(self, frequency, q=0.99, margin=1.2, default=1.):
+        """Estimated time to wait for lock after changing to a frequency.
+
+        Args:
+            frequency (float): frequency in Hz
+            q (float): quantile of the measured lock times to cover
+            margin (float): factor applied to the quantile
+            default (float): dwell time in seconds if there are no samples
+
+        Returns:
+            float: dwell time in seconds
+        """
+        lock_time = self.quantile(frequency, q)
+        return default if lock_time is None else lock_time * margin
+
+    def summary(self):
+        """Statistics of all bands.
+
+        Returns:
+            dict: map of band start frequency in Hz to dict with count,
+                mean, median and max lock time in seconds
+        """
+        summary = {}
+        for band, samples in sorted(self._samples.items()):
+            ordered = sorted(samples)
+            summary[band * self._band_width] = {
+                'count': len(ordered),
+                'mean': sum(ordered) / len(ordered),
+                'median': ordered[len(ordered) // 2],
+                'max': ordered[-1],
+            }
+        return summary
+
+
+def wait_locked(read_lock, start, frequency, statistics, timeout,
+                min_delay=0.5e-3, max_delay=20.e-3):
+    """Poll lock status with exponential backoff until locked.
+
+    If lock times were measured in the band before, the first poll is
+    delayed until just before the median lock time. The lock time is only
+    recorded if a poll saw the PLL unlocked, since otherwise it is merely
+    an upper bound set by the poll delay, which would drag the statistics
+    towards that delay.
+
+    Args:
+        read_lock (callable): returns the lock status
+        start (float): time.perf_counter() of the frequency change
+        frequency (float): frequency in Hz or None if unknown
+        statistics (LockTimeStatistics): statistics to use and update
+        timeout (float): timeout in seconds from the start
+        min_delay (float): initial poll delay in seconds
+        max_delay (float): maximum poll delay in seconds
+
+    Returns:
+        float: time to lock in seconds
+
+    Raises:
+        TimeoutError: if not locked within the timeout
+    """
+    deadline = start + timeout
+    if frequency is not None:
+        expected = statistics.quantile(frequency, 0.5)
+        if expected is not None:
+            delay = start + 0.8 * expected - perf_counter()
+            if delay > 0:
+                sleep(delay)
+    delay = min_delay
+    unlocked = False
+    while True:
+        if read_lock():
+            lock_time = perf_counter() - start
+            if frequency is not None and unlocked:
+                statistics.record(frequency, lock_time)
+            return lock_time
+        unlocked = True
+        now = perf_counter()
+        if now >= deadline:
+            raise TimeoutError('PLL did not lock within {} s.'.format(timeout))
+        sleep(min(delay, deadline - now))
+        delay = min(2 * delay, max_delay)
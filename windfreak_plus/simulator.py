@@ -0,0 +1,185 @@
+"""Simulated devices.
+
+Simulator is a transport (see transport.py) that answers requests like a
+device of a given model, so that device classes, tools and benchmarks can
+run without hardware:
+
+    synth = SynthHD('sim', transport=Simulator('SynthHD v2', latency=0.001))
+
+The request stream is parsed with the API table of the model's device
+class. Written values are stored, per channel for SynthHD channel
+attributes, and queries reply with the stored value formatted like the
+write request, or with a fixed nominal value for status attributes.
+Replies become readable after latency plus the transmission time of the
+preceding bytes, so that round trips and pipelining can be measured.
+"""
+
+import re
+from time import perf_counter, sleep
+from .capabilities import CAPABILITIES
+from .synth_hd import SynthHD
+from .synth_nv_pro import SynthNVPro
+
+
+# model: (device class, model type, hardware version, sub-version)
+MODELS = {
+    'SynthHD v1.4': (SynthHD, 'WFT SynthHD 1200', 'Hardware Version 1.4a', 'HD'),
+    'SynthHD v2': (SynthHD, 'WFT SynthHD 1234', 'Hardware Version 2.06', 'HD'),
+    'SynthHD PRO v2': (SynthHD, 'WFT SynthHD 1235', 'Hardware Version 2.06', 'HDPRO'),
+    'SynthNV PRO': (SynthNVPro, 'WFT SynthNVP 555', 'Hardware Version 1.0', ''),
+}
+
+# attributes kept per channel by SynthHD
+_CHANNEL_ATTRIBUTES = frozenset((
+    'frequency', 'power', 'calibrated', 'temp_comp_mode', 'vga_dac', 'phase_step',
+    'rf_enable', 'pa_power_on', 'pll_power_on', 'pll_lock', 'channel_spacing'))
+
+_NUMBER = r'([-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+))'
+
+
+def _pattern(fmt):
+    """Regular expression matching the requests of a format string."""
+    parts = re.split(r'\{[^}]*\}', fmt)
+    return re.compile(_NUMBER.join(re.escape(part) for part in parts).encode('utf-8'))
+
+
+class Simulator:
+
+    def __init__(self, model='SynthHD v2', latency=0., byte_time=0.):
+        """Transport factory of simulated devices.
+
+        Args:
+            model (str): model, one of MODELS
+            latency (float): time from a request to its reply in seconds
+            byte_time (float): transmission time per byte in seconds
+        """
+        if model not in MODELS:
+            raise ValueError('Expected model in set {}.'.format(tuple(MODELS)))
+        self.model = model
+        self.latency = latency
+        self.byte_time = byte_time
+        self.ports = []
+
+    def __call__(self, devpath, timeout):
+        port = SimulatedPort(self.model, self.latency, self.byte_time)
+        self.ports.append(port)
+        return port
+
+
+class SimulatedPort:
+
+    def __init__(self, model, latency=0., byte_time=0.):
+        """Simulated serial port with a device of a model attached.
+
+        Args:
+            model (str): model, one of MODELS
+            latency (float): time from a request to its reply in seconds
+            byte_time (float): transmission time per byte in seconds
+        """
+        device_class, model_type, hardware_version, sub_version = MODELS[model]
+        self._latency = latency
+        self._byte_time = byte_time
+        self._channels = issubclass(device_class, SynthHD)
+        self._selected = 0
+        self._state = {}
+        self._replies = []
+        capabilities = CAPABILITIES[model]
+        self._status = {
+            'model_type': model_type,
+            'serial_number': int(model_type.rsplit(' ', 1)[1]),
+            'fw_version': 'Firmware Version 3.22',
+            'hw_version': hardware_version,
+            'sub_version': sub_version,
+            'calibrated': True,
+            'pll_lock': True,
+            'temperature': 30.0,
+            'detect_power': -30.0,
+            'frequency': capabilities.frequency.start / 1.e6,
+            'power': capabilities.power.start,
+            'ref_frequency': 27.,
+            'reference_mode': 1,
+        }
+        self._api = device_class.API
+        self._patterns = {}
+        for attribute, (dtype, write, read) in self._api.items():
+            for fmt, is_read in ((write, False), (read, True)):
+                if fmt is not None:
+                    self._patterns.setdefault(fmt[0].encode('utf-8'), []).append(
+                        (_pattern(fmt), attribute, is_read))
+        self.requests = 0
+        self.writes = 0
+
+    def write(self, data):
+        now = perf_counter()
+        self.writes += 1
+        position = 0
+        while position < len(data):
+            match, attribute, is_read = self._match(data, position)
+            if match is None:
+                position += 1
+                continue
+            position = match.end()
+            self.requests += 1
+            args = tuple(group.decode('utf-8') for group in match.groups())
+            if is_read:
+                ready = now + self._latency + position * self._byte_time
+                self._replies.append((ready, self._reply(attribute, args)))
+            else:
+                self._store(attribute, args)
+        return len(data)
+
+    def _match(self, data, position):
+        best = (None, None, None)
+        for pattern, attribute, is_read in self._patterns.get(data[position:position + 1], ()):
+            match = pattern.match(data, position)
+            if match is not None and (best[0] is None or match.end() > best[0].end()):
+                best = (match, attribute, is_read)
+        return best
+
+    def _key(self, attribute, args):
+        if self._channels and attribute in _CHANNEL_ATTRIBUTES:
+            return (self._selected, attribute) + args
+        return (None, attribute) + args
+
+    def _store(self, attribute, args):
+        if attribute == 'channel' and self._channels:
+            self._selected = int(args[0])
+        elif args:
+            self._state[self._key(attribute, args[:-1])] = args[-1]
+
+    def _reply(self, attribute, args):
+        if attribute == 'channel':
+            return str(self._selected)
+        dtype, write, _ = self._api[attribute]
+        value = self._state.get(self._key(attribute, args))
+        if value is None:
+            value = self._status.get(attribute, 0)
+        if isinstance(dtype, tuple):
+            dtype = dtype[-1]
+        if dtype is str or write is None:
+            return str(int(value) if isinstance(value, bool) else value)
+        if dtype is bool or dtype is int:
+            return str(int(float(value)))
+        spec = re.findall(r'\{([^}]*)\}', write)[-1]
+        return ('{' + spec + '}').format(float(value))
+
+    def readline(self):
+        if not self._replies:
+            return b''
+        ready, reply = self._replies.pop(0)
+        delay = ready - perf_counter()
+        if delay > 0:
+            sleep(delay)
+        return (reply + '\n').encode('utf-8')
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self._replies.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,364 @@
+"""Sweeps of SynthHD.
+
+DifferentialSweep configures a differential hardware sweep: channel A
+sweeps linearly from start to stop, and channel B tracks it at a fixed
+frequency offset. Like the modulation configurations (see modulation.py),
+it is an immutable value object that is validated against the model's
+ranges, compiled once and applied in a single write:
+
+    sweep = DifferentialSweep(start=1.e9, stop=1.1e9, step=1.e6, dwell=0.01,
+                              offset=10.e6, power=-10.)
+    print(sweep.points, sweep.duration)
+    synth.differential_sweep = sweep
+    done = synth.sweep_single()  # time.perf_counter() at the end of the sweep
+
+Phase sweeps step the phase of a channel from the host. All steps are
+validated and encoded when the sweep is compiled, and sent at fixed
+intervals; with phases for the other channel, both are set in each step,
+e.g. for a relative-phase ramp:
+
+    ramp = numpy.mod(numpy.linspace(0., 720., 1001), 360.)
+    sweep = synth[0].phase_sweep(ramp, interval=1.e-3, other=numpy.zeros(1001))
+    times = sweep.run()
+"""
+
+from collections import namedtuple
+from math import floor
+from time import perf_counter, sleep
+from .capabilities import PHASE, SWEEP_POWER, SWEEP_TIME_STEP
+from .modulation import _Config, _check_bool
+
+
+SWEEP_DIRECTIONS = ('reverse', 'forward')
+
+# tracking of channel B, sent as their index; index 0 disables it
+DIFFERENTIAL_METHODS = ('off', 'minus', 'plus')
+
+
+def _check_number(name, value):
+    if isinstance(value, bool) or not isinstance(value, (float, int)):
+        raise TypeError('{}: expected float or int.'.format(name))
+
+
+class DifferentialSweep(_Config, namedtuple('DifferentialSweep', (
+        'start', 'stop', 'step', 'dwell', 'offset', 'method', 'power_low', 'power_high',
+        'direction', 'continuous'))):
+    """Differential sweep configuration.
+
+    start, stop and step are the sweep frequencies of channel A in Hz,
+    dwell is the time per step in seconds, and offset is the frequency of
+    channel B relative to channel A in Hz, subtracted ('minus') or added
+    ('plus') according to method. power_low and power_high are the powers
+    in dBm at the sweep start and stop, direction is one of
+    SWEEP_DIRECTIONS and continuous repeats the sweep. The sweep type is
+    set to linear, and channel A is selected before the sweep parameters
+    are written or read.
+    """
+
+    __slots__ = ()
+
+    ATTRIBUTES = ('sweep_freq_low', 'sweep_freq_high', 'sweep_freq_step', 'sweep_time_step',
+                  'sweep_diff_freq', 'sweep_diff_meth', 'sweep_power_low', 'sweep_power_high',
+                  'sweep_direction', 'sweep_cont')
+    ENABLES = ('continuous',)
+    FIXED = (('sweep_type', 0),)
+    CHANNEL = 0
+
+    def __new__(cls, start, stop, step, dwell, offset, method='plus', power=None,
+                power_low=None, power_high=None, direction='forward', continuous=False):
+        """Differential sweep configuration.
+
+        Args:
+            start (float): channel A start frequency in Hz
+            stop (float): channel A stop frequency in Hz
+            step (float): frequency step in Hz
+            dwell (float): time per step in seconds
+            offset (float): channel B offset in Hz
+            method (str): 'minus' or 'plus'
+            power (float): power in dBm, the default of power_low and
+                power_high, one of which is required
+            power_low (float): power at start in dBm
+            power_high (float): power at stop in dBm
+            direction (str): one of SWEEP_DIRECTIONS
+            continuous (bool): repeat the sweep
+        """
+        if power is not None:
+            power_low = power if power_low is None else power_low
+            power_high = power if power_high is None else power_high
+        for name, value in (('start', start), ('stop', stop), ('step', step),
+                            ('dwell', dwell), ('offset', offset),
+                            ('power_low', power_low), ('power_high', power_high)):
+            _check_number(name, value)
+        if not start <= stop:
+            raise ValueError('start: expected start <= stop.')
+        if not step > 0:
+            raise ValueError('step: expected step > 0.')
+        if not offset > 0:
+            raise ValueError('offset: expected offset > 0.')
+        try:
+            SWEEP_TIME_STEP.validate(dwell, 's')
+        except ValueError as exc:
+            raise ValueError('dwell: {}'.format(exc)) from None
+        if method not in DIFFERENTIAL_METHODS[1:]:
+            raise ValueError('method: expected str in set {}.'.format(DIFFERENTIAL_METHODS[1:]))
+        if direction not in SWEEP_DIRECTIONS:
+            raise ValueError('direction: expected str in set {}.'.format(SWEEP_DIRECTIONS))
+        _check_bool('continuous', continuous)
+        return super().__new__(cls, start, stop, step, dwell, offset, method, power_low,
+                               power_high, direction, continuous)
+
+    @property
+    def points(self):
+        """Number of frequencies of a sweep.
+
+        Returns:
+            int: points
+        """
+        return floor((self.stop - self.start) / self.step + 1.e-9) + 1
+
+    @property
+    def duration(self):
+        """Estimated duration of a single sweep.
+
+        Returns:
+            float: time in seconds
+        """
+        return self.points * self.dwell
+
+    @property
+    def tracking_range(self):
+        """Frequency range of channel B.
+
+        Returns:
+            tuple: (start, stop) in Hz
+        """
+        sign = -1 if self.method == 'minus' else 1
+        return (self.start + sign * self.offset, self.stop + sign * self.offset)
+
+    def validate(self, capabilities):
+        """Check the sweep powers, and that both channels stay within a model's ranges.
+
+        Args:
+            capabilities (Capabilities): capabilities or None if unknown
+
+        Raises:
+            ValueError: if a frequency or power is out of range
+        """
+        super().validate(capabilities)
+        for name, value in zip(('power_low', 'power_high'), (self.power_low, self.power_high)):
+            if value not in SWEEP_POWER:
+                raise ValueError('{}: {}'.format(name, _range_error(SWEEP_POWER, 'dBm')))
+        if capabilities is None:
+            return
+        for name, value in zip(('start', 'stop'), (self.start, self.stop)):
+            if value not in capabilities.frequency:
+                raise ValueError('{}: {}'.format(name, _range_error(capabilities.frequency, 'Hz')))
+        if not all(value in capabilities.frequency for value in self.tracking_range):
+            raise ValueError('offset: channel B range {} is out of range [{}, {}] Hz.'.format(
+                             self.tracking_range, capabilities.frequency.start,
+                             capabilities.frequency.stop))
+
+    def _to_api(self):
+        return (self.start / 1.e6, self.stop / 1.e6, self.step / 1.e6, self.dwell * 1.e3,
+                self.offset / 1.e6, DIFFERENTIAL_METHODS.index(self.method),
+                self.power_low, self.power_high, SWEEP_DIRECTIONS.index(self.direction),
+                self.continuous)
+
+    @classmethod
+    def _from_api(cls, values):
+        (start, stop, step, dwell, offset, method, power_low, power_high, direction,
+         continuous) = values
+        if method in range(len(DIFFERENTIAL_METHODS)):
+            method = DIFFERENTIAL_METHODS[method]
+        if direction in range(len(SWEEP_DIRECTIONS)):
+            direction = SWEEP_DIRECTIONS[direction]
+        return cls._make((start * 1.e6, stop * 1.e6, step * 1.e6, dwell * 1.e-3,
+                          offset * 1.e6, method, power_low, power_high, direction, continuous))
+
+
+def _range_error(bounds, unit):
+    return 'expected value in range [{}, {}] {}.'.format(bounds.start, bounds.stop, unit)
+
+
+def trigger_sweep(device):
+    """Run a single sweep.
+
+    The duration is estimated from the cached sweep parameters, which are
+    read in one pipelined read if unknown. The trigger is not shadowed,
+    since the device ends the sweep by itself, but the cached frequencies
+    and powers are forgotten.
+
+    Args:
+        device (SynthHD): device
+
+    Returns:
+        float: expected time.perf_counter() at the end of the sweep
+    """
+    attributes = ('sweep_freq_low', 'sweep_freq_high', 'sweep_freq_step', 'sweep_time_step')
+    with device._lock:
+        values = [device.cached(attribute) for attribute in attributes]
+        if None in values:
+            values = device.read_many(attributes)
+        low, high, step, dwell = values
+        points = floor(abs(high - low) / step + 1.e-9) + 1 if step > 0 else 1
+        device.write_raw(device.encode('sweep_single', True))
+        device._forget_targets()
+        return perf_counter() + points * dwell * 1.e-3
+
+
+# sleep() may oversleep by tens of microseconds, so the last part of each
+# wait until a step's deadline is spent polling the clock
+_SPIN_TIME = 5.e-4
+
+
+class PhaseSweep:
+
+    def __init__(self, device, steps, updates, interval):
+        """Pre-encoded phase sweep, see compile_phase_sweep().
+
+        Args:
+            device (SynthHD): device
+            steps (list): list of bytes of encoded steps
+            updates (list): shadow state updates of each step
+            interval (float): time between steps in seconds
+        """
+        self._device = device
+        self._steps = tuple(steps)
+        self._updates = tuple(tuple(u) for u in updates)
+        self._interval = interval
+
+    def __len__(self):
+        return len(self._steps)
+
+    def __repr__(self):
+        return 'PhaseSweep({} steps, {} bytes, interval={})'.format(
+               len(self), self.size, self._interval)
+
+    @property
+    def steps(self):
+        """Encoded steps.
+
+        Returns:
+            tuple: tuple of bytes
+        """
+        return self._steps
+
+    @property
+    def interval(self):
+        """Time between steps.
+
+        Returns:
+            float: interval in seconds
+        """
+        return self._interval
+
+    @property
+    def size(self):
+        """Number of bytes sent.
+
+        Returns:
+            int: size
+        """
+        return sum(len(step) for step in self._steps)
+
+    @property
+    def estimated_time(self):
+        """Estimated time from the first to the last step.
+
+        Returns:
+            float: time in seconds
+        """
+        return max(len(self._steps) - 1, 0) * self._interval
+
+    def run(self):
+        """Send the steps.
+
+        Each step is sent at its deadline, start + index * interval, so that
+        delays do not accumulate; a late step is sent immediately. With an
+        interval of 0, all steps are sent in a single write. The device lock
+        is held for the whole run.
+
+        Returns:
+            list: list of float of send times of the steps in seconds after
+                the start
+        """
+        device = self._device
+        if self._interval <= 0:
+            updates = [update for step in self._updates for update in step]
+            device.write_raw(b''.join(self._steps), updates)
+            return [0.] * len(self._steps)
+        times = []
+        with device._lock:
+            start = perf_counter()
+            for index, (step, updates) in enumerate(zip(self._steps, self._updates)):
+                due = start + index * self._interval
+                delay = due - perf_counter()
+                if delay > _SPIN_TIME:
+                    sleep(delay - _SPIN_TIME)
+                while perf_counter() < due:
+                    pass
+                times.append(perf_counter() - start)
+                device.write_raw(step, updates)
+        return times
+
+
+def compile_phase_sweep(device, channel, phases, interval=0., other=None):
+    """Pre-encode a phase sweep of a SynthHD channel.
+
+    Phases are validated as whole arrays against PHASE and rounded to its
+    resolution. With other, each step also sets the phase of the other
+    channel, for relative-phase ramps. Channels are visited in alternating
+    order, so that each step needs a single channel select.
+
+    Args:
+        device (SynthHD): device
+        channel (int): channel index
+        phases (iterable / numpy.ndarray): phases of the channel in degrees
+        interval (float): time between steps in seconds
+        other (iterable / numpy.ndarray): phases of the other channel in
+            degrees, or None
+
+    Returns:
+        PhaseSweep: compiled sweep
+    """
+    if channel not in range(len(device)):
+        raise ValueError('No channel {}.'.format(channel))
+    if interval < 0:
+        raise ValueError('Expected interval >= 0.')
+    phase_format = device.API['phase_step'][1]
+    select_format = device.API['channel'][1]
+    targets = [(channel, _phases('phases', phases))]
+    if other is not None:
+        targets.append((1 - channel, _phases('other', other)))
+        if len(targets[1][1]) != len(targets[0][1]):
+            raise ValueError('Expected as many phases for both channels.')
+    steps, updates = [], []
+    selected = None
+    for values in zip(*(phases for _, phases in targets)):
+        order = list(zip((index for index, _ in targets), values))
+        # start with the channel that is still selected
+        if order[-1][0] == selected:
+            order.reverse()
+        step, step_updates = [], []
+        for index, value in order:
+            if index != selected:
+                step.append(select_format.format(index))
+                step_updates.append(((None, 'channel'), index))
+                selected = index
+            step.append(phase_format.format(value))
+            step_updates.append(((index, 'phase_step'), value))
+        steps.append(''.join(step).encode('utf-8'))
+        updates.append(step_updates)
+    return PhaseSweep(device, steps, updates, interval)
+
+
+def _phases(name, values):
+    if not hasattr(values, 'tolist'):
+        values = list(values)
+    try:
+        PHASE.validate_array(values, 'degrees')
+    except ValueError as exc:
+        raise ValueError('{}: {}'.format(name, exc)) from None
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    return [PHASE.quantize(float(value)) for value in values]
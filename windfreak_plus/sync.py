@@ -0,0 +1,174 @@
+"""Synchronized updates of several devices.
+
+SyncGroup pre-stages settings on several devices: property setters are
+validated and encoded as usual, but held back. arm() starts one writer thread
+per device, which takes the device lock and waits on a barrier. release()
+opens the barrier so that all devices are written as close together in time
+as possible, and reports when each write completed and the resulting skew.
+
+Example:
+
+    group = SyncGroup()
+    with group.stage(synth_a):
+        synth_a[0].frequency = 1.e9
+        synth_a[0].phase = 0.
+    with group.stage(synth_b):
+        synth_b.frequency = 1.e9
+    report = group.release()
+    print(report.skew)
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+from threading import Barrier, BrokenBarrierError, Thread
+from time import perf_counter
+
+
+SyncReport = namedtuple('SyncReport', ('release_time', 'completion_times', 'skew'))
+SyncReport.__doc__ = """Timing of a synchronized release.
+
+release_time is the time.perf_counter() at which the barrier opened,
+completion_times maps each device to the completion time of its write in
+seconds after release_time, and skew is the spread of completion times.
+"""
+
+
+class SyncGroup:
+
+    def __init__(self, drain=True):
+        """Group of devices to update together.
+
+        Args:
+            drain (bool): wait until the written data has been transmitted
+                (Serial.flush()) before taking the completion time
+        """
+        self._drain = drain
+        self._staged = {}
+        self._threads = None
+        self._barrier = None
+        self._completions = {}
+        self._errors = {}
+
+    @property
+    def devices(self):
+        """Devices with staged settings.
+
+        Returns:
+            tuple: tuple of devices
+        """
+        return tuple(self._staged)
+
+    @contextmanager
+    def stage(self, device):
+        """Stage settings of a device.
+
+        Within the context, writes to the device (including its channels)
+        are captured. Staging the same device several times appends to its
+        staged settings.
+
+        Args:
+            device (SynthHD / SynthNVPro): device
+
+        Yields:
+            device
+        """
+        if self._threads is not None:
+            raise RuntimeError('Cannot stage while armed.')
+        with device.capture() as requests:
+            yield device
+        data, updates = self._staged.setdefault(device, ([], []))
+        data.extend(requests)
+        updates.extend(requests.updates)
+
+    def stage_trigger_mode(self, mode):
+        """Stage a trigger mode on all staged devices, e.g. to hand off the
+        next update to an external trigger.
+
+        Args:
+            mode (str): trigger mode, see trigger_modes of the devices
+        """
+        for device in self.devices:
+            with self.stage(device):
+                device.trigger_mode = mode
+
+    def arm(self):
+        """Start the writer threads. Each takes its device lock and waits.
+
+        Staged requests are encoded to bytes here, so that on release the
+        writer threads only write.
+        """
+        if self._threads is not None:
+            raise RuntimeError('Already armed.')
+        if not self._staged:
+            raise RuntimeError('Nothing staged.')
+        self._barrier = Barrier(len(self._staged) + 1)
+        self._completions = {}
+        self._errors = {}
+        self._threads = [
+            Thread(target=self._writer, args=(device, ''.join(data).encode('utf-8'),
+                                              tuple(updates)), daemon=True)
+            for device, (data, updates) in self._staged.items()
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def release(self, timeout=None):
+        """Release all staged writes at once. Arms first if necessary.
+
+        Args:
+            timeout (float): timeout in seconds for the writer threads to
+                be ready
+
+        Returns:
+            SyncReport: timing report
+
+        Raises:
+            TimeoutError: if the writer threads were not ready in time
+            RuntimeError: if a write failed, chained to its exception
+        """
+        if self._threads is None:
+            self.arm()
+        try:
+            self._barrier.wait(timeout)
+            release_time = perf_counter()
+        except BrokenBarrierError:
+            self.cancel()
+            raise TimeoutError('Writer threads were not ready within {} s.'.format(timeout))
+        for thread in self._threads:
+            thread.join()
+        self._threads = None
+        self._staged = {}
+        for device, exc in self._errors.items():
+            raise RuntimeError('Write to {} at {} failed: {}'.format(
+                               type(device).__name__, device._devpath, exc)) from exc
+        completion_times = {device: time - release_time
+                            for device, time in self._completions.items()}
+        if len(completion_times) != self._barrier.parties - 1:
+            raise RuntimeError('Not all devices were written.')
+        skew = max(completion_times.values()) - min(completion_times.values())
+        return SyncReport(release_time, completion_times, skew)
+
+    def cancel(self):
+        """Stop armed writer threads and drop all staged settings."""
+        if self._threads is not None:
+            self._barrier.abort()
+            for thread in self._threads:
+                thread.join()
+            self._threads = None
+        self._staged = {}
+
+    def _writer(self, device, data, updates):
+        with device._lock:
+            try:
+                self._barrier.wait()
+            except BrokenBarrierError:
+                return
+            try:
+                device.write_raw(data, updates)
+                if self._drain:
+                    device._dev.flush()
+            except Exception as exc:
+                # raised by release()
+                self._errors[device] = exc
+                return
+            self._completions[device] = perf_counter()
@@ -1,5 +1,24 @@
+from .attributes import Attr, BoolAttr, Choices, EnumAttr, NumberAttr
+from .capabilities import CAPABILITIES, PHASE, REFERENCE_FREQUENCY, range_dict
 from .device import SerialDevice
+from .modulation import FMConfig, PulseConfig, trigger_pulse
+from .settling import LockTimeStatistics, wait_locked
+from .sweep import DifferentialSweep, compile_phase_sweep, trigger_sweep
+from collections import namedtuple
 from collections.abc import Sequence
+from time import perf_counter
+
+
+ChannelUpdateReport = namedtuple('ChannelUpdateReport', (
+    'commands', 'selects', 'size', 'gap_commands', 'gap_bytes'))
+ChannelUpdateReport.__doc__ = """Result of SynthHD.set_channels().
+
+commands is the number of requests sent, selects the number of channel
+selects among them and size the number of bytes of the single write.
+gap_commands and gap_bytes count the requests and bytes sent after the
+first channel's frequency command up to and including the second channel's
+frequency command, or are None unless both frequencies were set.
+"""
 
 
 class SynthHDChannel:
@@ -7,135 +26,97 @@ class SynthHDChannel:
     def __init__(self, parent, index):
         self._parent = parent
         self._index = index
-        model = self._parent.model
-        if model == 'SynthHD v1.4':
-            self._f_range = {'start': 53.e6, 'stop': 13999.999999e6, 'step': 0.1}
-            self._p_range = {'start': -80., 'stop': 20., 'step': 0.01}
-            self._vga_range = {'start': 0, 'stop': 45000, 'step': 1}
-        else:
-            self._f_range = None
-            self._p_range = None
-            self._vga_range = None
+        self._lock_stats = LockTimeStatistics()
+
+    @property
+    def _capabilities(self):
+        return self._parent._capabilities
 
-    def init(self):
-        """Initialize device."""
+    def init(self, fast=False):
+        """Initialize device.
+
+        Args:
+            fast (bool): read the current state in one pipelined burst and
+                send only the writes that change it, in a single write
+        """
+        if fast:
+            self._parent._write_differences(self.init)
+            return
         self.enable = False
-        f_range = self.frequency_range
-        if f_range is not None:
-            self.frequency = f_range['start']
-        p_range = self.power_range
-        if p_range is not None:
-            self.power = p_range['start']
+        if self._capabilities is not None:
+            self.frequency = self._capabilities.frequency.start
+            self.power = self._capabilities.power.start
         self.phase = 0.
         self.temp_compensation_mode = '10 sec'
 
     def write(self, attribute, *args):
-        self.select()
-        self._parent.write(attribute, *args)
+        self._parent._channel_write(self._index, attribute, *args)
 
     def read(self, attribute, *args):
-        self.select()
-        return self._parent.read(attribute, *args)
+        return self._parent._channel_read(self._index, attribute, *args)
 
-    def select(self):
-        """Select channel."""
-        self._parent.write('channel', self._index)
+    def read_many(self, queries):
+        """Read several attributes of this channel with pipelined queries.
 
-    @property
-    def frequency_range(self):
-        """Frequency range in Hz.
+        See SerialDevice.read_many().
 
-        Returns:
-            dict: frequency range or None
-        """
-        return None if self._f_range is None else self._f_range.copy()
-
-    @property
-    def frequency(self):
-        """Get frequency in Hz.
+        Args:
+            queries (iterable): attribute names or tuples (attribute, *args)
 
         Returns:
-            float: frequency in Hz
-        """
-        return self.read('frequency') * 1e6
-
-    @frequency.setter
-    def frequency(self, value):
-        """Set frequency in Hz.
-
-        Args:
-            value (float / int): frequency in Hz
+            list: read values, converted to the appropriate data types
         """
-        if not isinstance(value, (float, int)):
-            raise ValueError('Expected float or int.')
-        f_range = self.frequency_range
-        if f_range is not None and not f_range['start'] <= value <= f_range['stop']:
-            raise ValueError('Expected float in range [{}, {}] Hz.'.format(
-                             f_range['start'], f_range['stop']))
-        self.write('frequency', value / 1e6)
+        return self._parent.read_many(
+            (self._index,) + ((query,) if isinstance(query, str) else tuple(query))
+            for query in queries)
 
-    @property
-    def power_range(self):
-        """Power range in dBm.
+    def cached(self, attribute, *args):
+        """Last value written to or read from this channel for an attribute.
 
-        Returns:
-            dict: power range or None
-        """
-        return None if self._p_range is None else self._p_range.copy()
+        See SerialDevice.cached().
 
-    @property
-    def power(self):
-        """Get power in dBm.
+        Args:
+            attribute (str): The name of the attribute in API dictionary.
+            *args: Arguments of the attribute, e.g. a lookup table row.
 
         Returns:
-            float: power in dBm
+            The cached value or None if unknown.
         """
-        return self.read('power')
-
-    @power.setter
-    def power(self, value):
-        """Set power in dBm.
+        return self._parent._cached(self._index, attribute, args)
 
-        Args:
-            value (float / int): power in dBm
-        """
-        if not isinstance(value, (float, int)):
-            raise TypeError('Expected float or int.')
-        self.write('power', value)
+    def select(self):
+        """Select channel."""
+        self._parent.write('channel', self._index)
 
     @property
-    def calibrated(self):
-        """Calibration was successful on frequency or amplitude change.
+    def frequency_range(self):
+        """Frequency range in Hz.
 
         Returns:
-            bool: calibrated
+            dict: frequency range or None
         """
-        return self.read('calibrated')
+        return range_dict(self._capabilities, 'frequency')
+
+    frequency = NumberAttr('frequency', 'Frequency in Hz.', error=ValueError, bounds='frequency',
+                           scale=1e6, unit='Hz')
 
     @property
-    def temp_compensation_modes(self):
-        """Temperature compensation modes.
+    def power_range(self):
+        """Power range in dBm.
 
         Returns:
-            tuple: tuple of str of modes
+            dict: power range or None
         """
-        return ('none', 'on set', '1 sec', '10 sec')
+        return range_dict(self._capabilities, 'power')
 
-    @property
-    def temp_compensation_mode(self):
-        """Temperature compensation mode.
+    power = NumberAttr('power', 'Power in dBm.', grid='power')
 
-        Returns:
-            str: mode
-        """
-        return self.temp_compensation_modes[self.read('temp_comp_mode')]
+    calibrated = Attr('calibrated', 'Calibration was successful on frequency or amplitude change.',
+                      readonly=True)
 
-    @temp_compensation_mode.setter
-    def temp_compensation_mode(self, value):
-        modes = self.temp_compensation_modes
-        if not value in modes:
-            raise ValueError('Expected str in set {}.'.format(modes))
-        self.write('temp_comp_mode', modes.index(value))
+    temp_compensation_mode = EnumAttr('temp_comp_mode', ('none', 'on set', '1 sec', '10 sec'),
+                                      'Temperature compensation mode.')
+    temp_compensation_modes = Choices(temp_compensation_mode, 'Temperature compensation modes.')
 
     @property
     def vga_dac_range(self):
@@ -144,27 +125,9 @@ class SynthHDChannel:
         Returns:
             dict: VGA DAC range or None
         """
-        return None if self._vga_range is None else self._vga_range.copy()
-
-    @property
-    def vga_dac(self):
-        """Get raw VGA DAC value
-
-        Returns:
-            int: value
-        """
-        return self.read('vga_dac')
-
-    @vga_dac.setter
-    def vga_dac(self, value):
-        """Set raw VGA DAC value.
+        return range_dict(self._capabilities, 'vga_dac')
 
-        Args:
-            value (int): value
-        """
-        if not isinstance(value, int):
-            raise TypeError('Expected int.')
-        self.write('vga_dac', value)
+    vga_dac = NumberAttr('vga_dac', 'Raw VGA DAC value.', types=(int,))
 
     @property
     def phase_range(self):
@@ -173,76 +136,32 @@ class SynthHDChannel:
         Returns:
             dict: range
         """
-        return {
-            'start': 0.,
-            'stop': 360.,
-            'step': .001,
-        }
+        return PHASE.as_dict()
 
-    @property
-    def phase(self):
-        """Get phase step value.
+    phase = NumberAttr('phase_step', 'Phase step value in degrees.', grid=PHASE)
 
-        Returns:
-            float: value in degrees
-        """
-        return self.read('phase_step')
+    def phase_sweep(self, phases, interval=0., other=None):
+        """Compile a phase sweep of this channel.
 
-    @phase.setter
-    def phase(self, value):
-        """Set phase step value.
+        Steps are pre-encoded, so running the sweep skips validation and
+        formatting, and channels are selected only when they change. See
+        sweep.compile_phase_sweep().
 
         Args:
-            value (float / int): phase in degrees
-        """
-        if not isinstance(value, (float, int)):
-            raise TypeError('Expected float or int.')
-        self.write('phase_step', value)
-
-    @property
-    def rf_enable(self):
-        """RF output enable.
-
-        Returns:
-            bool: enable
-        """
-        return self.read('rf_enable')
-
-    @rf_enable.setter
-    def rf_enable(self, value):
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('rf_enable', value)
-
-    @property
-    def pa_enable(self):
-        """PA enable.
-
-        Returns:
-            bool: enable
-        """
-        return self.read('pa_power_on')
-
-    @pa_enable.setter
-    def pa_enable(self, value):
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('pa_power_on', value)
-
-    @property
-    def pll_enable(self):
-        """PLL enable.
+            phases (iterable / numpy.ndarray): phases in degrees
+            interval (float): time between steps in seconds, 0 to send all
+                steps in a single write
+            other (iterable / numpy.ndarray): phases of the other channel in
+                degrees, set in the same steps, or None
 
         Returns:
-            bool: enable
+            PhaseSweep: compiled sweep, see PhaseSweep.run()
         """
-        return self.read('pll_power_on')
+        return compile_phase_sweep(self._parent, self._index, phases, interval, other)
 
-    @pll_enable.setter
-    def pll_enable(self, value):
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('pll_power_on', value)
+    rf_enable = BoolAttr('rf_enable', 'RF output enable.')
+    pa_enable = BoolAttr('pa_power_on', 'PA enable.')
+    pll_enable = BoolAttr('pll_power_on', 'PLL enable.')
 
     @property
     def enable(self):
@@ -266,70 +185,59 @@ class SynthHDChannel:
         self.pll_enable = value
         self.pa_enable = value
 
+    lock_status = Attr('pll_lock', 'PLL lock status.', readonly=True)
+
     @property
-    def lock_status(self):
-        """PLL lock status.
+    def lock_time_statistics(self):
+        """Measured PLL lock times of this channel per frequency band.
 
         Returns:
-            bool: locked
+            LockTimeStatistics: statistics
         """
-        return self.read('pll_lock')
+        return self._lock_stats
 
+    def wait_locked(self, timeout=1.):
+        """Wait until the PLL is locked.
 
-class SynthHDv2Channel(SynthHDChannel):
+        Polls lock status with backoff. The time to lock is measured from the
+        last frequency write sent to the device, not from captured or
+        skipped ones, and recorded in lock_time_statistics if a poll saw
+        the PLL unlocked.
 
-    def __init__(self, parent, index):
-        self._parent = parent
-        self._index = index
-        model = self._parent.model
-        if model == 'SynthHD v2':
-            self._f_range = {'start': 10.e6, 'stop': 15000.e6, 'step': 0.1}
-            self._p_range = {'start': -70., 'stop': 20., 'step': 0.01}
-            self._vga_range = {'start': 0, 'stop': 4000, 'step': 1}
-            self._cspacing_range = {'start': 0.1, 'stop': 1000., 'step': 0.1}
-        elif model == 'SynthHD PRO v2':
-            self._f_range = {'start': 10.e6, 'stop': 24000.e6, 'step': 0.1}
-            self._p_range = {'start': -70., 'stop': 20., 'step': 0.01}
-            self._vga_range = {'start': 0, 'stop': 4000, 'step': 1}
-            self._cspacing_range = {'start': 0.1, 'stop': 1000., 'step': 0.1}
-        else:
-            self._f_range = None
-            self._p_range = None
-            self._vga_range = None
-            self._cspacing_range = None
+        Args:
+            timeout (float): timeout in seconds
 
-    @property
-    def channel_spacing_range(self):
-        """Channel Spacing Range in Hz.
+        Returns:
+            float: time to lock in seconds, 0 if no frequency write was
+                sent since the last wait
 
-           Returns:
-               dict: channel spacing range or None
+        Raises:
+            TimeoutError: if not locked within the timeout
         """
-        return None if self._cspacing_range is None else self._cspacing_range.copy()
+        start = self._parent._take_frequency_time(self._index)
+        if start is None:
+            wait_locked(lambda: self.lock_status, perf_counter(), None,
+                        self._lock_stats, timeout)
+            return 0.
+        frequency = self.cached('frequency')
+        return wait_locked(lambda: self.lock_status, start,
+                           None if frequency is None else frequency * 1e6,
+                           self._lock_stats, timeout)
+
+
+class SynthHDv2Channel(SynthHDChannel):
 
     @property
-    def channel_spacing(self):
-        """Channel Spacing in Hz
+    def channel_spacing_range(self):
+        """Channel Spacing Range in Hz.
 
            Returns:
-               float: Channel Spacing setting in Hz
+               dict: channel spacing range or None
         """
-        return self.read('channel_spacing')
-
-    @channel_spacing.setter
-    def channel_spacing(self,value):
-        """Set Channel Spacing in Hz.
+        return range_dict(self._capabilities, 'channel_spacing')
 
-           Args:
-               float: Channel spacing in Hz
-        """
-        if not isinstance(value, (float, int)):
-            raise ValueError('Expected float or int.')
-        cs_range = self.channel_spacing_range
-        if cs_range is not None and not cs_range['start'] <= value <= cs_range['stop']:
-            raise ValueError('Expected float in range [{}, {}] Hz.'.format(
-                             cs_range['start'], cs_range['stop']))
-        self.write('channel_spacing', value)
+    channel_spacing = NumberAttr('channel_spacing', 'Channel spacing in Hz.', error=ValueError,
+                                 bounds='channel_spacing', unit='Hz')
 
 
 class SynthHD(SerialDevice, Sequence):
@@ -392,24 +300,174 @@ class SynthHD(SerialDevice, Sequence):
         'fm_cont':          (bool,  '/{}',     '/?'),
     }
 
-    def __init__(self, devpath):
-        super().__init__(devpath)
+    def __init__(self, devpath, **kwargs):
+        super().__init__(devpath, **kwargs)
+        self._identify()
+
+    def _identify(self):
+        """Identify the model and create the channels."""
         self._model = None
-        self._model = self.model
-        if 'v2' in self.model:
+        if self._identity is not None:
+            self._confirm_identity()
+        if self._identity is not None:
+            self._model = self._identity['model']
+        else:
+            self._model = self.model
+            self._cache_identity()
+        self._capabilities = CAPABILITIES.get(self._model)
+        if self.model is not None and 'v2' in self.model:
             channel_type = SynthHDv2Channel
         else:
             channel_type = SynthHDChannel
         self._channels = [channel_type(self, index) for index in range(2)]
 
+    def _channel_write(self, index, attribute, *args):
+        """Select a channel and write an attribute of it, atomically.
+
+        Args:
+            index (int): channel index
+            attribute (str): The name of the attribute in API dictionary.
+            *args: Arguments to be formatted into the request string.
+        """
+        with self._lock:
+            # no select either if the write is skipped
+            if self._redundant(index, attribute, args):
+                return
+            # within a captured batch the channel stays selected
+            if self._capture is None or self._capture.selected != index:
+                self.write('channel', index)
+            self._write_attribute(index, attribute, args)
+
+    def _write_attribute(self, scope, attribute, args):
+        super()._write_attribute(scope, attribute, args)
+        if attribute == 'channel' and self._capture is not None:
+            self._capture.selected = int(args[0])
+
+    def _channel_read(self, index, attribute, *args):
+        """Select a channel and read an attribute of it, atomically.
+
+        Args:
+            index (int): channel index
+            attribute (str): The name of the attribute in API dictionary.
+            *args: Arguments to be formatted into the request string.
+
+        Returns:
+            The read value, converted to the appropriate data type.
+        """
+        with self._lock:
+            self.write('channel', index)
+            return self._read_attribute(index, attribute, args)
+
+    def read_many(self, queries):
+        """Read several attributes with pipelined queries.
+
+        See SerialDevice.read_many(). Queries of channel attributes are
+        tuples (index, attribute, *args). They are grouped by channel, so
+        that each channel is selected once, but values are returned in the
+        order of the queries.
+
+        Args:
+            queries (iterable): attribute names, tuples (attribute, *args)
+                or tuples (index, attribute, *args)
+
+        Returns:
+            list: read values, converted to the appropriate data types
+        """
+        items = []
+        for query in queries:
+            if isinstance(query, str):
+                query = (query,)
+            if isinstance(query[0], int):
+                if query[0] not in range(len(self)):
+                    raise ValueError('No channel {}.'.format(query[0]))
+                items.append((query[0], query[1], tuple(query[2:])))
+            else:
+                items.append((None, query[0], tuple(query[1:])))
+        return self._read_many(items)
+
+    def _read_many(self, items):
+        # device attributes first, then each channel in turn
+        order = sorted(range(len(items)), key=lambda i: -1 if items[i][0] is None else items[i][0])
+        requests, queries, writes = [], [], []
+        selected = None
+        for i in order:
+            scope, attribute, args = items[i]
+            if scope is not None and scope != selected:
+                requests.append(self.encode('channel', scope))
+                writes.append((None, 'channel', requests[-1]))
+                selected = scope
+            request, dtype, args, shadowed = self._prepare_query(attribute, args)
+            requests.append(request)
+            queries.append((scope, attribute, args, request, dtype, shadowed))
+        updates = [((None, 'channel'), selected)] if selected is not None else []
+        values = [None] * len(items)
+        for i, value in zip(order, self._pipeline(requests, queries, updates, writes)):
+            values[i] = value
+        return values
+
+    def set_channels(self, settings):
+        """Update both channels in a single write.
+
+        Settings of the first channel are written with its frequency last,
+        those of the second channel with its frequency first, so that each
+        channel is selected once and only the second select separates the
+        two frequency commands. An output enable of the first channel thus
+        takes effect shortly before its frequency change.
+
+        Args:
+            settings (dict): map of channel index to dict of settings, with
+                keys of 'frequency', 'power', 'phase' and 'enable'; applied
+                in the order of the map
+
+        Returns:
+            ChannelUpdateReport: sizes of the write and the inter-channel gap
+        """
+        names = ('frequency', 'power', 'phase', 'enable')
+        for index, values in settings.items():
+            if index not in range(len(self)):
+                raise ValueError('Expected channel in set {}.'.format(tuple(range(len(self)))))
+            unknown = set(values) - set(names)
+            if unknown:
+                raise ValueError('Unknown settings {}, expected set {}.'.format(
+                                 sorted(unknown), names))
+        marks = []
+        with self.capture() as requests:
+            for position, (index, values) in enumerate(settings.items()):
+                channel = self[index]
+                if position > 0 and 'frequency' in values:
+                    channel.frequency = values['frequency']
+                    marks.append(len(requests) - 1)
+                for name in names[1:]:
+                    if name in values:
+                        setattr(channel, name, values[name])
+                if position == 0 and 'frequency' in values:
+                    channel.frequency = values['frequency']
+                    marks.append(len(requests) - 1)
+        self.write_raw(''.join(requests), requests.updates)
+        gap_commands = gap_bytes = None
+        if len(marks) == 2:
+            gap_commands = marks[1] - marks[0]
+            gap_bytes = sum(len(request) for request in requests[marks[0] + 1:marks[1] + 1])
+        selects = sum(1 for key, _ in requests.updates if key[1] == 'channel')
+        return ChannelUpdateReport(len(requests), selects, sum(map(len, requests)),
+                                   gap_commands, gap_bytes)
+
     def __getitem__(self, key):
         return self._channels.__getitem__(key)
 
     def __len__(self):
         return self._channels.__len__()
 
-    def init(self):
-        """Initialize device: put into a known, safe state."""
+    def init(self, fast=False):
+        """Initialize device: put into a known, safe state.
+
+        Args:
+            fast (bool): read the current state in one pipelined burst and
+                send only the writes that change it, in a single write
+        """
+        if fast:
+            self._write_differences(self.init)
+            return
         self.reference_mode = 'internal 27mhz'
         self.trigger_mode = 'disabled'
         self.sweep_enable = False
@@ -445,6 +503,15 @@ class SynthHD(SerialDevice, Sequence):
             # Unsupported hardware version. Return None.
             return None
 
+    @property
+    def capabilities(self):
+        """Capabilities of the model: ranges and supported API attributes.
+
+        Returns:
+            Capabilities: capabilities or None if unsupported
+        """
+        return self._capabilities
+
     @property
     def model_type(self):
         """Model type.
@@ -452,7 +519,7 @@ class SynthHD(SerialDevice, Sequence):
         Returns:
             str: model
         """
-        return self.read('model_type')
+        return self._read_identity('model_type')
 
     @property
     def serial_number(self):
@@ -461,7 +528,7 @@ class SynthHD(SerialDevice, Sequence):
         Returns:
             int: serial number
         """
-        return self.read('serial_number')
+        return self._read_identity('serial_number')
 
     @property
     def firmware_version(self):
@@ -470,7 +537,7 @@ class SynthHD(SerialDevice, Sequence):
         Returns:
             str: version
         """
-        return self.read('fw_version')
+        return self._read_identity('fw_version')
 
     @property
     def hardware_version(self):
@@ -479,91 +546,31 @@ class SynthHD(SerialDevice, Sequence):
         Returns:
             str: version
         """
-        return self.read('hw_version')
+        return self._read_identity('hw_version')
 
     def save(self):
         """Save all settings to non-volatile EEPROM."""
         self.write('save')
 
-    @property
-    def reference_modes(self):
-        """Frequency reference modes.
-
-        Returns:
-            tuple: tuple of str of modes
-        """
-        return ('external', 'internal 27mhz', 'internal 10mhz')
+    reference_mode = EnumAttr('reference_mode', ('external', 'internal 27mhz', 'internal 10mhz'),
+                              'Frequency reference mode.')
+    reference_modes = Choices(reference_mode, 'Frequency reference modes.')
 
-    @property
-    def reference_mode(self):
-        """Get frequency reference mode.
+    trigger_mode = EnumAttr('trig_function', (
+        'disabled',
+        'full frequency sweep',
+        'single frequency step',
+        'stop all',
+        'rf enable',
+        'remove interrupts',
+        'reserved',
+        'reserved',
+        'am modulation',
+        'fm modulation',
+    ), 'Trigger mode.')
+    trigger_modes = Choices(trigger_mode, 'Trigger modes.')
 
-        Returns:
-            str: mode
-        """
-        return self.reference_modes[self.read('reference_mode')]
-
-    @reference_mode.setter
-    def reference_mode(self, value):
-        """Set frequency reference mode.
-
-        Args:
-            value (str): mode
-        """
-        modes = self.reference_modes
-        if not value in modes:
-            raise ValueError('Expected str in set {}.'.format(modes))
-        self.write('reference_mode', modes.index(value))
-
-    @property
-    def trigger_modes(self):
-        """Trigger modes.
-
-        Returns:
-            tuple: tuple of str of modes
-        """
-        return (
-            'disabled',
-            'full frequency sweep',
-            'single frequency step',
-            'stop all',
-            'rf enable',
-            'remove interrupts',
-            'reserved',
-            'reserved',
-            'am modulation',
-            'fm modulation',
-        )
-
-    @property
-    def trigger_mode(self):
-        """Get trigger mode.
-
-        Returns:
-            str: mode
-        """
-        return self.trigger_modes[self.read('trig_function')]
-
-    @trigger_mode.setter
-    def trigger_mode(self, value):
-        """Set trigger mode.
-
-        Args:
-            value (str): mode
-        """
-        modes = self.trigger_modes
-        if not value in modes:
-            raise ValueError('Expected str in set {}.'.format(modes))
-        self.write('trig_function', modes.index(value))
-
-    @property
-    def temperature(self):
-        """Temperature in Celsius.
-
-        Returns:
-            float: temperature
-        """
-        return self.read('temperature')
+    temperature = Attr('temperature', 'Temperature in Celsius.', readonly=True)
 
     @property
     def reference_frequency_range(self):
@@ -572,128 +579,90 @@ class SynthHD(SerialDevice, Sequence):
         Returns:
             dict: frequency range in Hz
         """
-        return {'start': 10.e6, 'stop': 100.e6, 'step': 1.e3}
+        return REFERENCE_FREQUENCY.as_dict()
 
-    @property
-    def reference_frequency(self):
-        """Get reference frequency in Hz.
+    reference_frequency = NumberAttr('ref_frequency', 'Reference frequency in Hz.',
+                                     error=ValueError, bounds=REFERENCE_FREQUENCY,
+                                     scale=1.e6, unit='Hz')
 
-        Returns:
-            float: frequency in Hz
-        """
-        return self.read('ref_frequency') * 1.e6
-
-    @reference_frequency.setter
-    def reference_frequency(self, value):
-        """Set reference frequency in Hz.
-
-        Args:
-            value (float / int): frequency in Hz
-        """
-        if not isinstance(value, (float, int)):
-            raise ValueError('Expected float or int.')
-        f_range = self.reference_frequency_range
-        if not f_range['start'] <= value <= f_range['stop']:
-            raise ValueError('Expected float in range [{}, {}] Hz.'.format(
-                             f_range['start'], f_range['stop']))
-        self.write('ref_frequency', value / 1.e6)
+    sweep_enable = BoolAttr('sweep_cont', 'Sweep continuously enable.')
+    am_enable = BoolAttr('am_cont', 'AM continuously enable.')
+    pulse_mod_enable = BoolAttr('pulse_cont', 'Pulse modulation continuously enable.')
+    dual_pulse_mod_enable = BoolAttr('dual_pulse_mod', 'Dual pulse modulation enable.')
+    fm_enable = BoolAttr('fm_cont', 'FM continuously enable.')
 
     @property
-    def sweep_enable(self):
-        """Get sweep continuously enable.
+    def differential_sweep(self):
+        """Differential sweep configuration, read with one pipelined read.
 
         Returns:
-            bool: enable
+            DifferentialSweep: configuration
         """
-        return self.read('sweep_cont')
+        return DifferentialSweep.read(self)
 
-    @sweep_enable.setter
-    def sweep_enable(self, value):
-        """Set sweep continuously enable.
+    @differential_sweep.setter
+    def differential_sweep(self, value):
+        """Set differential sweep configuration in a single write.
 
         Args:
-            value (bool): enable
+            value (DifferentialSweep): configuration
         """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('sweep_cont', value)
+        if not isinstance(value, DifferentialSweep):
+            raise TypeError('Expected DifferentialSweep.')
+        value.apply(self)
 
-    @property
-    def am_enable(self):
-        """Get AM continuously enable.
+    def sweep_single(self):
+        """Run a single sweep.
 
         Returns:
-            bool: enable
+            float: expected time.perf_counter() at the end of the sweep
         """
-        return self.read('am_cont')
-
-    @am_enable.setter
-    def am_enable(self, value):
-        """Set AM continuously enable.
-
-        Args:
-            value (bool): enable
-        """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('am_cont', value)
+        return trigger_sweep(self)
 
     @property
-    def pulse_mod_enable(self):
-        """Get pulse modulation continuously enable.
+    def pulse_config(self):
+        """Pulse modulation configuration, read with one pipelined read.
 
         Returns:
-            bool: enable
+            PulseConfig: configuration
         """
-        return self.read('pulse_cont')
+        return PulseConfig.read(self)
 
-    @pulse_mod_enable.setter
-    def pulse_mod_enable(self, value):
-        """Set pulse modulation continuously enable.
+    @pulse_config.setter
+    def pulse_config(self, value):
+        """Set pulse modulation configuration in a single write.
 
         Args:
-            value (bool): enable
+            value (PulseConfig): configuration
         """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('pulse_cont', value)
+        if not isinstance(value, PulseConfig):
+            raise TypeError('Expected PulseConfig.')
+        value.apply(self)
 
-    @property
-    def dual_pulse_mod_enable(self):
-        """Get dual pulse modulation enable.
+    def pulse_single(self):
+        """Trigger a single pulse burst.
 
         Returns:
-            bool: enable
+            float: expected time.perf_counter() at the end of the burst
         """
-        return self.read('dual_pulse_mod')
-
-    @dual_pulse_mod_enable.setter
-    def dual_pulse_mod_enable(self, value):
-        """Set dual pulse modulation enable.
-
-        Args:
-            value (bool): enable
-        """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('dual_pulse_mod', value)
+        return trigger_pulse(self)
 
     @property
-    def fm_enable(self):
-        """Get FM continuously enable.
+    def fm_config(self):
+        """Frequency modulation configuration, read with one pipelined read.
 
         Returns:
-            bool: enable
+            FMConfig: configuration
         """
-        return self.read('fm_cont')
+        return FMConfig.read(self)
 
-    @fm_enable.setter
-    def fm_enable(self, value):
-        """Set FM continuously enable.
+    @fm_config.setter
+    def fm_config(self, value):
+        """Set frequency modulation configuration in a single write.
 
         Args:
-            value (bool): enable
+            value (FMConfig): configuration
         """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('fm_cont', value)
+        if not isinstance(value, FMConfig):
+            raise TypeError('Expected FMConfig.')
+        value.apply(self)
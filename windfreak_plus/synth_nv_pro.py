@@ -5,7 +5,12 @@
 # which is licensed under the MIT License (see LICENSE file for details).
 
 
+from .attributes import Attr, BoolAttr, Choices, EnumAttr, NumberAttr
+from .capabilities import CAPABILITIES, PHASE, REFERENCE_FREQUENCY, range_dict
 from .device import SerialDevice
+from .modulation import FM_TYPES, FMConfig, PulseConfig, trigger_pulse
+from .settling import LockTimeStatistics, wait_locked
+from time import perf_counter
 
 
 class SynthNVPro(SerialDevice):
@@ -86,31 +91,42 @@ class SynthNVPro(SerialDevice):
         'hw_version':         (str,   None,      'v1'),  # Hardware version
     }
 
-    def __init__(self, devpath):
-        super().__init__(devpath)
+    def __init__(self, devpath, **kwargs):
+        super().__init__(devpath, **kwargs)
+        self._lock_stats = LockTimeStatistics()
+        self._identify()
+
+    def _identify(self):
+        """Identify the model and set up the model ranges."""
         self._model = None
-        self._model = self.model
-        if self._model == 'SynthNV PRO':
-            self._f_range = {'start': 12.5e6, 'stop': 6400.e6, 'step': 0.1}
-            self._p_range = {'start': -60., 'stop': 20., 'step': 0.001}
-            self._vga_range = {'start': 0, 'stop': 4000, 'step': 1}
-            self._cspacing_range = {'start': 0.1, 'stop': 1000., 'step': 0.1}
+        if self._identity is not None:
+            self._confirm_identity()
+        if self._identity is not None:
+            self._model = self._identity['model']
         else:
-            self._f_range = None
-            self._p_range = None
-            self._vga_range = None
-            self._cspacing_range = None
+            self._model = self.model
+            self._cache_identity()
+        self._capabilities = CAPABILITIES.get(self._model)
+
+    def init(self, fast=False):
+        """Initialize device: put into a known, safe state.
 
-    def init(self):
-        """Initialize device: put into a known, safe state."""
+        Args:
+            fast (bool): read the current state in one pipelined burst and
+                send only the writes that change it, in a single write
+        """
         self.dev_clear()
+        if fast:
+            self._write_differences(self._init_state)
+        else:
+            self._init_state()
+
+    def _init_state(self):
+        """Write the initial state."""
         self.rf_enable = False
-        f_range = self.frequency_range
-        if f_range is not None:
-            self.frequency = f_range['start']
-        p_range = self.power_range
-        if p_range is not None:
-            self.power = p_range['start']
+        if self._capabilities is not None:
+            self.frequency = self._capabilities.frequency.start
+            self.power = self._capabilities.power.start
         self.phase = 0.
         self.temp_compensation_mode = '10 sec'
         self.reference_mode = 'internal 27MHz'
@@ -134,13 +150,22 @@ class SynthNVPro(SerialDevice):
         if self._model is not None:
             return self._model
         
-        modeltype = self.read('model_type')
+        modeltype = self._read_identity('model_type')
         if 'SynthNVP' in modeltype:
             return 'SynthNV PRO'
         else:
             # Unsupported hardware version. Return None.
             return None
 
+    @property
+    def capabilities(self):
+        """Capabilities of the model: ranges and supported API attributes.
+
+        Returns:
+            Capabilities: capabilities or None if unsupported
+        """
+        return self._capabilities
+
     @property
     def serial_number(self):
         """Serial number
@@ -148,7 +173,7 @@ class SynthNVPro(SerialDevice):
         Returns:
             int: serial number
         """
-        return self.read('serial_number')
+        return self._read_identity('serial_number')
 
     @property
     def firmware_version(self):
@@ -157,7 +182,7 @@ class SynthNVPro(SerialDevice):
         Returns:
             str: version
         """
-        return self.read('fw_version')
+        return self._read_identity('fw_version')
 
     @property
     def hardware_version(self):
@@ -166,85 +191,29 @@ class SynthNVPro(SerialDevice):
         Returns:
             str: version
         """
-        return self.read('hw_version')
+        return self._read_identity('hw_version')
 
     def save(self):
         """Save all settings to non-volatile EEPROM."""
         self.write('save')
 
-    @property
-    def trigger_modes(self):
-        """List of trigger modes.
-
-        Returns:
-            tuple: tuple of str of modes
-        """
-        return (
-            'disabled',
-            'full frequency sweep',
-            'single frequency step',
-            'stop all',
-            'rf enable',
-            'remove interrupts',
-            'reserved',
-            'reserved',
-            'am modulation',
-            'fm modulation',
-        )
-
-    @property
-    def trigger_mode(self):
-        """Get trigger mode.
-
-        Returns:
-            str: mode
-        """
-        return self.trigger_modes[self.read('trig_function')]
-
-    @trigger_mode.setter
-    def trigger_mode(self, value):
-        """Set trigger mode.
-
-        Args:
-            value (str): mode
-        """
-        modes = self.trigger_modes
-        if not value in modes:
-            raise ValueError('Expected str in set: {}.'.format(modes))
-        self.write('trig_function', modes.index(value))
-
-    @property
-    def reference_modes(self):
-        """List of frequency reference modes.
-
-        Returns:
-            tuple: tuple of str of modes
-        """
-        return ('external', 
-            'internal 27MHz', 
-            'internal 10MHz'
-            )
-
-    @property
-    def reference_mode(self):
-        """Get frequency reference mode.
-
-        Returns:
-            str: mode
-        """
-        return self.reference_modes[self.read('reference_mode')]
-
-    @reference_mode.setter
-    def reference_mode(self, value):
-        """Set frequency reference mode.
-
-        Args:
-            value (str): mode
-        """
-        modes = self.reference_modes
-        if not value in modes:
-            raise ValueError('Expected str in set {}.'.format(modes))
-        self.write('reference_mode', modes.index(value))
+    trigger_mode = EnumAttr('trig_function', (
+        'disabled',
+        'full frequency sweep',
+        'single frequency step',
+        'stop all',
+        'rf enable',
+        'remove interrupts',
+        'reserved',
+        'reserved',
+        'am modulation',
+        'fm modulation',
+    ), 'Trigger mode.')
+    trigger_modes = Choices(trigger_mode, 'List of trigger modes.')
+
+    reference_mode = EnumAttr('reference_mode', ('external', 'internal 27MHz', 'internal 10MHz'),
+                              'Frequency reference mode.')
+    reference_modes = Choices(reference_mode, 'List of frequency reference modes.')
 
     @property
     def reference_frequency_range(self):
@@ -253,187 +222,73 @@ class SynthNVPro(SerialDevice):
         Returns:
             dict: frequency range in Hz
         """
-        return {'start': 10.e6, 'stop': 100.e6, 'step': 1.e3}
-
-    @property
-    def reference_frequency(self):
-        """Get reference frequency in Hz.
-
-        Returns:
-            float: frequency in Hz
-        """
-        return self.read('ref_frequency') * 1.e6
-
-    @reference_frequency.setter
-    def reference_frequency(self, value):
-        """Set reference frequency in Hz.
-
-        Args:
-            value (float / int): frequency in Hz
-        """
-        if not isinstance(value, (float, int)):
-            raise ValueError('Expected float or int.')
-        f_range = self.reference_frequency_range
-        if not f_range['start'] <= value <= f_range['stop']:
-            raise ValueError('Expected float in range [{}, {}] Hz.'.format(
-                             f_range['start'], f_range['stop']))
-        self.write('ref_frequency', value / 1.e6)
-
-    @property
-    def temperature(self):
-        """Get temperature in Celsius.
-
-        Returns:
-            float: temperature
-        """
-        return self.read('temperature')
-
-    @property
-    def sweep_enable(self):
-        """Get sweep continuously enabled/disabled.
-
-        Returns:
-            bool: enabled/disabled
-        """
-        return self.read('sweep_cont')
-
-    @sweep_enable.setter
-    def sweep_enable(self, value):
-        """Set sweep continuously enable.
-
-        Args:
-            value (bool): enable
-        """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('sweep_cont', value)
-
-    @property
-    def sweep_types(self):
-        """List sweep types.
-
-        Returns:
-            tuple: Tuple of str of sweep types.
-        """
-        return (
-            'linear', 
-            'tabular',
-            'percentage'
-            )
-
-    @property
-    def sweep_type(self):
-        """Get sweep type.
-
-        Returns:
-            str: sweep type
-        """
-        return self.sweep_types[self.read('sweep_type')]
-
-    @sweep_type.setter
-    def sweep_type(self, value):
-        """Set sweep type.
-
-        Args:
-            value (str): sweep type.
-        """
-        types = self.sweep_types
-        if value not in types:
-            raise ValueError('Expected str in set: {}.'.format(types))
-        self.write('sweep_type', types.index(value))
+        return REFERENCE_FREQUENCY.as_dict()
 
-    @property
-    def sweep_directions(self):
-        """List sweep directions.
+    reference_frequency = NumberAttr('ref_frequency', 'Reference frequency in Hz.',
+                                     error=ValueError, bounds=REFERENCE_FREQUENCY,
+                                     scale=1.e6, unit='Hz')
 
-        Returns:
-            tuple: Tuple of str of sweep directions.
-        """
-        return (
-            'reverse', 
-            'forward'
-            )
+    temperature = Attr('temperature', 'Temperature in Celsius.', readonly=True)
 
-    @property
-    def sweep_direction(self):
-        """Get sweep direction.
+    sweep_enable = BoolAttr('sweep_cont', 'Sweep continuously enable.')
 
-        Returns:
-            str: sweep direction
-        """
-        return self.sweep_directions[self.read('sweep_direction')]
+    sweep_type = EnumAttr('sweep_type', ('linear', 'tabular', 'percentage'), 'Sweep type.')
+    sweep_types = Choices(sweep_type, 'List of sweep types.')
 
-    @sweep_direction.setter
-    def sweep_direction(self, value):
-        """Set sweep direction.
+    sweep_direction = EnumAttr('sweep_direction', ('reverse', 'forward'), 'Sweep direction.')
+    sweep_directions = Choices(sweep_direction, 'List of sweep directions.')
 
-        Args:
-            value (str): sweep direction.
-        """
-        directions = self.sweep_directions
-        if value not in directions:
-            raise ValueError('Expected str in set: {}.'.format(directions))
-        self.write('sweep_direction', directions.index(value))
+    am_enable = BoolAttr('am_cont', 'AM continuously enable.')
+    pulse_mod_enable = BoolAttr('pulse_cont', 'Pulse modulation continuously enable.')
+    fm_enable = BoolAttr('fm_cont', 'FM continuously enable.')
 
     @property
-    def am_enable(self):
-        """Get AM continuously enable.
+    def pulse_config(self):
+        """Pulse modulation configuration, read with one pipelined read.
 
         Returns:
-            bool: enable
+            PulseConfig: configuration
         """
-        return self.read('am_cont')
+        return PulseConfig.read(self)
 
-    @am_enable.setter
-    def am_enable(self, value):
-        """Set AM continuously enable.
+    @pulse_config.setter
+    def pulse_config(self, value):
+        """Set pulse modulation configuration in a single write.
 
         Args:
-            value (bool): enable
+            value (PulseConfig): configuration
         """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('am_cont', value)
+        if not isinstance(value, PulseConfig):
+            raise TypeError('Expected PulseConfig.')
+        value.apply(self)
 
-    @property
-    def pulse_mod_enable(self):
-        """Get pulse modulation continuously enable.
+    def pulse_single(self):
+        """Trigger a single pulse burst.
 
         Returns:
-            bool: enable
-        """
-        return self.read('pulse_cont')
-
-    @pulse_mod_enable.setter
-    def pulse_mod_enable(self, value):
-        """Set pulse modulation continuously enable.
-
-        Args:
-            value (bool): enable
+            float: expected time.perf_counter() at the end of the burst
         """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('pulse_cont', value)
+        return trigger_pulse(self)
 
     @property
-    def fm_enable(self):
-        """Get FM continuously enable.
+    def fm_config(self):
+        """Frequency modulation configuration, read with one pipelined read.
 
         Returns:
-            bool: enable
+            FMConfig: configuration
         """
-        return self.read('fm_cont')
+        return FMConfig.read(self)
 
-    @fm_enable.setter
-    def fm_enable(self, value):
-        """Set FM continuously enable.
+    @fm_config.setter
+    def fm_config(self, value):
+        """Set frequency modulation configuration in a single write.
 
         Args:
-            value (bool): enable
+            value (FMConfig): configuration
         """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('fm_cont', value)
+        if not isinstance(value, FMConfig):
+            raise TypeError('Expected FMConfig.')
+        value.apply(self)
 
     @property
     def frequency_range(self):
@@ -442,31 +297,10 @@ class SynthNVPro(SerialDevice):
         Returns:
             dict: frequency range or None
         """
-        return None if self._f_range is None else self._f_range.copy()
-
-    @property
-    def frequency(self):
-        """Get frequency in Hz.
-
-        Returns:
-            float: frequency in Hz
-        """
-        return self.read('frequency') * 1e6
+        return range_dict(self._capabilities, 'frequency')
 
-    @frequency.setter
-    def frequency(self, value):
-        """Set frequency in Hz.
-
-        Args:
-            value (float / int): frequency in Hz
-        """
-        if not isinstance(value, (float, int)):
-            raise ValueError('Expected float or int.')
-        f_range = self.frequency_range
-        if f_range is not None and not f_range['start'] <= value <= f_range['stop']:
-            raise ValueError('Expected float in range [{}, {}] Hz.'.format(
-                             f_range['start'], f_range['stop']))
-        self.write('frequency', value / 1e6)
+    frequency = NumberAttr('frequency', 'Frequency in Hz.', error=ValueError, bounds='frequency',
+                           scale=1e6, unit='Hz')
 
     @property
     def power_range(self):
@@ -475,66 +309,16 @@ class SynthNVPro(SerialDevice):
         Returns:
             dict: power range or None
         """
-        return None if self._p_range is None else self._p_range.copy()
-
-    @property
-    def power(self):
-        """Get power in dBm.
-
-        Returns:
-            float: power in dBm
-        """
-        return self.read('power')
-
-    @power.setter
-    def power(self, value):
-        """Set power in dBm.
-
-        Args:
-            value (float / int): power in dBm
-        """
-        if not isinstance(value, (float, int)):
-            raise TypeError('Expected float or int.')
-        self.write('power', value)
-
-    @property
-    def calibrated(self):
-        """Calibration was successful on frequency or amplitude change.
-
-        Returns:
-            bool: calibrated
-        """
-        return self.read('calibrated')
-
-    @property
-    def temp_compensation_modes(self):
-        """Temperature compensation modes.
-
-        Returns:
-            tuple: tuple of str of modes
-        """
-        return ('none', 'on set', '1 sec', '10 sec')
+        return range_dict(self._capabilities, 'power')
 
-    @property
-    def temp_compensation_mode(self):
-        """Temperature compensation mode.
+    power = NumberAttr('power', 'Power in dBm.', grid='power')
 
-        Returns:
-            str: mode
-        """
-        return self.temp_compensation_modes[self.read('temp_comp_mode')]
+    calibrated = Attr('calibrated', 'Calibration was successful on frequency or amplitude change.',
+                      readonly=True)
 
-    @temp_compensation_mode.setter
-    def temp_compensation_mode(self, value):
-        """Set temperature compensation mode.
-        
-        Args:
-            value (str): temperature compensation mode.
-        """
-        modes = self.temp_compensation_modes
-        if not value in modes:
-            raise ValueError('Expected str in set {}.'.format(modes))
-        self.write('temp_comp_mode', modes.index(value))
+    temp_compensation_mode = EnumAttr('temp_comp_mode', ('none', 'on set', '1 sec', '10 sec'),
+                                      'Temperature compensation mode.')
+    temp_compensation_modes = Choices(temp_compensation_mode, 'Temperature compensation modes.')
 
     @property
     def vga_dac_range(self):
@@ -543,27 +327,9 @@ class SynthNVPro(SerialDevice):
         Returns:
             dict: VGA DAC range or None
         """
-        return None if self._vga_range is None else self._vga_range.copy()
-
-    @property
-    def vga_dac(self):
-        """Get raw VGA DAC value
-
-        Returns:
-            int: value
-        """
-        return self.read('vga_dac')
-
-    @vga_dac.setter
-    def vga_dac(self, value):
-        """Set raw VGA DAC value.
+        return range_dict(self._capabilities, 'vga_dac')
 
-        Args:
-            value (int): value
-        """
-        if not isinstance(value, int):
-            raise TypeError('Expected int.')
-        self.write('vga_dac', value)
+    vga_dac = NumberAttr('vga_dac', 'Raw VGA DAC value.', types=(int,))
 
     @property
     def phase_range(self):
@@ -572,61 +338,12 @@ class SynthNVPro(SerialDevice):
         Returns:
             dict: range
         """
-        return {
-            'start': 0.,
-            'stop': 360.,
-            'step': .001,
-        }
-
-    @property
-    def phase(self):
-        """Get phase step value.
-
-        Returns:
-            float: value in degrees
-        """
-        return self.read('phase_step')
-
-    @phase.setter
-    def phase(self, value):
-        """Set phase step value.
-
-        Args:
-            value (float / int): phase in degrees
-        """
-        if not isinstance(value, (float, int)):
-            raise TypeError('Expected float or int.')
-        self.write('phase_step', value)
-
-    @property
-    def rf_enable(self):
-        """RF output enable.
-
-        Returns:
-            bool: enable
-        """
-        return self.read('rf_enable')
-
-    @rf_enable.setter
-    def rf_enable(self, value):
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('rf_enable', value)
-
-    @property
-    def pll_enable(self):
-        """PLL enable.
+        return PHASE.as_dict()
 
-        Returns:
-            bool: enable
-        """
-        return self.read('pll_power_on')
+    phase = NumberAttr('phase_step', 'Phase step value in degrees.', grid=PHASE)
 
-    @pll_enable.setter
-    def pll_enable(self, value):
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('pll_power_on', value)
+    rf_enable = BoolAttr('rf_enable', 'RF output enable.')
+    pll_enable = BoolAttr('pll_power_on', 'PLL enable.')
 
     @property
     def enable(self):
@@ -649,83 +366,49 @@ class SynthNVPro(SerialDevice):
         self.rf_enable = value
         self.pll_enable = value
 
-    @property
-    def fm_freq(self):
-        """Get FM frequency in Hz.
-
-        Args:
-            int: FM frequency in Hz.
-        """
-        return self.read('fm_frequency')
-
-    @fm_freq.setter
-    def fm_freq(self, value):
-        """Set FM frequency in Hz [1-5000 Hz].
-
-        Args:
-            value (int): FM frequency in Hz.
-        """
-        self.write('fm_frequency', value)
-
-    @property
-    def fm_deviation(self):
-        """Get FM deviation in Hz [1 Hz minimum].
-
-        Args:
-            int: FM deviation in Hz.
-        """
-        return self.read('fm_deviation')
+    fm_freq = Attr('fm_frequency', 'FM frequency in Hz [1-5000 Hz].')
+    fm_deviation = Attr('fm_deviation', 'FM deviation in Hz [1 Hz minimum].')
 
-    @fm_deviation.setter
-    def fm_deviation(self, value):
-        """Set FM deviation in Hz.
+    fm_type = EnumAttr('fm_mod_type', FM_TYPES, 'FM mod type.')
+    fm_types = Choices(fm_type, 'List of FM mod types.')
 
-        Args:
-            value (int): FM deviation in Hz.
-        """
-        self.write('fm_deviation', value)
+    lock_status = Attr('pll_lock', 'PLL lock status.', readonly=True)
 
     @property
-    def fm_types(self):
-        """List of FM mod types.
+    def lock_time_statistics(self):
+        """Measured PLL lock times per frequency band.
 
         Returns:
-            tuple: tuple of str of modes
+            LockTimeStatistics: statistics
         """
-        return (
-            'sine',
-            'chirp'
-        )
-
-    @property
-    def fm_type(self):
-        """Get FM mod type.
+        return self._lock_stats
 
-        Args:
-            str: FM mod type.
-        """
-        return self.fm_types[self.read('fm_mod_type')]
+    def wait_locked(self, timeout=1.):
+        """Wait until the PLL is locked.
 
-    @fm_type.setter
-    def fm_type(self, value):
-        """Set FM mod type.
+        Polls lock status with backoff. The time to lock is measured from the
+        last frequency write sent to the device, not from captured or
+        skipped ones, and recorded in lock_time_statistics.
 
         Args:
-            value (str): FM mod type.
-        """
-        types = self.fm_types
-        if not value in types:
-            raise ValueError('Expected str in set: {}.'.format(types))
-        self.write('fm_mod_type', types.index(value))
-
-    @property
-    def lock_status(self):
-        """PLL lock status.
+            timeout (float): timeout in seconds
 
         Returns:
-            bool: locked
+            float: time to lock in seconds, 0 if no frequency write was
+                sent since the last wait
+
+        Raises:
+            TimeoutError: if not locked within the timeout
         """
-        return self.read('pll_lock')
+        start = self._take_frequency_time(None)
+        if start is None:
+            wait_locked(lambda: self.lock_status, perf_counter(), None,
+                        self._lock_stats, timeout)
+            return 0.
+        frequency = self.cached('frequency')
+        return wait_locked(lambda: self.lock_status, start,
+                           None if frequency is None else frequency * 1e6,
+                           self._lock_stats, timeout)
 
     @property
     def channel_spacing_range(self):
@@ -734,65 +417,14 @@ class SynthNVPro(SerialDevice):
            Returns:
                dict: channel spacing range or None
         """
-        return None if self._cspacing_range is None else self._cspacing_range.copy()
-
-    @property
-    def channel_spacing(self):
-        """Channel Spacing in Hz
-
-           Returns:
-               float: Channel Spacing setting in Hz
-        """
-        return self.read('channel_spacing')
-
-    @channel_spacing.setter
-    def channel_spacing(self,value):
-        """Set Channel Spacing in Hz.
-
-           Args:
-               float: Channel spacing in Hz
-        """
-        if not isinstance(value, (float, int)):
-            raise ValueError('Expected float or int.')
-        cs_range = self.channel_spacing_range
-        if cs_range is not None and not cs_range['start'] <= value <= cs_range['stop']:
-            raise ValueError('Expected float in range [{}, {}] Hz.'.format(
-                             cs_range['start'], cs_range['stop']))
-        self.write('channel_spacing', value)
-
-    @property
-    def detect_modes(self):
-        """List of detector modes.
-
-        Returns:
-            tuple: tuple of str of modes
-        """
-        return (
-            'instant',
-            'average',
-            'uncalibrated'
-        )
-
-    @property
-    def detect_mode(self):
-        """Get detector mode.
-
-        Returns:
-            str: mode
-        """
-        return self.detect_modes[self.read('detector_mode')]
+        return range_dict(self._capabilities, 'channel_spacing')
 
-    @detect_mode.setter
-    def detect_mode(self, value):
-        """Set detector mode.
+    channel_spacing = NumberAttr('channel_spacing', 'Channel spacing in Hz.', error=ValueError,
+                                 bounds='channel_spacing', unit='Hz')
 
-        Args:
-            value (str): mode
-        """
-        modes = self.detect_modes
-        if not value in modes:
-            raise ValueError('Expected str in set: {}.'.format(modes))
-        self.write('detector_mode', modes.index(value))
+    detect_mode = EnumAttr('detector_mode', ('instant', 'average', 'uncalibrated'),
+                           'Detector mode.')
+    detect_modes = Choices(detect_mode, 'List of detector modes.')
 
     def measure_power(self):
         """Measure power at RFin in dBm.
@@ -804,60 +436,12 @@ class SynthNVPro(SerialDevice):
         self.dev_clear()
         return power
 
-    @property
-    def measure_powers(self):
-        """Get measure power during RF sweep enable.
-
-        Returns:
-            bool: enable
-        """
-        return self.read('detect_powers')
-
-    @measure_powers.setter
-    def measure_powers(self, value):
-        """Set measure power during RF sweep enable.
-
-        Args:
-            value (bool): enable
-        """
-        if not isinstance(value, bool):
-            raise ValueError('Expected bool.')
-        self.write('detect_powers', value)
-
-    @property
-    def detect_powers_styles(self):
-        """List of display styles for when
-        the RF power is read during sweep.
-
-        Returns:
-            tuple: tuple of str of modes
-        """
-        return (
-            'none', 
-            'MHz and dBm', 
-            'dBm'
-        )
-
-    @property
-    def detect_powers_style(self):
-        """Get power display style.
-
-        Returns:
-            str: display style
-        """
-        return self.detect_powers_styles[self.read('detect_powers_styl')]
+    measure_powers = BoolAttr('detect_powers', 'Measure power during RF sweep enable.')
 
-    @detect_powers_style.setter
-    def detect_powers_style(self, value):
-        """Set power display style.
-
-        Args:
-            value (str): display style
-        """
-        styles = self.detect_powers_styles
-        if not value in styles:
-            raise ValueError('Expected str in set: {}.'.format(styles))
-        self.write('detect_powers_styl', styles.index(value))
+    detect_powers_style = EnumAttr('detect_powers_styl', ('none', 'MHz and dBm', 'dBm'),
+                                   'Power display style when the RF power is read during sweep.')
+    detect_powers_styles = Choices(detect_powers_style, 'List of display styles for when the '
+                                   'RF power is read during sweep.')
 
     # TODO
     # Additional Sweep properties and settings:
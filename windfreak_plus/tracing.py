@@ -0,0 +1,123 @@
+"""Command tracing in Chrome trace / Perfetto format.
+
+Tracer observes devices and records every request and reply on the wire,
+including implicit channel selects and input/output buffer clears, into a
+bounded ring buffer. The buffer can be dumped as Chrome trace JSON and opened
+in chrome://tracing or https://ui.perfetto.dev.
+
+Example:
+
+    tracer = Tracer()
+    tracer.attach(synth)
+    ...
+    tracer.dump('trace.json')
+"""
+
+import json
+from collections import deque, namedtuple
+from threading import get_ident
+from time import perf_counter
+
+
+TraceEvent = namedtuple('TraceEvent', (
+    'kind', 'attribute', 'devpath', 'channel', 'thread', 'start', 'end',
+    'request', 'reply'))
+
+
+class Tracer:
+
+    def __init__(self, capacity=65536):
+        """Trace device traffic.
+
+        Args:
+            capacity (int): maximum number of events kept; older events
+                are dropped
+        """
+        self._events = deque(maxlen=capacity)
+        self._origin = perf_counter()
+
+    def __len__(self):
+        return len(self._events)
+
+    def attach(self, device):
+        """Start tracing a device.
+
+        Args:
+            device (SerialDevice): device
+        """
+        device.add_observer(self)
+
+    def detach(self, device):
+        """Stop tracing a device.
+
+        Args:
+            device (SerialDevice): device
+        """
+        device.remove_observer(self)
+
+    def clear(self):
+        """Drop all recorded events."""
+        self._events.clear()
+
+    def events(self):
+        """Recorded events, oldest first.
+
+        Returns:
+            list: list of TraceEvent
+        """
+        return list(self._events)
+
+    def on_write(self, device, scope, attribute, data, start, end):
+        self._events.append(TraceEvent('write', attribute, device._devpath, scope,
+                                       get_ident(), start, end, data, None))
+
+    def on_query(self, device, scope, attribute, request, reply, received, start, end):
+        self._events.append(TraceEvent('query', attribute, device._devpath, scope,
+                                       get_ident(), start, end, request, reply))
+
+    def on_clear(self, device, start, end):
+        self._events.append(TraceEvent('clear', None, device._devpath, None,
+                                       get_ident(), start, end, None, None))
+
+    def chrome_trace(self):
+        """Recorded events in Chrome trace event format.
+
+        Each device is shown as a process and each calling thread as a
+        thread. Timestamps are in microseconds since the tracer was created.
+
+        Returns:
+            dict: trace
+        """
+        pids = {}
+        trace_events = []
+        for event in list(self._events):
+            devpath = str(event.devpath)
+            if devpath not in pids:
+                pids[devpath] = len(pids) + 1
+                trace_events.append({'name': 'process_name', 'ph': 'M', 'pid': pids[devpath],
+                                     'args': {'name': devpath}})
+            args = {'request': event.request}
+            if event.reply is not None:
+                args['reply'] = event.reply
+            if event.channel is not None:
+                args['channel'] = event.channel
+            trace_events.append({
+                'name': event.attribute or event.kind,
+                'cat': event.kind,
+                'ph': 'X',
+                'ts': (event.start - self._origin) * 1.e6,
+                'dur': (event.end - event.start) * 1.e6,
+                'pid': pids[devpath],
+                'tid': event.thread,
+                'args': args,
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path):
+        """Write recorded events to a Chrome trace JSON file.
+
+        Args:
+            path (str): file path
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
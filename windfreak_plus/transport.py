@@ -0,0 +1,202 @@
+"""Serial transports.
+
+A transport is a factory called as transport(devpath, timeout) by
+SerialDevice.open(). It returns an object with the subset of the
+serial.Serial interface used by SerialDevice: write(), readline(), flush(),
+reset_input_buffer(), reset_output_buffer() and close().
+
+Recorder wraps a serial port and writes every byte exchanged to a compact
+binary log with timestamps. Replayer feeds such a log back deterministically,
+either at the original timing or as fast as possible, so that a recorded
+session can be re-run without hardware:
+
+    synth = SynthHD('/dev/ttyACM0', transport=Recorder('session.wfr'))
+    ...
+    synth = SynthHD('/dev/ttyACM0', transport=Replayer('session.wfr'))
+
+Log format: the magic b'WFRT', a version byte, then records of a struct
+'<cQI' header (kind, microseconds since open, payload length) and payload.
+Kinds are b'W' (written data), b'R' (data returned by readline) and b'C'
+(input buffer reset).
+"""
+
+import struct
+from time import monotonic, sleep
+
+
+MAGIC = b'WFRT'
+VERSION = 1
+RECORD = struct.Struct('<cQI')
+
+WRITE = b'W'
+READ = b'R'
+CLEAR = b'C'
+
+
+class ReplayError(RuntimeError):
+    pass
+
+
+def serial_transport(devpath, timeout):
+    """Default transport: a serial port.
+
+    Args:
+        devpath (str): device path
+        timeout (float): read timeout in seconds
+
+    Returns:
+        serial.Serial: port
+    """
+    # pyserial is imported on first use, which keeps package import and
+    # simulated or replayed sessions free of it
+    from serial import Serial
+    return Serial(port=devpath, timeout=timeout)
+
+
+def read_log(path):
+    """Read the records of a transcript log.
+
+    Args:
+        path (str): log file path
+
+    Returns:
+        list: list of (kind, time in seconds, payload)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+        raise ValueError('\'{}\' is not a version {} transcript log.'.format(path, VERSION))
+    records = []
+    offset = len(MAGIC) + 1
+    while offset < len(data):
+        kind, time_us, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        records.append((kind, time_us * 1.e-6, data[offset:offset + length]))
+        offset += length
+    return records
+
+
+class RecordingTransport:
+
+    def __init__(self, transport, path):
+        self._transport = transport
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + bytes((VERSION,)))
+        self._origin = monotonic()
+
+    def _record(self, kind, payload=b''):
+        time_us = int((monotonic() - self._origin) * 1.e6)
+        self._file.write(RECORD.pack(kind, time_us, len(payload)) + payload)
+        # keep the log usable if the session does not end cleanly
+        self._file.flush()
+
+    def write(self, data):
+        self._record(WRITE, bytes(data))
+        return self._transport.write(data)
+
+    def readline(self):
+        data = self._transport.readline()
+        self._record(READ, data)
+        return data
+
+    def flush(self):
+        self._transport.flush()
+
+    def reset_input_buffer(self):
+        self._record(CLEAR)
+        self._transport.reset_input_buffer()
+
+    def reset_output_buffer(self):
+        self._transport.reset_output_buffer()
+
+    def close(self):
+        self._transport.close()
+        self._file.close()
+
+
+class ReplayTransport:
+
+    def __init__(self, records, realtime=False):
+        self._records = records
+        self._index = 0
+        self._realtime = realtime
+        self._origin = monotonic()
+
+    @property
+    def remaining(self):
+        """Number of records not replayed yet.
+
+        Returns:
+            int: number of records
+        """
+        return len(self._records) - self._index
+
+    def _next(self, kind):
+        if self._index >= len(self._records):
+            raise ReplayError('Transcript exhausted, expected no more {!r} records.'.format(kind))
+        record_kind, time, payload = self._records[self._index]
+        if record_kind != kind:
+            raise ReplayError('Record {}: expected {!r}, transcript has {!r} {!r}.'.format(
+                              self._index, kind, record_kind, payload))
+        self._index += 1
+        if self._realtime:
+            delay = self._origin + time - monotonic()
+            if delay > 0:
+                sleep(delay)
+        return payload
+
+    def write(self, data):
+        index = self._index
+        expected = self._next(WRITE)
+        if bytes(data) != expected:
+            raise ReplayError('Record {}: wrote {!r}, transcript has {!r}.'.format(
+                              index, bytes(data), expected))
+        return len(data)
+
+    def readline(self):
+        return self._next(READ)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self._next(CLEAR)
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Recorder:
+
+    def __init__(self, path, transport=serial_transport):
+        """Record a session to a transcript log.
+
+        Args:
+            path (str): log file path
+            transport (callable): underlying transport
+        """
+        self._path = path
+        self._transport = transport
+
+    def __call__(self, devpath, timeout):
+        return RecordingTransport(self._transport(devpath, timeout), self._path)
+
+
+class Replayer:
+
+    def __init__(self, path, realtime=False):
+        """Replay a session from a transcript log.
+
+        Args:
+            path (str): log file path
+            realtime (bool): replay with the recorded timing instead of as
+                fast as possible
+        """
+        self._records = read_log(path)
+        self._realtime = realtime
+
+    def __call__(self, devpath, timeout):
+        return ReplayTransport(self._records, self._realtime)